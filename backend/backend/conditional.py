@@ -0,0 +1,164 @@
+"""
+Conditional GET for polled resources.
+
+The frontend re-polls booking, payment and slot endpoints every few seconds,
+and most polls return exactly what the client already has. ConditionalGetMixin
+answers those with 304 Not Modified before the payload is serialized.
+
+The validators come from one aggregate query over the rows the response
+contains, and only those:
+
+    SELECT COUNT(DISTINCT id), MAX(updated_at), MAX(payment.updated_at), ...
+    WHERE id IN (<the rows of this page>)
+
+Detail responses aggregate over the one object before the handler runs,
+and also get a Last-Modified header. Paginated lists aggregate over the
+page the paginator just loaded (KeysetPagination: the cursor and page
+size bound it), so polling a large table costs the same as a small one;
+the ETag also covers the page's row IDs, whether more pages follow and any
+requested ?count, so rows entering or leaving the page change it. Any
+update among the rows changes one of the maxima, and so the ETag (which
+also covers the user and the full path, since the payload depends on
+both). Views list in validator_fields every updated_at their payload
+reads, including related rows.
+
+Unpaginated lists would need an aggregate over every visible row, so they
+only compute one to answer a request that carries a validator header.
+
+updated_at is auto_now, which save(update_fields=[...]) and queryset
+.update() skip: writes to these models must name updated_at explicitly.
+
+Responses carry Cache-Control: private, no-cache, so browsers keep the body
+and revalidate each poll with If-None-Match on their own.
+"""
+import hashlib
+import json
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an ETag against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in tags]
+
+
+class NotModified(Exception):
+    """Raised from initial() to answer 304 before the handler runs."""
+
+
+class ConditionalGetMixin:
+    """ViewSet mixin answering unchanged GETs with 304 Not Modified."""
+    conditional_actions = ('list', 'retrieve')
+    # Timestamps the payload depends on; any change to one changes the ETag
+    validator_fields = ('updated_at',)
+
+    def get_validator_queryset(self):
+        """The rows whose changes the response reflects (before pagination)."""
+        return self.filter_queryset(self.get_queryset())
+
+    def is_detail_request(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_validator_aggregates(self):
+        return {f"max_{field.replace('__', '_')}": Max(field) for field in self.validator_fields}
+
+    def get_validators(self, request, page=None):
+        """
+        Compute the ETag and Last-Modified of the response in one query.
+
+        Args:
+            page: The rows of a paginated list response, to scope the validators to
+
+        Returns:
+            tuple or None: (etag, last_modified); None when a detail row does not exist
+        """
+        queryset = self.get_validator_queryset().order_by()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        is_detail = self.is_detail_request()
+        if is_detail:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        if page is not None:
+            queryset = queryset.filter(pk__in=[row.pk for row in page])
+
+        aggregates = self.get_validator_aggregates()
+        values = queryset.aggregate(_rows=Count('pk', distinct=True), **aggregates)
+        if is_detail and not values['_rows']:
+            # Let the handler answer 404
+            return None
+
+        validators = [values[name] for name in sorted(aggregates)]
+        payload = [request.user.pk, request.get_full_path(), values['_rows']]
+        payload += [value.isoformat() if hasattr(value, 'isoformat') else value for value in validators]
+        if page is not None:
+            paginator = self.paginator
+            payload += [
+                [row.pk for row in page],
+                getattr(paginator, 'has_next', None), getattr(paginator, 'has_previous', None),
+                getattr(paginator, 'count', None),
+            ]
+        etag = 'W/"%s"' % hashlib.md5(json.dumps(payload).encode()).hexdigest()
+
+        last_modified = None
+        if is_detail:
+            last_modified = max((value for value in validators if hasattr(value, 'timestamp')), default=None)
+        return etag, last_modified
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since'))
+        return bool(last_modified and if_modified_since and int(last_modified.timestamp()) <= if_modified_since)
+
+    def has_validator_headers(self, request):
+        return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+    def check_not_modified(self, request, page=None):
+        self.conditional_validators = self.get_validators(request, page)
+        if self.conditional_validators and self.is_not_modified(request, *self.conditional_validators):
+            raise NotModified()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        self.conditional_page_pending = False
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        if self.is_detail_request():
+            self.check_not_modified(request)
+        elif self.paginator is not None:
+            # Checked in paginate_queryset, once the page is known
+            self.conditional_page_pending = True
+        elif self.has_validator_headers(request):
+            self.check_not_modified(request)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and getattr(self, 'conditional_page_pending', False):
+            self.conditional_page_pending = False
+            self.check_not_modified(self.request, page)
+        return page
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'conditional_validators', None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ('Authorization',))
+        return response
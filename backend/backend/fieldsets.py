@@ -0,0 +1,152 @@
+"""
+Sparse fieldsets for read endpoints.
+
+Mobile clients rarely need every field of a list row. Serializers using
+SparseFieldsetsMixin let a GET request choose them:
+
+    ?fields=id,status,driver_name     only these fields
+    ?profile=summary                  a named set from Meta.profiles
+    ?profile=summary&expand=slot_data a named set plus extra fields
+
+Without any of these the response is unchanged. Fields that are not
+requested are removed from the serializer, so their SerializerMethodFields
+never run, and load_plan() tells the view which columns and joins the
+remaining fields read, so the query selects only those (.only()) and skips
+joins nobody asked for.
+
+Meta options:
+    profiles: {'summary': (field, ...)}
+    field_dependencies: {field: (path, ...)} for declared fields that read
+        more than a model field of the same name. A path is a model column
+        ('status', 'driver_id') or a relation to join ('customer',
+        'rating__driver').
+    always_load: paths read regardless of the fields requested
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+PROFILE_PARAM = 'profile'
+EXPAND_PARAM = 'expand'
+
+
+def _split(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetsMixin:
+    """Serializer mixin that trims its fields to those the request asked for."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = self.requested_fields(request) if request is not None else None
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """
+        The field names a GET request asked for.
+
+        Returns:
+            frozenset or None: None when the request wants every field
+        """
+        if request is None or request.method != 'GET':
+            return None
+        params = request.query_params
+        fields, profile = _split(params.get(FIELDS_PARAM)), params.get(PROFILE_PARAM)
+        if not fields and not profile:
+            return None
+
+        profiles = getattr(cls.Meta, 'profiles', {})
+        if profile and profile not in profiles:
+            raise ValidationError({PROFILE_PARAM: f"Unknown profile '{profile}'. Available: {', '.join(sorted(profiles))}"})
+
+        requested = set(fields) | set(profiles.get(profile, ())) | set(_split(params.get(EXPAND_PARAM)))
+        unknown = requested - set(cls().fields)
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: f"Unknown fields: {', '.join(sorted(unknown))}"})
+        # The primary key keeps rows addressable
+        return frozenset(requested | {'id'})
+
+    @classmethod
+    def load_plan(cls, fields=None):
+        """
+        The columns and joins serializing `fields` reads.
+
+        Args:
+            fields: Field names, or None for every field
+
+        Returns:
+            tuple: (columns, joins); columns is None when every column is needed
+        """
+        model = cls.Meta.model
+        serializer_fields = cls().fields
+        dependencies = getattr(cls.Meta, 'field_dependencies', {})
+
+        columns, joins = {model._meta.pk.name}, set()
+        paths = set(getattr(cls.Meta, 'always_load', ()))
+        for name in (serializer_fields.keys() if fields is None else fields):
+            field = serializer_fields.get(name)
+            if field is None or field.write_only:
+                continue
+            if name in dependencies:
+                paths.update(dependencies[name])
+            elif '.' in field.source:
+                # customer.get_full_name reads the customer object
+                segments = field.source.split('.')
+                paths.add(_relation_prefix(model, segments) or segments[0])
+            elif _column(model, field.source):
+                # A model field; foreign keys are sent as IDs, so no join
+                columns.add(_column(model, field.source))
+
+        for path in paths:
+            column = _column(model, path.split('__')[0])
+            if column:
+                columns.add(column)
+            if _relation_prefix(model, path.split('__')) == path:
+                joins.add(path)
+        return (None if fields is None else columns), joins
+
+
+def _column(model, name):
+    """The model field stored in column `name` (a field name or attname), if any."""
+    for field in model._meta.concrete_fields:
+        if name in (field.name, field.attname):
+            return field.name
+    return None
+
+
+def _relation_prefix(model, segments):
+    """The longest leading run of relations in `segments`, as a select_related path."""
+    relations = []
+    for segment in segments:
+        try:
+            field = model._meta.get_field(segment)
+        except FieldDoesNotExist:
+            break
+        # driver_id names the column, not the related object
+        if not field.is_relation or segment != field.name:
+            break
+        relations.append(segment)
+        model = field.related_model
+    return '__'.join(relations)
+
+
+def project(queryset, serializer_class, request):
+    """
+    Narrow a queryset to the columns and joins of the fields `request` asked for.
+
+    Args:
+        queryset: Queryset of serializer_class.Meta.model
+        serializer_class: A SparseFieldsetsMixin serializer
+        request: The request (any method; only GETs are narrowed)
+    """
+    columns, joins = serializer_class.load_plan(serializer_class.requested_fields(request))
+    if joins:
+        queryset = queryset.select_related(*joins)
+    if columns is not None:
+        queryset = queryset.only(*columns)
+    return queryset
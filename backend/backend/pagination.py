@@ -0,0 +1,208 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+OFFSET pagination makes the database walk past every skipped row, so page
+1000 costs a thousand pages. Keyset pagination remembers the sort key of
+the last row sent, e.g. (created_at, id), and asks for the rows after it:
+
+    WHERE created_at <= :t AND (created_at < :t OR (created_at = :t AND id < :id))
+    ORDER BY created_at DESC, id DESC
+    LIMIT :page_size + 1
+
+With a composite index on the same columns every page is one index range
+scan, however deep. The sort key is the view's queryset ordering (or the
+model's Meta.ordering, or -created_at), always ending in the primary key so
+that rows sharing a timestamp are neither skipped nor repeated.
+
+Responses look like DRF's cursor pagination:
+
+    {"next": url, "previous": url, "results": [...]}
+
+Counting every matching row is what makes large tables slow, so there is no
+count unless the client asks for one with ?count=exact or ?count=approx.
+The approximate count comes from the PostgreSQL planner's row estimate and
+costs the same on any page; small results (and other databases) are counted
+exactly.
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Below this many estimated rows an exact count is cheap and more useful
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def approximate_count(queryset):
+    """
+    Estimate how many rows a queryset matches without counting them.
+
+    Returns:
+        tuple: (count, is_approximate)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count(), False
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count(), False
+    return estimate, True
+
+
+class KeysetPagination(BasePagination):
+    """Paginate a queryset by its ordering, continuing after the last row sent."""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 200
+    default_ordering = ('-created_at',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        page_size = settings.API_PAGE_SIZE
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except (TypeError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """The queryset's ordering as (field, descending) pairs ending in the primary key."""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering or self.default_ordering)
+        pk_name = queryset.model._meta.pk.name
+        fields = []
+        for field in ordering:
+            if not isinstance(field, str) or '__' in field or field.lstrip('-') == '?':
+                raise ValueError(f"Keyset pagination needs plain field orderings, got {field!r}")
+            name = field.lstrip('-')
+            fields.append((pk_name if name == 'pk' else name, field.startswith('-')))
+
+        if not any(name == pk_name for name, _ in fields):
+            fields.append((pk_name, fields[-1][1]))
+        return fields
+
+    def encode_cursor(self, position, reverse=False):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, queryset, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = payload['p']
+            if len(values) != len(fields):
+                raise ValueError
+            position = [
+                queryset.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError) as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+    def row_position(self, row, fields):
+        # Dates, times and datetimes travel as ISO strings; to_python() reads them back
+        values = [getattr(row, name) for name, _ in fields]
+        return [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+
+    def after(self, fields, position):
+        """Rows strictly after `position` in the order given by `fields`."""
+        clauses = []
+        for i, (name, descending) in enumerate(fields):
+            equal = {prefix: value for (prefix, _), value in zip(fields[:i], position[:i])}
+            clauses.append(Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": position[i]}))
+
+        # Redundant bound on the leading column so the index range starts at the cursor
+        first, descending = fields[0]
+        return Q(**{f"{first}__{'lte' if descending else 'gte'}": position[0]}) & reduce(or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.count_query_param)
+        page_size = self.get_page_size(request)
+        fields = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request, queryset, fields)
+
+        self.count, self.count_is_approximate = None, False
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'approx':
+            self.count, self.count_is_approximate = approximate_count(queryset)
+
+        deferred, is_defer = queryset.query.deferred_loading
+        if deferred and not is_defer:
+            # An .only() projection still needs the columns the cursor is built from
+            queryset = queryset.only(*deferred, *[name for name, _ in fields])
+
+        walk = [(name, descending != reverse) for name, descending in fields]
+        rows = queryset.order_by(*[f"{'-' if descending else ''}{name}" for name, descending in walk])
+        if position is not None:
+            rows = rows.filter(self.after(walk, position))
+        rows = list(rows[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = bool(rows), has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None and bool(rows)
+
+        self.first_position = self.row_position(rows[0], fields) if rows else None
+        self.last_position = self.row_position(rows[-1], fields) if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_is_approximate'] = self.count_is_approximate
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_approximate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
@@ -72,7 +72,7 @@ INSTALLED_APPS = [
     # Local apps
     'users',
     'users.admin_panel',
-    'bookings',
+    'bookings.apps.BookingsConfig',
     'notifications',
     'payments',
     'tracking',
@@ -117,6 +117,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -265,6 +266,9 @@ CORS_ALLOW_HEADERS = [
     'Bypass-Tunnel-Reminder',
 ]
 
+# Response headers cross-origin scripts may read (the offer long-poll's back-off)
+CORS_EXPOSE_HEADERS = ['Retry-After']
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -330,6 +334,33 @@ else:
 EMAIL_VERIFICATION_REQUIRED = True
 EMAIL_VERIFICATION_TOKEN_EXPIRY_HOURS = 24
 
+# Driver dispatch
+# 'sequential' offers a booking to one driver at a time; 'broadcast' offers it
+# to the nearest DRIVER_BROADCAST_FANOUT drivers at once (first accept wins).
+DRIVER_DISPATCH_MODE = config('DRIVER_DISPATCH_MODE', default='sequential')
+DRIVER_BROADCAST_FANOUT = config('DRIVER_BROADCAST_FANOUT', default=3, cast=int)
+# When > 0, bookings created within this many seconds of each other are
+# matched to drivers together as one min-cost assignment (0 disables batching).
+DRIVER_DISPATCH_BATCH_WINDOW_SECONDS = config('DRIVER_DISPATCH_BATCH_WINDOW_SECONDS', default=0, cast=int)
+
+# Geofence transitions: a booking is marked 'started' once its driver moves this
+# far from where the job was first tracked, and 'arrived' within this distance
+# of the pickup point
+GEOFENCE_AUTO_TRANSITIONS = config('GEOFENCE_AUTO_TRANSITIONS', default=True, cast=bool)
+GEOFENCE_START_RADIUS_METERS = config('GEOFENCE_START_RADIUS_METERS', default=150, cast=int)
+GEOFENCE_ARRIVAL_RADIUS_METERS = config('GEOFENCE_ARRIVAL_RADIUS_METERS', default=100, cast=int)
+
+# Driver presence (tracking.presence): drivers whose app sends no heartbeat or
+# location ping for this long stop getting offers and are swept offline
+DRIVER_PRESENCE_TTL_SECONDS = config('DRIVER_PRESENCE_TTL_SECONDS', default=90, cast=int)
+
+# Driver location history (trip replays, dispute and fuel audits)
+LOCATION_HISTORY_RETENTION_DAYS = config('LOCATION_HISTORY_RETENTION_DAYS', default=365, cast=int)
+
+# Page size for list endpoints using backend.pagination.KeysetPagination
+# (clients can ask for up to 200 with ?page_size=)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+
 
 # Celery Configuration
 # Priority: explicit CELERY_TASK_ALWAYS_EAGER env var > broker URL > production detection
@@ -361,6 +392,44 @@ else:
 
 REDIS_URL = CELERY_BROKER_URL
 
+# Driver offers expire through countdown tasks and the check_driver_timeouts beat
+# sweep. Neither runs in eager mode (no worker or beat, e.g. on Render), so there
+# booking requests expire overdue offers themselves (DriverMatchingService.expire_overdue_offers).
+DRIVER_OFFER_EXPIRY_ON_REQUEST = config('DRIVER_OFFER_EXPIRY_ON_REQUEST', default=CELERY_TASK_ALWAYS_EAGER, cast=bool)
+
+# Cache
+# Shared state such as the driver eligibility index must be visible to both web
+# and worker processes, so use Redis when one is configured. Without one
+# (local dev, eager mode) fall back to the per-process in-memory cache.
+CACHE_URL = config('CACHE_URL', default=PROD_BROKER_URL or '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Whether every process (web workers, Celery) sees the same cache. State kept
+# only in the cache must fall back to the database when it does not.
+CACHE_IS_SHARED = CACHE_URL.startswith(('redis://', 'rediss://'))
+
+# Live position streams (tracking.streaming). Redis relays positions between
+# web processes; without it streams only see pings handled by their own process.
+# Streams and the offer long-poll are served over ASGI (backend.asgi) so an open
+# connection does not tie up a worker: see the gunicorn command in Procfile/render.yaml
+STREAM_BROKER_URL = config('STREAM_BROKER_URL', default=CACHE_URL)
+# Streams end after this long and the client reconnects (keep under the server timeout)
+STREAM_MAX_SECONDS = config('STREAM_MAX_SECONDS', default=90, cast=int)
+# Longest a driver's incoming-offer long-poll is held open (bookings.offers);
+# keep under the server and client timeouts
+OFFER_WAIT_SECONDS = config('OFFER_WAIT_SECONDS', default=25, cast=int)
+
 # Base URL for redirects
 BASE_URL = config('BASE_URL', default='http://localhost:8000')
 
@@ -382,7 +451,7 @@ from celery.schedules import crontab
 CELERY_BEAT_SCHEDULE = {
     'check_driver_timeouts': {
         'task': 'bookings.tasks.check_driver_timeouts',
-        'schedule': 10.0, # Every 10 seconds
+        'schedule': 60.0, # Safety net only - offers expire via expire_driver_offer_task
     },
     'cleanup_old_bookings': {
         'task': 'bookings.tasks.cleanup_old_bookings',
@@ -392,4 +461,32 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'bookings.tasks.auto_cancel_pending_bookings',
         'schedule': crontab(hour='*/1', minute=0), # Every hour
     },
+    'update_speed_profile': {
+        'task': 'tracking.tasks.update_speed_profile_task',
+        'schedule': crontab(minute='*/15'), # Feeds hour-of-day speeds into ETAs
+    },
+    'flush_driver_locations': {
+        'task': 'tracking.tasks.flush_driver_locations_task',
+        'schedule': 30.0, # Safety net - pings schedule their own flush
+    },
+    'refresh_heatmap': {
+        'task': 'tracking.tasks.refresh_heatmap_task',
+        'schedule': 300.0, # Supply/demand snapshot every 5 minutes
+    },
+    'rebuild_eligibility_index': {
+        'task': 'vehicles.tasks.rebuild_eligibility_index_task',
+        'schedule': crontab(hour=0, minute=5), # Daily, after expiry dates roll over
+    },
+    'expire_driver_presence': {
+        'task': 'tracking.tasks.expire_driver_presence_task',
+        'schedule': 30.0, # Drivers with lapsed heartbeats go offline
+    },
+    'rollup_driver_shifts': {
+        'task': 'users.tasks.rollup_driver_shifts_task',
+        'schedule': 300.0, # Keeps today's hours online current on dashboards
+    },
+    'prune_location_history': {
+        'task': 'tracking.tasks.prune_location_history_task',
+        'schedule': crontab(hour=1, minute=30), # Daily, off-peak
+    },
 }
@@ -0,0 +1,201 @@
+"""
+Live driver availability registry.
+
+Keeps each driver's dispatch state in the cache so busy checks on the
+dispatch hot path are single key lookups instead of Booking queries:
+
+    free                    no entry
+    offered(booking_id)     holding an unanswered offer for a booking
+    on_job(booking_id)      assigned to an active booking
+
+Booking transitions update the registry as they happen; entries are
+recomputed from the database whenever a driver is released, and the whole
+registry is resynced from the database when it is missing or stale.
+
+The registry is only authoritative when the cache is shared by every process
+(Redis, see CACHE_IS_SHARED in settings). With the per-process in-memory
+cache one web worker would not see offers made or released by another, so
+lookups read the database instead, as they did before the registry.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Value
+
+logger = logging.getLogger(__name__)
+
+FREE = 'free'
+OFFERED = 'offered'
+ON_JOB = 'on_job'
+
+KEY_PREFIX = 'availability:driver:'
+SYNC_MARKER_KEY = 'availability:synced'
+RESYNC_INTERVAL_SECONDS = 15 * 60
+
+# Offers expire on their own in case the release is ever missed
+OFFER_TTL_SECONDS = 5 * 60
+
+# Mirrors DriverMatchingService.ACTIVE_JOB_STATUSES / ACTIVE_NOTIFICATION_STATUSES
+ACTIVE_JOB_STATUSES = ('accepted', 'started', 'arrived')
+ACTIVE_NOTIFICATION_STATUSES = ('pending', 'searching_driver')
+
+
+def _key(driver_id):
+    return f"{KEY_PREFIX}{driver_id}"
+
+
+def get_state(driver_id):
+    """Return (state, booking_id) for a driver; (FREE, None) when free."""
+    return get_states([driver_id])[driver_id]
+
+
+def get_states(driver_ids):
+    """Return {driver_id: (state, booking_id)} for the given drivers in one lookup."""
+    driver_ids = list(driver_ids)
+    if not settings.CACHE_IS_SHARED:
+        states = _database_states(driver_ids)
+        return {driver_id: states.get(driver_id, (FREE, None)) for driver_id in driver_ids}
+
+    entries = cache.get_many([SYNC_MARKER_KEY] + [_key(driver_id) for driver_id in driver_ids])
+    if not entries.get(SYNC_MARKER_KEY):
+        rebuild()
+        entries = cache.get_many([_key(driver_id) for driver_id in driver_ids])
+    return {
+        driver_id: tuple(entries.get(_key(driver_id)) or (FREE, None))
+        for driver_id in driver_ids
+    }
+
+
+def is_busy(state, exclude_booking_id=None, include_offers=True):
+    """
+    Return True if a (state, booking_id) pair keeps the driver from a new offer.
+    A state held for `exclude_booking_id` itself does not count.
+    """
+    status, booking_id = state
+    if status == FREE:
+        return False
+    if exclude_booking_id is not None and booking_id == exclude_booking_id:
+        return False
+    if status == OFFERED:
+        return include_offers
+    return True
+
+
+def mark_offered(driver_id, booking_id):
+    cache.set(_key(driver_id), (OFFERED, booking_id), OFFER_TTL_SECONDS)
+
+
+def mark_on_job(driver_id, booking_id):
+    cache.set(_key(driver_id), (ON_JOB, booking_id), None)
+
+
+def release(driver_id, booking_id):
+    """
+    Release a driver from `booking_id`. A resolved offer simply frees the
+    driver; at the end of a job their state is recomputed from the database,
+    since they may still hold another active booking.
+    """
+    entry = cache.get(_key(driver_id))
+    if not entry or entry[1] != booking_id:
+        return
+    if entry[0] == OFFERED:
+        cache.delete(_key(driver_id))
+        return
+    sync_driver(driver_id)
+
+
+def sync_booking(booking):
+    """Update the registry for the drivers on a booking after it was saved."""
+    if booking.driver_id and booking.status in ACTIVE_JOB_STATUSES:
+        mark_on_job(booking.driver_id, booking.id)
+        return
+
+    if booking.current_notified_driver_id and booking.status in ACTIVE_NOTIFICATION_STATUSES:
+        mark_offered(booking.current_notified_driver_id, booking.id)
+        return
+
+    for driver_id in {booking.driver_id, booking.current_notified_driver_id}:
+        if driver_id:
+            release(driver_id, booking.id)
+
+
+def _database_states(driver_ids=None):
+    """Compute driver states from Booking and DriverOrderRequest rows."""
+    from bookings.models import Booking
+    from tracking.models import DriverOrderRequest
+
+    jobs = Booking.objects.filter(driver__isnull=False, status__in=ACTIVE_JOB_STATUSES)
+    notified = Booking.objects.filter(
+        current_notified_driver__isnull=False, status__in=ACTIVE_NOTIFICATION_STATUSES
+    )
+    offers = DriverOrderRequest.objects.filter(
+        status='pending',
+        expires_at__isnull=False,
+        booking__status__in=ACTIVE_NOTIFICATION_STATUSES
+    )
+    if driver_ids is not None:
+        jobs = jobs.filter(driver_id__in=driver_ids)
+        notified = notified.filter(current_notified_driver_id__in=driver_ids)
+        offers = offers.filter(driver_id__in=driver_ids)
+
+    # One round trip: (driver_id, booking_id, rank) rows; the highest rank wins,
+    # so an active job takes precedence over any offer
+    rows = offers.order_by().annotate(rank=Value(0)).values_list('driver_id', 'booking_id', 'rank').union(
+        notified.order_by().annotate(rank=Value(1)).values_list('current_notified_driver_id', 'id', 'rank'),
+        jobs.order_by().annotate(rank=Value(2)).values_list('driver_id', 'id', 'rank'),
+        all=True
+    )
+    states, ranks = {}, {}
+    for driver_id, booking_id, rank in rows:
+        if rank >= ranks.get(driver_id, -1):
+            states[driver_id] = (ON_JOB if rank == 2 else OFFERED, booking_id)
+            ranks[driver_id] = rank
+    return states
+
+
+def _store(states, driver_ids):
+    for driver_id in driver_ids:
+        state = states.get(driver_id)
+        if state is None:
+            cache.delete(_key(driver_id))
+        elif state[0] == OFFERED:
+            mark_offered(driver_id, state[1])
+        else:
+            mark_on_job(driver_id, state[1])
+
+
+def sync_driver(driver_id):
+    """Recompute one driver's state from the database."""
+    _store(_database_states([driver_id]), [driver_id])
+
+
+def forget(driver_ids):
+    """Drop registry entries for drivers (e.g. deleted or rolled-back users)."""
+    cache.delete_many([_key(driver_id) for driver_id in driver_ids])
+
+
+def rebuild():
+    """Resync every driver's state from the database."""
+    from users.models import User
+
+    states = _database_states()
+    driver_ids = set(User.objects.filter(role='driver').values_list('id', flat=True))
+
+    cache.set_many({
+        _key(driver_id): state for driver_id, state in states.items()
+        if state[0] == ON_JOB
+    }, None)
+    cache.set_many({
+        _key(driver_id): state for driver_id, state in states.items()
+        if state[0] == OFFERED
+    }, OFFER_TTL_SECONDS)
+    forget(driver_ids - set(states))
+
+    cache.set(SYNC_MARKER_KEY, True, RESYNC_INTERVAL_SECONDS)
+    logger.info(f"Resynced driver availability registry ({len(states)} busy of {len(driver_ids)} drivers)")
+
+
+def invalidate():
+    """Force a resync from the database on the next lookup."""
+    cache.delete(SYNC_MARKER_KEY)
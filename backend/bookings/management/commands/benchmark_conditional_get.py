@@ -0,0 +1,111 @@
+"""
+Benchmark conditional GET on the polled endpoints.
+
+Seeds the same synthetic data as check_query_budget, then polls each endpoint
+the way the frontend does, twice: once sending no validators (every poll is a
+full 200) and once replaying the last ETag in If-None-Match. Every
+--change-every polls the underlying row is modified, so the conditional run
+also shows that changes come through. Prints bytes, time and queries per
+endpoint and the savings. Everything is rolled back at the end.
+
+Usage:
+    python manage.py benchmark_conditional_get
+    python manage.py benchmark_conditional_get --polls 200 --change-every 20
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, DriverSlot
+from payments.models import Payment
+from .check_query_budget import BudgetRollback, Command as QueryBudgetCommand
+
+
+class Command(BaseCommand):
+    help = 'Measure poll traffic with and without conditional GET (ETag / 304)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=30, help='Bookings of each kind to seed')
+        parser.add_argument('--polls', type=int, default=100, help='Polls per endpoint')
+        parser.add_argument('--change-every', type=int, default=10,
+                            help='Modify the polled data every N polls (0 = never)')
+
+    def handle(self, *args, **options):
+        if options['polls'] < 1 or options['change_every'] < 0:
+            raise CommandError('--polls must be positive and --change-every not negative.')
+
+        logging.disable(logging.CRITICAL)
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise BudgetRollback()
+        except BudgetRollback:
+            pass
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def run(self, options):
+        users = QueryBudgetCommand().seed(options['rows'])
+        customer, driver = users['customer'], users['driver']
+        booking = Booking.objects.filter(customer=customer, payment__isnull=False).order_by('-id').first()
+        payment = Payment.objects.get(booking=booking)
+        # List ETags only cover the page, so the list polls modify a row on the first page
+        newest = Booking.objects.filter(customer=customer).order_by('-created_at', '-id').first()
+        slot = DriverSlot.objects.filter(driver=driver).order_by('-date', '-start_time', '-id').first()
+
+        # (name, role, path, row modified every --change-every polls)
+        endpoints = (
+            ('bookings list', 'customer', '/api/bookings/bookings/', newest),
+            ('booking detail', 'customer', f'/api/bookings/bookings/{booking.id}/', booking),
+            ('payment status', 'customer', f'/api/payments/payments/{payment.id}/status/', payment),
+            ('slot list', 'driver', '/api/bookings/driver-slots/', slot),
+        )
+
+        self.stdout.write(
+            f"{options['polls']} polls per endpoint, data changing every {options['change_every'] or 'never'} polls\n"
+        )
+        self.stdout.write(f"{'endpoint':<16} {'mode':<12} {'200':>5} {'304':>5} {'KB':>9} {'ms':>8} {'queries':>8}")
+        for name, role, path, row in endpoints:
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(users[role])
+            plain = self.poll(client, path, row, options, conditional=False)
+            conditional = self.poll(client, path, row, options, conditional=True)
+            for mode, stats in (('always 200', plain), ('conditional', conditional)):
+                self.stdout.write(
+                    f"{name:<16} {mode:<12} {stats['ok']:>5} {stats['not_modified']:>5} "
+                    f"{stats['bytes'] / 1024:>9.1f} {stats['seconds'] * 1000:>8.0f} {stats['queries']:>8}"
+                )
+            saved = 1 - conditional['bytes'] / plain['bytes'] if plain['bytes'] else 0
+            faster = 1 - conditional['seconds'] / plain['seconds'] if plain['seconds'] else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"{'':<16} saved {saved:.0%} of bytes and {faster:.0%} of server time"
+            ))
+
+    def poll(self, client, path, row, options, conditional):
+        stats = {'ok': 0, 'not_modified': 0, 'bytes': 0, 'seconds': 0.0, 'queries': 0}
+        etag = None
+        for i in range(options['polls']):
+            if options['change_every'] and i and i % options['change_every'] == 0:
+                type(row).objects.filter(pk=row.pk).update(updated_at=timezone.now())
+
+            headers = {'HTTP_IF_NONE_MATCH': etag} if conditional and etag else {}
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, **headers)
+            stats['seconds'] += time.perf_counter() - started
+            stats['queries'] += len(queries)
+
+            if response.status_code == 304:
+                stats['not_modified'] += 1
+            elif response.status_code == 200:
+                stats['ok'] += 1
+                etag = response.get('ETag')
+            else:
+                raise CommandError(f"GET {path} answered {response.status_code}")
+            stats['bytes'] += len(response.content) + sum(len(k) + len(v) + 4 for k, v in response.items())
+        return stats
@@ -0,0 +1,157 @@
+"""
+Query budget check for the list endpoints.
+
+Seeds synthetic bookings (with payments, ratings, slots and driver offers) at
+two sizes and requests each list endpoint through the test client, counting
+the queries each response takes. Fails when an endpoint needs more queries
+than its budget, or more queries for the larger seed than for the smaller one
+(a query per row crept back in). Everything runs inside a transaction that is
+rolled back at the end, so the database is left untouched.
+
+Usage:
+    python manage.py check_query_budget
+    python manage.py check_query_budget --rows 3 40 --verbose
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, DriverSlot, Rating
+from payments.models import Payment
+from tracking.models import DriverLocation, DriverOrderRequest
+from users.models import User
+
+# (name, role of the requesting user, path, maximum queries per request).
+# Conditional GET views (backend.conditional) spend one more on their ETag, and
+# without a shared cache the driver busy check reads the database
+# (bookings.availability).
+ENDPOINTS = (
+    ('bookings (customer)', 'customer', '/api/bookings/bookings/', 2),
+    ('bookings (driver)', 'driver', '/api/bookings/bookings/', 2),
+    ('bookings (admin)', 'admin', '/api/bookings/bookings/', 2),
+    ('available jobs (driver)', 'driver', '/api/bookings/bookings/available/', 1 if settings.CACHE_IS_SHARED else 2),
+    ('admin bookings', 'admin', '/api/admin/bookings/', 1),
+    ('driver slots (admin)', 'admin', '/api/bookings/driver-slots/', 2),
+)
+
+
+class BudgetRollback(Exception):
+    """Raised to roll back the seeded rows."""
+
+
+class Command(BaseCommand):
+    help = 'Check that list endpoints stay within a fixed query budget whatever their size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs=2, default=[3, 30], metavar=('SMALL', 'LARGE'),
+                            help='Bookings of each kind to seed for the two runs')
+        parser.add_argument('--verbose', action='store_true', help='Print the queries of the larger run')
+
+    def handle(self, *args, **options):
+        small, large = options['rows']
+        if not 0 < small < large:
+            raise CommandError('--rows needs two sizes, the first smaller than the second.')
+
+        logging.disable(logging.CRITICAL)
+        try:
+            counts = {}
+            for rows in (small, large):
+                try:
+                    with transaction.atomic():
+                        counts[rows] = self.measure(rows, options['verbose'] and rows == large)
+                        raise BudgetRollback()
+                except BudgetRollback:
+                    pass
+        finally:
+            logging.disable(logging.NOTSET)
+
+        failures = []
+        for name, _, _, budget in ENDPOINTS:
+            (small_status, small_queries), (large_status, large_queries) = counts[small][name], counts[large][name]
+            problems = []
+            if small_status != 200 or large_status != 200:
+                problems.append(f"status {small_status}/{large_status}")
+            if large_queries > budget:
+                problems.append(f"over budget of {budget}")
+            if large_queries > small_queries:
+                problems.append('grows with the number of rows')
+
+            line = f"{name:<26} {small_queries:>3} queries for {small} rows, {large_queries:>3} for {large} (budget {budget})"
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{line}  FAIL: {', '.join(problems)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{line}  ok"))
+
+        if failures:
+            raise CommandError(f"Query budget exceeded: {', '.join(failures)}")
+
+    def seed(self, rows):
+        """Seed one user per role and `rows` bookings of each kind the serializer treats differently."""
+        run_id = timezone.now().strftime('%H%M%S%f')
+        users = {
+            role: User.objects.create(username=f'budget_{role}_{run_id}', role=role, password='!',
+                                      is_online=True, is_driver_approved=True)
+            for role in ('customer', 'driver', 'admin')
+        }
+        customer, driver = users['customer'], users['driver']
+        # Accepted jobs go to a second driver, so the first one still sees incoming offers
+        busy_driver = User.objects.create(username=f'budget_busy_{run_id}', role='driver', password='!',
+                                          is_online=True, is_driver_approved=True)
+        DriverLocation.objects.bulk_create([
+            DriverLocation(driver=driver, latitude=-1.29, longitude=36.82),
+            DriverLocation(driver=busy_driver, latitude=-1.28, longitude=36.81),
+        ])
+
+        now = timezone.now()
+        slots = DriverSlot.objects.bulk_create([
+            DriverSlot(driver=driver, date=(now + timedelta(days=i + 1)).date(),
+                       start_time='09:00', end_time='11:00', status='booked')
+            for i in range(rows)
+        ])
+
+        def booking(status, **fields):
+            return Booking(customer=customer, location_name='Budget', latitude=-1.3, longitude=36.8,
+                           status=status, estimated_price=1500, **fields)
+
+        completed = Booking.objects.bulk_create([
+            booking('completed', driver=driver, accepted_at=now, completed_at=now, slot=slot) for slot in slots
+        ])
+        Booking.objects.bulk_create([booking('accepted', driver=busy_driver, accepted_at=now) for _ in range(rows)])
+        Booking.objects.bulk_create([booking('pending', current_notified_driver=driver) for _ in range(rows)])
+        broadcast = Booking.objects.bulk_create([booking('pending') for _ in range(rows)])
+
+        Payment.objects.bulk_create([Payment(booking=b, amount=1500, status='paid') for b in completed])
+        Rating.objects.bulk_create([Rating(booking=b, customer=customer, driver=driver, score=5) for b in completed])
+        DriverOrderRequest.objects.bulk_create([
+            DriverOrderRequest(booking=b, driver=driver, distance_km=1.0, queue_position=1,
+                               status='pending', expires_at=now + timedelta(seconds=30))
+            for b in broadcast
+        ])
+        return users
+
+    def measure(self, rows, verbose):
+        users = self.seed(rows)
+        clients = {}
+        for role, user in users.items():
+            clients[role] = APIClient(SERVER_NAME='localhost')
+            clients[role].force_authenticate(user)
+
+        results = {}
+        for name, role, path, _ in ENDPOINTS:
+            # Warm caches (availability registry, speed profile) outside the count
+            clients[role].get(path)
+            with CaptureQueriesContext(connection) as queries:
+                response = clients[role].get(path)
+            results[name] = (response.status_code, len(queries))
+            if verbose:
+                self.stdout.write(f"-- {name}")
+                for query in queries.captured_queries:
+                    self.stdout.write(f"   {query['sql'][:200]}")
+        return results
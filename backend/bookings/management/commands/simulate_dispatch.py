@@ -0,0 +1,386 @@
+"""
+Dispatch simulator and time-to-match benchmark.
+
+Seeds synthetic drivers (with DriverLocation and Vehicle) and bookings, then replays
+driver accept/reject/timeout behaviour through DriverMatchingService on a
+simulated clock. Everything runs inside a transaction that is rolled back
+at the end, so the database is left untouched.
+
+Usage:
+    python manage.py simulate_dispatch --drivers 300 --bookings 200
+    python manage.py simulate_dispatch --replay-history --output results.json
+"""
+import heapq
+import json
+import logging
+import math
+import random
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from bookings import availability, waitlist
+from bookings.models import Booking
+from bookings.services import DriverMatchingService
+from tracking.geo import KM_PER_DEGREE_LAT, grid_cell
+from tracking import presence
+from tracking.models import DriverLocation, DriverOrderRequest
+from users.models import User
+from vehicles import eligibility
+from vehicles.models import Vehicle
+
+
+class SimulationRollback(Exception):
+    """Raised to roll back the simulation transaction."""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+def summarize(values):
+    if not values:
+        return {'mean': None, 'p50': None, 'p90': None, 'p95': None, 'p99': None, 'max': None}
+    return {
+        'mean': round(sum(values) / len(values), 3),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+class DriverBehaviour:
+    """Samples how a driver responds to an offer and how long they take."""
+
+    def __init__(self, rng, accept_rate, reject_rate, accept_latencies=None, reject_latencies=None):
+        self.rng = rng
+        self.accept_rate = accept_rate
+        self.reject_rate = reject_rate
+        self.accept_latencies = accept_latencies
+        self.reject_latencies = reject_latencies
+
+    @classmethod
+    def from_history(cls, rng):
+        """Derive response rates and latencies from past DriverOrderRequest rows."""
+        responses = DriverOrderRequest.objects.filter(
+            status__in=['accepted', 'rejected', 'timeout'],
+            responded_at__isnull=False
+        ).values_list('status', 'notified_at', 'responded_at')
+
+        counts = {'accepted': 0, 'rejected': 0, 'timeout': 0}
+        latencies = {'accepted': [], 'rejected': []}
+        for status, notified_at, responded_at in responses:
+            counts[status] += 1
+            if status in latencies and responded_at >= notified_at:
+                latencies[status].append((responded_at - notified_at).total_seconds())
+
+        total = sum(counts.values())
+        if not total:
+            raise CommandError('No historical driver responses to replay.')
+
+        return cls(
+            rng,
+            accept_rate=counts['accepted'] / total,
+            reject_rate=counts['rejected'] / total,
+            accept_latencies=latencies['accepted'] or None,
+            reject_latencies=latencies['rejected'] or None,
+        )
+
+    def sample(self, timeout_seconds):
+        """Return (outcome, seconds until the outcome happens)."""
+        roll = self.rng.random()
+        if roll < self.accept_rate:
+            if self.accept_latencies:
+                return 'accept', min(self.rng.choice(self.accept_latencies), timeout_seconds)
+            return 'accept', self.rng.uniform(2, min(20, timeout_seconds))
+        if roll < self.accept_rate + self.reject_rate:
+            if self.reject_latencies:
+                return 'reject', min(self.rng.choice(self.reject_latencies), timeout_seconds)
+            return 'reject', self.rng.uniform(1, min(10, timeout_seconds))
+        return 'timeout', timeout_seconds
+
+    def describe(self):
+        return {
+            'accept_rate': round(self.accept_rate, 4),
+            'reject_rate': round(self.reject_rate, 4),
+            'timeout_rate': round(1 - self.accept_rate - self.reject_rate, 4),
+            'latency_source': 'history' if self.accept_latencies or self.reject_latencies else 'synthetic',
+        }
+
+
+class Command(BaseCommand):
+    help = 'Simulate driver dispatch at scale and report time-to-match, queries per booking and throughput as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=200, help='Synthetic online drivers to seed')
+        parser.add_argument('--bookings', type=int, default=100, help='Synthetic bookings to dispatch')
+        parser.add_argument('--center-lat', type=float, default=-1.2864)
+        parser.add_argument('--center-lon', type=float, default=36.8172)
+        parser.add_argument('--spread-km', type=float, default=15.0, help='Radius drivers and bookings are spread over')
+        parser.add_argument('--accept-rate', type=float, default=0.6)
+        parser.add_argument('--reject-rate', type=float, default=0.25)
+        parser.add_argument('--arrival-interval', type=float, default=10.0, help='Seconds between booking arrivals')
+        parser.add_argument('--job-minutes', type=float, default=45.0, help='How long an accepted job keeps a driver busy')
+        parser.add_argument('--replay-history', action='store_true',
+                            help='Use historical DriverOrderRequest responses and booking locations')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--verbose', action='store_true', help='Keep service logging enabled')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.timeout_seconds = DriverMatchingService.DRIVER_RESPONSE_TIMEOUT_SECONDS
+
+        if options['replay_history']:
+            behaviour = DriverBehaviour.from_history(self.rng)
+        else:
+            if options['accept_rate'] + options['reject_rate'] > 1:
+                raise CommandError('--accept-rate plus --reject-rate cannot exceed 1.')
+            behaviour = DriverBehaviour(self.rng, options['accept_rate'], options['reject_rate'])
+
+        if not options['verbose']:
+            logging.disable(logging.CRITICAL)
+
+        # Outbound SMS is switched off and Celery runs inline for the whole run
+        from backend.celery import app
+        from notifications.services import sms_service
+        sms_configured = sms_service.is_configured
+        always_eager = app.conf.task_always_eager
+        sms_service.is_configured = False
+        app.conf.task_always_eager = True
+
+        report = None
+        self.driver_ids = []
+        try:
+            # Presence expires on the wall clock, not the simulated one
+            with override_settings(CELERY_TASK_ALWAYS_EAGER=True, DRIVER_PRESENCE_TTL_SECONDS=60 * 60):
+                with transaction.atomic():
+                    report = self.run_simulation(options, behaviour)
+                    raise SimulationRollback()
+        except SimulationRollback:
+            pass
+        finally:
+            # Cached dispatch state still refers to the rolled-back drivers
+            eligibility.invalidate()
+            if self.driver_ids:
+                availability.forget(self.driver_ids)
+                presence.go_offline(self.driver_ids)
+            availability.invalidate()
+            sms_service.is_configured = sms_configured
+            app.conf.task_always_eager = always_eager
+            logging.disable(logging.NOTSET)
+
+        output = json.dumps(report, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote simulation report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def random_point(self, lat, lon, spread_km):
+        distance_km = spread_km * math.sqrt(self.rng.random())
+        bearing = self.rng.uniform(0, 2 * math.pi)
+        dlat = distance_km * math.cos(bearing) / KM_PER_DEGREE_LAT
+        dlon = distance_km * math.sin(bearing) / (KM_PER_DEGREE_LAT * math.cos(math.radians(lat)))
+        return lat + dlat, lon + dlon
+
+    def seed_drivers(self, options, run_id):
+        drivers = User.objects.bulk_create([
+            User(
+                username=f'sim_driver_{run_id}_{i}',
+                role='driver',
+                is_online=True,
+                is_active=True,
+                is_driver_approved=True,
+                password='!',
+            )
+            for i in range(options['drivers'])
+        ])
+        if not drivers or drivers[0].pk is None:
+            drivers = list(User.objects.filter(username__startswith=f'sim_driver_{run_id}_'))
+
+        locations = []
+        for driver in drivers:
+            lat, lon = self.random_point(options['center_lat'], options['center_lon'], options['spread_km'])
+            locations.append(DriverLocation(
+                driver=driver, latitude=lat, longitude=lon, grid_cell=grid_cell(lat, lon)
+            ))
+        DriverLocation.objects.bulk_create(locations)
+
+        # Every synthetic driver gets a compliant truck that can take any job
+        Vehicle.objects.bulk_create([
+            Vehicle(
+                driver=driver,
+                plate_number=f'SIM{run_id[-6:]}{i:05d}',
+                vehicle_type='exhauster',
+                capacity=10000,
+                make='Sim',
+                model='Sim',
+                year=timezone.now().year,
+            )
+            for i, driver in enumerate(drivers)
+        ])
+        eligibility.invalidate()
+        for driver in drivers:
+            presence.go_online(driver.id)
+        self.driver_ids = [driver.id for driver in drivers]
+        return drivers
+
+    def booking_points(self, options):
+        if options['replay_history']:
+            history = list(
+                Booking.objects.filter(driver_requests__isnull=False)
+                .distinct().order_by('-created_at')
+                .values_list('latitude', 'longitude')[:options['bookings']]
+            )
+            if history:
+                return [history[i % len(history)] for i in range(options['bookings'])]
+        return [
+            self.random_point(options['center_lat'], options['center_lon'], options['spread_km'])
+            for _ in range(options['bookings'])
+        ]
+
+    def run_simulation(self, options, behaviour):
+        run_id = timezone.now().strftime('%Y%m%d%H%M%S')
+        self.seed_drivers(options, run_id)
+        customer = User.objects.create(
+            username=f'sim_customer_{run_id}', role='customer', password='!'
+        )
+
+        job_seconds = options['job_minutes'] * 60
+        active_jobs = []  # heap of (sim finish time, booking id)
+        time_to_match = []
+        queries_per_booking = []
+        offers_per_booking = []
+        matched = 0
+
+        started = time.perf_counter()
+        for index, (lat, lon) in enumerate(self.booking_points(options)):
+            arrival = index * options['arrival_interval']
+
+            # Free drivers whose jobs finished before this booking arrived
+            finished = []
+            while active_jobs and active_jobs[0][0] <= arrival:
+                finished.append(heapq.heappop(active_jobs)[1])
+            if finished:
+                finished_jobs = Booking.objects.filter(id__in=finished)
+                freed = list(finished_jobs.values_list('driver_id', 'id'))
+                finished_jobs.update(status='completed', completed_at=timezone.now())
+                for driver_id, booking_id in freed:
+                    availability.release(driver_id, booking_id)
+
+            booking = Booking.objects.create(
+                customer=customer,
+                location_name=f'Simulated booking {index}',
+                latitude=lat,
+                longitude=lon,
+                status='searching_driver',
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                matched_after = self.dispatch(booking, behaviour)
+
+            queries_per_booking.append(len(queries))
+            offers_per_booking.append(
+                DriverOrderRequest.objects.filter(booking=booking, expires_at__isnull=False).count()
+            )
+            if matched_after is not None:
+                matched += 1
+                time_to_match.append(round(matched_after, 3))
+                heapq.heappush(active_jobs, (arrival + matched_after + job_seconds, booking.id))
+
+        wall_seconds = time.perf_counter() - started
+        total = options['bookings']
+
+        # Stranded bookings are about to be rolled back
+        for stranded in Booking.objects.filter(customer=customer, status='no_driver_available'):
+            waitlist.remove(stranded)
+
+        return {
+            'revision': git_revision(),
+            'generated_at': timezone.now().isoformat(),
+            'config': {
+                'dispatch_mode': DriverMatchingService.dispatch_mode(),
+                'broadcast_fanout': getattr(settings, 'DRIVER_BROADCAST_FANOUT', None),
+                'drivers': options['drivers'],
+                'bookings': total,
+                'spread_km': options['spread_km'],
+                'arrival_interval_seconds': options['arrival_interval'],
+                'job_minutes': options['job_minutes'],
+                'response_timeout_seconds': self.timeout_seconds,
+                'seed': options['seed'],
+                'replay_history': options['replay_history'],
+                'behaviour': behaviour.describe(),
+            },
+            'results': {
+                'matched': matched,
+                'unmatched': total - matched,
+                'match_rate': round(matched / total, 4) if total else None,
+                'time_to_match_seconds': summarize(time_to_match),
+                'offers_per_booking': summarize(offers_per_booking),
+                'queries_per_booking': summarize(queries_per_booking),
+                'wall_seconds': round(wall_seconds, 3),
+                'throughput_bookings_per_sec': round(total / wall_seconds, 2) if wall_seconds else None,
+            },
+        }
+
+    def dispatch(self, booking, behaviour):
+        """
+        Run one booking through the matching service on a simulated clock.
+        Returns the simulated seconds until a driver accepted, or None.
+        """
+        if not DriverMatchingService.initiate_driver_search(booking):
+            return None
+
+        events = []  # heap of (sim time, request id, outcome)
+        scheduled = set()
+
+        def schedule_live_offers(now):
+            live = DriverMatchingService.live_offers().filter(booking=booking).exclude(id__in=scheduled)
+            for request_id in live.values_list('id', flat=True):
+                outcome, delay = behaviour.sample(self.timeout_seconds)
+                heapq.heappush(events, (now + delay, request_id, outcome))
+                scheduled.add(request_id)
+
+        schedule_live_offers(0.0)
+        while events:
+            now, request_id, outcome = heapq.heappop(events)
+            request = DriverOrderRequest.objects.select_related('driver').get(id=request_id)
+            if request.status != 'pending':
+                continue
+
+            booking.refresh_from_db()
+            if outcome == 'accept':
+                if DriverMatchingService.handle_driver_accept(booking, request.driver):
+                    return now
+            elif outcome == 'reject':
+                DriverMatchingService.handle_driver_reject(booking, request.driver)
+            else:
+                DriverMatchingService.handle_timeout(booking, request.driver)
+
+            schedule_live_offers(now)
+
+        return None
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_alter_booking_scheduled_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='accepted_at',
+            field=models.DateTimeField(blank=True, help_text='When a driver took the job', null=True),
+        ),
+    ]
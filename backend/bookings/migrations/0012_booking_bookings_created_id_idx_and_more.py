@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_accepted_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at', 'id'], name='bookings_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', 'created_at', 'id'], name='bookings_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['driver', 'created_at', 'id'], name='bookings_driver_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driverslot',
+            index=models.Index(fields=['date', 'start_time', 'id'], name='bookings_slot_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['created_at', 'id'], name='bookings_rating_created_idx'),
+        ),
+    ]
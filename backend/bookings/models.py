@@ -83,8 +83,17 @@ class Booking(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    accepted_at = models.DateTimeField(null=True, blank=True, help_text="When a driver took the job")
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of booking lists (newest first), overall and per user
+            models.Index(fields=['created_at', 'id'], name='bookings_created_id_idx'),
+            models.Index(fields=['customer', 'created_at', 'id'], name='bookings_customer_created_idx'),
+            models.Index(fields=['driver', 'created_at', 'id'], name='bookings_driver_created_idx'),
+        ]
+
     def __str__(self):
         return f"Booking {self.id} - {self.get_service_type_display()} - {self.status}"
 
@@ -133,6 +142,10 @@ class DriverSlot(models.Model):
                 name='unique_driver_slot_time'
             )
         ]
+        indexes = [
+            # Keyset pagination across all drivers (per driver uses the constraint above)
+            models.Index(fields=['date', 'start_time', 'id'], name='bookings_slot_date_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.driver.username} - {self.date} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')} ({self.status})"
@@ -166,6 +179,9 @@ class Rating(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='bookings_rating_created_idx'),
+        ]
 
     def __str__(self):
         return f"Rating for Booking {self.booking.id}: {self.score}/5"
\ No newline at end of file
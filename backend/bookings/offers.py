@@ -0,0 +1,123 @@
+"""
+Per-driver offer channel for the incoming-job long-poll.
+
+Online drivers used to learn about offers by polling the available-jobs
+endpoint every few seconds, paying for a busy check, a two-way OR query and
+serialization on every poll. Instead they now hold a long-poll open
+(bookings.views.wait_for_offers) that waits on a channel of their own:
+
+    offers:<driver_id>
+
+DriverMatchingService.send_offer publishes to it once the offer is
+committed, and the waiting request wakes up and answers with the offer right
+away. The wait is a coroutine on the ASGI worker's event loop, so an idle
+driver holds neither a worker nor a thread, and costs no database queries.
+
+Messages travel over the position streaming hub (tracking.streaming): with
+Redis configured (STREAM_BROKER_URL) an offer made by a Celery worker or
+another web process reaches the process holding the driver's request.
+Without it only offers made in the same process could signal the wait, so
+the request is not held at all: it answers at once with Retry-After, as it
+does under WSGI, and the driver polls every RETRY_SECONDS.
+"""
+import asyncio
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from tracking import streaming
+from bookings import availability
+
+OFFER_EVENT = 'offer'
+
+
+def offer_channel(driver_id):
+    return f"offers:{driver_id}"
+
+
+def publish_offer(order_request):
+    """
+    Signal a driver's offer channel once the offer is committed, so the
+    woken request reads it from the database.
+    """
+    payload = {
+        'booking_id': order_request.booking_id,
+        'expires_at': order_request.expires_at.isoformat() if order_request.expires_at else None,
+    }
+    channels = [offer_channel(order_request.driver_id)]
+    transaction.on_commit(lambda: streaming.publish(channels, OFFER_EVENT, payload))
+
+
+# How soon a driver should ask again when their request could not be held
+# open (WSGI, or no shared broker to signal it)
+RETRY_SECONDS = 3
+
+
+@contextmanager
+def subscribe(driver_id, loop):
+    """Listen on a driver's offer channel; yields an AsyncSubscription."""
+    streaming.get_broker().start()
+    channels = [offer_channel(driver_id)]
+    subscription = streaming.AsyncSubscription(loop)
+    streaming.hub.subscribe(channels, subscription)
+    try:
+        yield subscription
+    finally:
+        streaming.hub.unsubscribe(channels, subscription)
+
+
+def can_wait():
+    """Whether offers made in any process can signal a held request."""
+    return streaming.is_shared()
+
+
+def has_new_offer(driver_id, known=()):
+    """
+    Whether the registry shows the driver an offer not in `known`.
+
+    Expires overdue offers first (at most once per sweep interval, see
+    DriverMatchingService.expire_overdue_offers), so one that ran out doesn't
+    end the wait. This runs once per request, not while waiting.
+    """
+    from .services import DriverMatchingService
+
+    DriverMatchingService.expire_overdue_offers()
+    state, booking_id = availability.get_state(driver_id)
+    return state == availability.OFFERED and booking_id not in known
+
+
+async def wait_for_offers(driver_id, timeout, load, known=()):
+    """
+    Wait until the driver has an offer they have not seen, then return it.
+
+    Subscribes before looking at the availability registry, so an offer sent
+    in between is not missed. The registry says whether an offer is already
+    waiting; otherwise the database is only read once the channel is
+    signalled. Callers pass a timeout of 0 unless can_wait().
+
+    Args:
+        driver_id: The waiting driver
+        timeout: Seconds to wait at most
+        load: Coroutine function returning the driver's current offers (may be empty)
+        known: Booking IDs the client already shows, which do not end the wait
+
+    Returns:
+        The first non-empty result of `load`, or [] on timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    with subscribe(driver_id, loop) as subscription:
+        signalled = await sync_to_async(has_new_offer)(driver_id, known)
+        while True:
+            if signalled:
+                offers = await load()
+                if offers:
+                    return offers
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            message = await subscription.get(remaining)
+            if message is None:
+                return []
+            signalled = message['data']['booking_id'] not in known
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from .models import Booking, Rating, DriverSlot
 from users.admin_panel.models import Dispute
+from backend.fieldsets import SparseFieldsetsMixin
 
 
 class CustomerDisputeSerializer(serializers.ModelSerializer):
@@ -65,11 +66,11 @@ class DriverRatingsStatsSerializer(serializers.Serializer):
     one_star = serializers.IntegerField()
     recent_ratings = serializers.ListField()
 
-class DriverSlotSerializer(serializers.ModelSerializer):
+class DriverSlotSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for viewing driver slots (customers and drivers)"""
     driver_name = serializers.ReadOnlyField(source='driver.get_full_name')
     driver_phone = serializers.ReadOnlyField(source='driver.phone_number')
-    driver_id = serializers.ReadOnlyField(source='driver.id')
+    driver_id = serializers.ReadOnlyField()
     label = serializers.ReadOnlyField()
     is_available = serializers.ReadOnlyField()
 
@@ -81,6 +82,14 @@ class DriverSlotSerializer(serializers.ModelSerializer):
             'label', 'is_available', 'created_at', 'updated_at'
         ]
         read_only_fields = ['status', 'created_at', 'updated_at']
+        # Sparse fieldsets (backend.fieldsets): ?fields=, ?profile=summary, ?expand=
+        profiles = {
+            'summary': ('id', 'driver_id', 'date', 'start_time', 'end_time', 'status', 'label'),
+        }
+        field_dependencies = {
+            'label': ('start_time', 'end_time'),
+            'is_available': ('status',),
+        }
 
 
 class DriverSlotCreateSerializer(serializers.ModelSerializer):
@@ -121,7 +130,7 @@ class DriverSlotCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     payment_status = serializers.SerializerMethodField()
     payment_id = serializers.SerializerMethodField()
     customer_name = serializers.ReadOnlyField(source='customer.get_full_name')
@@ -134,6 +143,7 @@ class BookingSerializer(serializers.ModelSerializer):
     current_notified_driver_name = serializers.SerializerMethodField()
     driver_requests_count = serializers.SerializerMethodField()
     is_current_user_notified = serializers.SerializerMethodField()
+    eta_seconds = serializers.SerializerMethodField()
 
     # Slot-based fields
     slot_data = serializers.SerializerMethodField()
@@ -142,7 +152,58 @@ class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         exclude = ('slot',)
-        read_only_fields = ('customer', 'driver', 'status', 'created_at', 'current_notified_driver')
+        read_only_fields = ('customer', 'driver', 'status', 'created_at', 'accepted_at', 'current_notified_driver')
+        # Sparse fieldsets (backend.fieldsets): ?fields=, ?profile=summary, ?expand=
+        profiles = {
+            'summary': (
+                'id', 'status', 'service_type', 'tank_size', 'location_name', 'scheduled_date',
+                'estimated_price', 'final_price', 'customer_name', 'driver_name', 'payment_status', 'created_at'
+            ),
+        }
+        field_dependencies = {
+            'payment_status': ('payment',),
+            'payment_id': ('payment',),
+            'rating_data': ('rating__customer', 'rating__driver'),
+            'current_notified_driver_name': ('current_notified_driver',),
+            'driver_requests_count': (),
+            'is_current_user_notified': ('current_notified_driver_id', 'driver_id', 'status'),
+            'eta_seconds': ('driver__location', 'status', 'latitude', 'longitude'),
+            'slot_data': ('slot__driver',),
+        }
+
+    @classmethod
+    def prepare_queryset(cls, queryset, user=None, fields=None):
+        """
+        Load everything the serializer reads in the list query itself, so a
+        list costs the same few queries whatever its length.
+
+        Args:
+            queryset: Booking queryset
+            user: Request user, for is_current_user_notified
+            fields: Requested field names (see requested_fields), or None for all
+        """
+        from django.db.models import Count, Exists, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+        from tracking.models import DriverOrderRequest
+
+        # Subqueries rather than joins: the driver booking filter already joins driver_requests
+        columns, joins = cls.load_plan(fields)
+        if joins:
+            queryset = queryset.select_related(*joins)
+        if fields is None or 'driver_requests_count' in fields:
+            requests_count = DriverOrderRequest.objects.filter(booking=OuterRef('pk')).order_by().values(
+                'booking'
+            ).annotate(count=Count('id')).values('count')
+            queryset = queryset.annotate(
+                driver_requests_total=Coalesce(Subquery(requests_count, output_field=IntegerField()), Value(0))
+            )
+        if user is not None and user.is_authenticated and (fields is None or 'is_current_user_notified' in fields):
+            queryset = queryset.annotate(user_has_live_offer=Exists(DriverOrderRequest.objects.filter(
+                booking=OuterRef('pk'), driver_id=user.id, status='pending', expires_at__isnull=False
+            )))
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
 
     def get_payment_status(self, obj):
         try:
@@ -170,15 +231,34 @@ class BookingSerializer(serializers.ModelSerializer):
     
     def get_driver_requests_count(self, obj):
         """Get count of drivers notified so far"""
+        if hasattr(obj, 'driver_requests_total'):
+            return obj.driver_requests_total
         return obj.driver_requests.count()
     
     def get_is_current_user_notified(self, obj):
         """Check if current request user is the one being notified"""
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.current_notified_driver == request.user
+            if obj.current_notified_driver_id == request.user.id:
+                return True
+            if obj.driver_id is None and obj.status == 'pending':
+                # Broadcast dispatch: several drivers may hold live offers
+                if hasattr(obj, 'user_has_live_offer'):
+                    return obj.user_has_live_offer
+                return obj.driver_requests.filter(
+                    driver_id=request.user.id,
+                    status='pending',
+                    expires_at__isnull=False
+                ).exists()
         return False
 
+    def get_eta_seconds(self, obj):
+        """Estimated seconds until the assigned driver arrives (for the customer countdown)"""
+        if not obj.driver_id or obj.status not in ('accepted', 'started'):
+            return None
+        from tracking.eta import eta_for_driver
+        return eta_for_driver(obj.driver, obj.latitude, obj.longitude)
+
     def get_slot_data(self, obj):
         """Get slot details if booking is linked to a slot"""
         if obj.slot:
@@ -192,10 +272,11 @@ class BookingSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         res = super().to_representation(instance)
-        if not res['customer_name']:
+        if 'customer_name' in res and not res['customer_name']:
             res['customer_name'] = instance.customer.username
-        if not instance.driver:
-            res['driver_name'] = "Not Assigned"
-        elif not res.get('driver_name'):
-            res['driver_name'] = instance.driver.username
+        if 'driver_name' in res:
+            if not instance.driver:
+                res['driver_name'] = "Not Assigned"
+            elif not res['driver_name']:
+                res['driver_name'] = instance.driver.username
         return res
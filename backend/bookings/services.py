@@ -2,13 +2,25 @@
 Uber-like driver matching service.
 Implements proximity-based driver assignment with automatic fallback.
 """
+from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from django.core.cache import cache
 from tracking.models import DriverLocation, DriverOrderRequest
+from tracking.geo import find_nearest_locations, haversine_km_matrix
+from tracking.heatmap import is_starved
+from tracking import ingestion, presence
+from bookings import availability, offers, waitlist
+from bookings.assignment import solve_assignment
+from vehicles.eligibility import ineligible_driver_ids
 from bookings.models import Booking
 from users.models import User
 from datetime import timedelta
 import logging
+import uuid
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -22,84 +34,107 @@ class DriverMatchingService:
     
     # Configuration
     MAX_SEARCH_RADIUS_KM = 50  # Maximum distance to search for drivers
+    STARVED_SEARCH_RADIUS_KM = 80  # Wider search for pickups in cells the heatmap marks as starved
     DRIVER_RESPONSE_TIMEOUT_SECONDS = 30  # How long to wait for driver response
+    TIMEOUT_GRACE_SECONDS = 1  # Tolerate timers firing slightly before the deadline
     MAX_DRIVERS_TO_NOTIFY = 10  # Maximum number of drivers to try
+    UNREACHABLE_COST = 1e9  # Assignment cost for driver-booking pairs outside the radius
     ACTIVE_JOB_STATUSES = ['accepted', 'started', 'arrived']
     ACTIVE_NOTIFICATION_STATUSES = ['pending', 'searching_driver']
+    OFFER_SWEEP_INTERVAL_SECONDS = 5  # Request-path expiry runs at most this often (eager mode)
+    OFFER_SWEEP_KEY = 'dispatch:offer-sweep'
 
     @classmethod
     def is_driver_busy(cls, driver, exclude_booking_id=None, include_notifications=True):
-        """Return True when a driver already has an active job or pending notification."""
-        active_jobs = Booking.objects.filter(
-            driver=driver,
-            status__in=cls.ACTIVE_JOB_STATUSES
+        """
+        Return True when a driver already has an active job or pending notification.
+        Reads the live availability registry instead of querying bookings.
+        """
+        return availability.is_busy(
+            availability.get_state(driver.id),
+            exclude_booking_id=exclude_booking_id,
+            include_offers=include_notifications
         )
-
-        if exclude_booking_id:
-            active_jobs = active_jobs.exclude(id=exclude_booking_id)
-
-        if active_jobs.exists():
-            return True
-
-        if not include_notifications:
-            return False
-
-        active_notifications = Booking.objects.filter(
-            current_notified_driver=driver,
-            status__in=cls.ACTIVE_NOTIFICATION_STATUSES
+    
+    @classmethod
+    def is_driver_reachable(cls, driver, booking):
+        """
+        Return True when a queued driver can be offered `booking` now: not busy
+        and still present (their app has not stopped sending heartbeats since
+        the queue was built).
+        """
+        return (
+            not cls.is_driver_busy(driver, exclude_booking_id=booking.id)
+            and presence.is_present(driver.id)
         )
 
-        if exclude_booking_id:
-            active_notifications = active_notifications.exclude(id=exclude_booking_id)
+    @classmethod
+    def search_radius_km(cls, booking):
+        """Search radius for a booking, widened only in supply-starved cells."""
+        if is_starved(booking.latitude, booking.longitude):
+            return cls.STARVED_SEARCH_RADIUS_KM
+        return cls.MAX_SEARCH_RADIUS_KM
 
-        return active_notifications.exists()
-    
     @classmethod
-    def find_nearest_drivers(cls, booking, limit=None):
+    def find_nearest_drivers(cls, booking, limit=None, exclude_driver_ids=()):
         """
-        Find available online drivers.
-        Without real-time location tracking, we'll use a simple approach:
-        - Get all online, approved drivers
-        - Return the first N (eventually should be sorted by distance)
-        
+        Find the nearest available online drivers within the search radius
+        (MAX_SEARCH_RADIUS_KM, or STARVED_SEARCH_RADIUS_KM in starved cells).
+        Uses the DriverLocation grid index so only cells around the pickup
+        point are scanned, then ranks candidates by haversine distance.
+        Drivers whose vehicle cannot take the job are skipped using the
+        vehicles eligibility index, and drivers whose app has stopped
+        sending heartbeats are skipped using tracking.presence.
+
         Args:
             booking: Booking instance
             limit: Maximum number of drivers to return (default: MAX_DRIVERS_TO_NOTIFY)
+            exclude_driver_ids: Drivers to leave out (e.g. those who already rejected it)
         
         Returns:
             List of tuples: [(driver, distance_km), ...]
         """
         if limit is None:
             limit = cls.MAX_DRIVERS_TO_NOTIFY
-        
-        busy_driver_ids = Booking.objects.filter(
-            Q(driver__isnull=False, status__in=cls.ACTIVE_JOB_STATUSES) |
-            Q(current_notified_driver__isnull=False, status__in=cls.ACTIVE_NOTIFICATION_STATUSES)
-        ).exclude(id=booking.id).values_list('driver_id', 'current_notified_driver_id')
-
-        excluded_driver_ids = set()
-        for driver_id, notified_driver_id in busy_driver_ids:
-            if driver_id:
-                excluded_driver_ids.add(driver_id)
-            if notified_driver_id:
-                excluded_driver_ids.add(notified_driver_id)
-
-        # Get all online, approved, non-busy drivers (no location tracking yet)
-        online_drivers = User.objects.filter(
-            role='driver',
-            is_online=True,
-            is_active=True,
-            is_driver_approved=True
-        ).exclude(id__in=excluded_driver_ids).order_by('id')
-        
-        logger.info(f"Found {online_drivers.count()} online approved non-busy drivers")
-        
-        # For now, return drivers without actual distance calculation
-        # TODO: Implement real distance calculation with GPS coordinates
-        driver_distances = [(driver, 0.0) for driver in online_drivers]
-        
-        # Return top N drivers
-        return driver_distances[:limit]
+        radius_km = cls.search_radius_km(booking)
+        
+        # Online, approved drivers with a known position
+        candidate_locations = DriverLocation.objects.filter(
+            driver__role='driver',
+            driver__is_online=True,
+            driver__is_active=True,
+            driver__is_driver_approved=True
+        ).select_related('driver')
+
+        # Skip drivers whose vehicle can't take this job (capacity, service type,
+        # compliance); drivers with no vehicle assigned yet are still offered it
+        excluded_ids = ineligible_driver_ids(booking) | set(exclude_driver_ids)
+
+        def available(locations):
+            locations = [location for location in locations if location.driver_id not in excluded_ids]
+            # is_online may be stale until the next sweep; presence is not
+            present = presence.present_ids(location.driver_id for location in locations)
+            locations = [location for location in locations if location.driver_id in present]
+            # Rank on the freshest position, including pings not yet flushed
+            ingestion.apply_buffered(locations)
+            states = availability.get_states(location.driver_id for location in locations)
+            return [
+                location for location in locations
+                if not availability.is_busy(states[location.driver_id], exclude_booking_id=booking.id)
+            ]
+
+        nearest = find_nearest_locations(
+            candidate_locations,
+            booking.latitude,
+            booking.longitude,
+            radius_km=radius_km,
+            limit=limit,
+            include=available
+        )
+
+        logger.info(f"Found {len(nearest)} available drivers within {radius_km}km of booking {booking.id}")
+
+        return [(location.driver, distance) for location, distance in nearest]
     
     @classmethod
     def initiate_driver_search(cls, booking):
@@ -117,7 +152,7 @@ class DriverMatchingService:
         
         # Update booking status to searching
         booking.status = 'searching_driver'
-        booking.save(update_fields=['status'])
+        booking.save(update_fields=['status', 'updated_at'])
         
         # Debug: Check available drivers
         total_drivers = User.objects.filter(role='driver').count()
@@ -131,29 +166,200 @@ class DriverMatchingService:
         if not nearest_drivers:
             logger.warning(f"No drivers found within {cls.MAX_SEARCH_RADIUS_KM}km for booking {booking.id} at lat={booking.latitude}, lon={booking.longitude}")
             booking.status = 'no_driver_available'
-            booking.save(update_fields=['status'])
+            booking.save(update_fields=['status', 'updated_at'])
             return False
         
-        # Create driver order requests in order of proximity
-        for position, (driver, distance) in enumerate(nearest_drivers, start=1):
-            DriverOrderRequest.objects.create(
-                booking=booking,
-                driver=driver,
-                distance_km=distance,
-                queue_position=position,
-                status='pending'
-            )
-            logger.info(f"Added driver {driver.username} to queue at position {position} (distance: {distance:.2f}km)")
+        cls.queue_drivers(booking, nearest_drivers)
         
         # Notify the first driver
         cls.notify_next_driver(booking)
         
         return True
+
+    @classmethod
+    def queue_drivers(cls, booking, ranked_drivers):
+        """
+        Queue driver order requests in the given order (nearest first).
+        On a re-dispatch, drivers already asked about this booking get their
+        request reset and new entries go to the back of the existing queue.
+        """
+        existing = dict(
+            DriverOrderRequest.objects.filter(booking=booking).values_list('driver_id', 'queue_position')
+        )
+        first_position = max(existing.values(), default=0) + 1
+
+        for position, (driver, distance) in enumerate(ranked_drivers, start=first_position):
+            if driver.id in existing:
+                DriverOrderRequest.objects.filter(booking=booking, driver=driver).update(
+                    distance_km=distance,
+                    queue_position=position,
+                    status='pending',
+                    # Not null; send_offer stamps it again when the driver is asked
+                    notified_at=timezone.now(),
+                    responded_at=None,
+                    expires_at=None,
+                    timeout_task_id=None
+                )
+            else:
+                DriverOrderRequest.objects.create(
+                    booking=booking,
+                    driver=driver,
+                    distance_km=distance,
+                    queue_position=position,
+                    status='pending'
+                )
+            logger.info(f"Added driver {driver.username} to queue at position {position} (distance: {distance:.2f}km)")
+
+    @classmethod
+    def redispatch_stranded(cls, booking_id):
+        """
+        Retry the driver search for a booking parked as 'no_driver_available'.
+        Drivers who already rejected the booking are not asked again.
+
+        Args:
+            booking_id: Booking ID
+
+        Returns:
+            bool: True if new drivers were found and notified
+        """
+        # Claim and requeue in one transaction: if requeueing fails the booking
+        # goes back to 'no_driver_available' instead of staying claimed with
+        # nobody notified
+        with transaction.atomic():
+            # Claim the booking so concurrent triggers don't dispatch it twice
+            claimed = Booking.objects.filter(
+                id=booking_id, status='no_driver_available', driver__isnull=True
+            ).update(status='searching_driver', updated_at=timezone.now())
+            try:
+                booking = Booking.objects.get(id=booking_id)
+            except Booking.DoesNotExist:
+                return False
+            if not claimed:
+                waitlist.remove(booking)
+                return False
+
+            rejected_driver_ids = DriverOrderRequest.objects.filter(
+                booking=booking, status='rejected'
+            ).values_list('driver_id', flat=True)
+            nearest_drivers = cls.find_nearest_drivers(booking, exclude_driver_ids=list(rejected_driver_ids))
+
+            if not nearest_drivers:
+                booking.status = 'no_driver_available'
+                booking.save(update_fields=['status', 'updated_at'])
+                return False
+
+            logger.info(f"Re-dispatching stranded booking {booking.id} to {len(nearest_drivers)} drivers")
+            transaction.on_commit(lambda: waitlist.remove(booking))
+            cls.queue_drivers(booking, nearest_drivers)
+            cls.notify_next_driver(booking)
+        return True
+
+    @classmethod
+    def redispatch_near(cls, lat, lon, limit=5):
+        """
+        Re-dispatch stranded bookings within MAX_SEARCH_RADIUS_KM of a point
+        where supply just appeared, longest waiting first (at most `limit`).
+
+        Returns:
+            int: Number of bookings re-dispatched
+        """
+        redispatched = 0
+        for booking_id in waitlist.waiting_near(lat, lon, cls.MAX_SEARCH_RADIUS_KM)[:limit]:
+            if cls.redispatch_stranded(booking_id):
+                redispatched += 1
+        return redispatched
+
+    @classmethod
+    def dispatch_batch(cls, bookings):
+        """
+        Dispatch a burst of simultaneous bookings together.
+        Free drivers near any of the bookings are matched to bookings with a
+        min-cost assignment over the driver-booking distance matrix, so two
+        bookings never start by competing for the same driver. Each booking's
+        queue starts with its assigned driver, followed by its other nearby
+        drivers that were not assigned to another booking in the batch.
+
+        Args:
+            bookings: list of Booking instances in 'searching_driver' status
+
+        Returns:
+            list: Bookings for which no driver could be found
+        """
+        if not bookings:
+            return []
+
+        candidates = {booking.id: cls.find_nearest_drivers(booking) for booking in bookings}
+
+        drivers = {}
+        for ranked in candidates.values():
+            for driver, _ in ranked:
+                drivers[driver.id] = driver
+        driver_list = list(drivers.values())
+
+        assigned = {}
+        if driver_list:
+            distances = haversine_km_matrix(
+                [booking.latitude for booking in bookings],
+                [booking.longitude for booking in bookings],
+                [driver.location.latitude for driver in driver_list],
+                [driver.location.longitude for driver in driver_list],
+            )
+            # Pairs outside each booking's search radius must never be chosen
+            radii = np.array([cls.search_radius_km(booking) for booking in bookings])[:, None]
+            cost = np.where(distances <= radii, distances, cls.UNREACHABLE_COST)
+            for row, col in solve_assignment(cost):
+                if cost[row, col] < cls.UNREACHABLE_COST:
+                    assigned[bookings[row].id] = (driver_list[col], float(distances[row, col]))
+
+        assigned_driver_ids = {driver.id for driver, _ in assigned.values()}
+        logger.info(f"Batch dispatch matched {len(assigned)} of {len(bookings)} bookings to {len(driver_list)} candidate drivers")
+
+        unmatched = []
+        for booking in bookings:
+            primary = assigned.get(booking.id)
+            ranked = [primary] if primary else []
+            ranked += [
+                (driver, distance) for driver, distance in candidates[booking.id]
+                if driver.id not in assigned_driver_ids
+            ]
+
+            booking.status = 'searching_driver'
+            booking.save(update_fields=['status', 'updated_at'])
+
+            if not ranked:
+                logger.warning(f"No drivers found within {cls.MAX_SEARCH_RADIUS_KM}km for booking {booking.id} at lat={booking.latitude}, lon={booking.longitude}")
+                booking.status = 'no_driver_available'
+                booking.save(update_fields=['status', 'updated_at'])
+                unmatched.append(booking)
+                continue
+
+            cls.queue_drivers(booking, ranked)
+            cls.notify_next_driver(booking)
+
+        return unmatched
     
+    @classmethod
+    def dispatch_mode(cls):
+        """Return 'sequential' (one driver at a time) or 'broadcast' (top-N at once)."""
+        return getattr(settings, 'DRIVER_DISPATCH_MODE', 'sequential')
+
+    @classmethod
+    def live_offers(cls):
+        """Offers that have been sent to a driver and are awaiting a response."""
+        return DriverOrderRequest.objects.filter(status='pending', expires_at__isnull=False)
+
+    @classmethod
+    def has_live_offer(cls, booking, driver):
+        """Return True when the driver may currently accept or reject the booking."""
+        if booking.current_notified_driver_id == driver.id:
+            return True
+        return cls.live_offers().filter(booking=booking, driver=driver).exists()
+
     @classmethod
     def notify_next_driver(cls, booking):
         """
         Notify the next driver in the queue.
+        In broadcast mode, offers the booking to the next wave of drivers at once.
         
         Args:
             booking: Booking instance
@@ -161,6 +367,9 @@ class DriverMatchingService:
         Returns:
             DriverOrderRequest or None: The request that was notified
         """
+        if cls.dispatch_mode() == 'broadcast':
+            return cls.broadcast_to_next_drivers(booking)
+
         while True:
             next_request = DriverOrderRequest.objects.filter(
                 booking=booking,
@@ -168,47 +377,110 @@ class DriverMatchingService:
             ).select_related('driver').order_by('queue_position').first()
 
             if not next_request:
-                logger.warning(f"No more drivers to notify for booking {booking.id}")
-                booking.status = 'no_driver_available'
-                booking.current_notified_driver = None
-                booking.save(update_fields=['status', 'current_notified_driver'])
+                cls.mark_no_driver_available(booking)
                 return None
 
-            if not cls.is_driver_busy(next_request.driver, exclude_booking_id=booking.id):
+            if cls.is_driver_reachable(next_request.driver, booking):
                 break
 
-            next_request.status = 'cancelled'
-            next_request.responded_at = timezone.now()
-            next_request.save(update_fields=['status', 'responded_at'])
-            logger.info(
-                f"Skipped driver {next_request.driver.username} for booking {booking.id} "
-                "because they already have an active job or notification"
-            )
+            cls.skip_busy_driver(booking, next_request)
         
         # Update booking with current notified driver
         booking.current_notified_driver = next_request.driver
         booking.status = 'pending'  # Waiting for this driver's response
-        booking.save(update_fields=['current_notified_driver', 'status'])
+        booking.save(update_fields=['current_notified_driver', 'status', 'updated_at'])
         
-        # Update request timestamp
-        next_request.notified_at = timezone.now()
-        next_request.save(update_fields=['notified_at'])
+        cls.send_offer(booking, next_request)
         
-        logger.info(f"Notified driver {next_request.driver.username} for booking {booking.id} (position {next_request.queue_position})")
+        return next_request
+
+    @classmethod
+    def broadcast_to_next_drivers(cls, booking):
+        """
+        Offer the booking to the next DRIVER_BROADCAST_FANOUT queued drivers at once.
+        The first driver to accept wins (see handle_driver_accept). A new wave is
+        only sent once every offer in the current wave has been answered or expired.
+
+        Returns:
+            DriverOrderRequest or None: The nearest request with a live offer
+        """
+        live_request = cls.live_offers().filter(booking=booking).order_by('queue_position').first()
+        if live_request:
+            return live_request
+
+        fanout = getattr(settings, 'DRIVER_BROADCAST_FANOUT', 3)
+        queued_requests = DriverOrderRequest.objects.filter(
+            booking=booking,
+            status='pending',
+            expires_at__isnull=True
+        ).select_related('driver').order_by('queue_position')
+
+        wave = []
+        for queued_request in queued_requests:
+            if not cls.is_driver_reachable(queued_request.driver, booking):
+                cls.skip_busy_driver(booking, queued_request)
+                continue
+            wave.append(queued_request)
+            if len(wave) >= fanout:
+                break
+
+        if not wave:
+            cls.mark_no_driver_available(booking)
+            return None
+
+        booking.current_notified_driver = None
+        booking.status = 'pending'  # Waiting for the first driver to accept
+        booking.save(update_fields=['current_notified_driver', 'status', 'updated_at'])
+
+        for offer_request in wave:
+            cls.send_offer(booking, offer_request)
+
+        return wave[0]
+
+    @classmethod
+    def send_offer(cls, booking, order_request):
+        """Arm the response deadline on a queued request and notify its driver."""
+        now = timezone.now()
+        order_request.notified_at = now
+        order_request.expires_at = now + timedelta(seconds=cls.DRIVER_RESPONSE_TIMEOUT_SECONDS)
+        order_request.timeout_task_id = str(uuid.uuid4())
+        order_request.save(update_fields=['notified_at', 'expires_at', 'timeout_task_id'])
+        availability.mark_offered(order_request.driver_id, booking.id)
+        offers.publish_offer(order_request)
+        cls.schedule_offer_timeout(order_request)
+        
+        logger.info(f"Notified driver {order_request.driver.username} for booking {booking.id} (position {order_request.queue_position})")
         
         # Send actual notification (SMS, push, etc.) - implement in notifications app
         try:
             from bookings.tasks import send_driver_order_notification_task
-            send_driver_order_notification_task.delay(booking.id, next_request.driver.id)
+            send_driver_order_notification_task.delay(booking.id, order_request.driver.id)
         except Exception as e:
             logger.error(f"Failed to send notification to driver: {e}")
-        
-        return next_request
+
+    @classmethod
+    def skip_busy_driver(cls, booking, order_request):
+        order_request.status = 'cancelled'
+        order_request.responded_at = timezone.now()
+        order_request.save(update_fields=['status', 'responded_at'])
+        logger.info(
+            f"Skipped driver {order_request.driver.username} for booking {booking.id} "
+            "because they already have an active job or notification, or went offline"
+        )
+
+    @classmethod
+    def mark_no_driver_available(cls, booking):
+        logger.warning(f"No more drivers to notify for booking {booking.id}")
+        booking.status = 'no_driver_available'
+        booking.current_notified_driver = None
+        booking.save(update_fields=['status', 'current_notified_driver', 'updated_at'])
     
     @classmethod
     def handle_driver_accept(cls, booking, driver):
         """
         Handle when a driver accepts an order.
+        The booking is claimed with an atomic compare-and-set, so when several
+        drivers hold offers (broadcast mode) only the first acceptance wins.
         
         Args:
             booking: Booking instance
@@ -224,27 +496,60 @@ class DriverMatchingService:
             logger.error(f"No request found for driver {driver.id} and booking {booking.id}")
             return False
         
-        # Check if this driver is the currently notified one
-        if booking.current_notified_driver != driver:
+        # Check if this driver currently holds an offer
+        if booking.current_notified_driver_id != driver.id and request.expires_at is None:
             logger.warning(f"Driver {driver.id} tried to accept booking {booking.id} but is not the current notified driver")
             return False
-        
-        # Mark this request as accepted
-        request.status = 'accepted'
-        request.responded_at = timezone.now()
-        request.save(update_fields=['status', 'responded_at'])
-        
-        # Update booking
+
+        now = timezone.now()
+        # Deadlines hold even when no timeout task fired (eager mode, lost task)
+        deadline = now - timedelta(seconds=cls.TIMEOUT_GRACE_SECONDS)
+        if request.status == 'pending' and request.expires_at is not None and request.expires_at < deadline:
+            logger.info(f"Driver {driver.id} tried to accept booking {booking.id} after the offer expired")
+            cls.handle_timeout(booking, driver)
+            return False
+
+        with transaction.atomic():
+            # Lock the booking before any offer (same order as close_offer)
+            Booking.objects.select_for_update().filter(id=booking.id).first()
+
+            # The offer must still be open (not expired, rejected or cancelled)
+            claimed_offer = DriverOrderRequest.objects.filter(
+                Q(expires_at__isnull=True) | Q(expires_at__gte=deadline),
+                id=request.id,
+                status='pending'
+            ).update(status='accepted', responded_at=now)
+            if not claimed_offer:
+                logger.warning(f"Driver {driver.id} tried to accept booking {booking.id} after the offer closed")
+                return False
+
+            # First acceptance wins: only claim a booking that has no driver yet
+            claimed_booking = Booking.objects.filter(
+                id=booking.id,
+                driver__isnull=True,
+                status__in=cls.ACTIVE_NOTIFICATION_STATUSES
+            ).update(driver=driver, status='accepted', current_notified_driver=None, accepted_at=now, updated_at=now)
+            if not claimed_booking:
+                DriverOrderRequest.objects.filter(id=request.id).update(status='cancelled')
+                logger.info(f"Driver {driver.username} lost booking {booking.id} to another driver")
+                return False
+
+            # Cancel every losing offer in one statement
+            losing_offers = DriverOrderRequest.objects.filter(booking=booking, status='pending')
+            losing = list(losing_offers.values_list('driver_id', 'timeout_task_id'))
+            losing_offers.update(status='cancelled', responded_at=now)
+
+        availability.mark_on_job(driver.id, booking.id)
+        for losing_driver_id, _ in losing:
+            availability.release(losing_driver_id, booking.id)
+
+        cls.cancel_offer_timeout(request)
+        cls.revoke_timeout_tasks([task_id for _, task_id in losing if task_id])
+
         booking.driver = driver
         booking.status = 'accepted'
         booking.current_notified_driver = None
-        booking.save(update_fields=['driver', 'status', 'current_notified_driver'])
-        
-        # Mark all other pending requests as cancelled
-        DriverOrderRequest.objects.filter(
-            booking=booking,
-            status='pending'
-        ).update(status='cancelled', responded_at=timezone.now())
+        booking.accepted_at = now
         
         logger.info(f"Driver {driver.username} accepted booking {booking.id}")
         
@@ -263,24 +568,11 @@ class DriverMatchingService:
         Returns:
             bool: True if there are more drivers to notify
         """
-        # Get the driver's request
-        try:
-            request = DriverOrderRequest.objects.get(booking=booking, driver=driver)
-        except DriverOrderRequest.DoesNotExist:
-            logger.error(f"No request found for driver {driver.id} and booking {booking.id}")
+        if not cls.close_offer(booking, driver, 'rejected'):
             return False
-        
-        # Mark this request as rejected
-        request.status = 'rejected'
-        request.responded_at = timezone.now()
-        request.save(update_fields=['status', 'responded_at'])
-        
+
         logger.info(f"Driver {driver.username} rejected booking {booking.id}")
-        
-        # Notify next driver
-        next_request = cls.notify_next_driver(booking)
-        
-        return next_request is not None
+        return cls.notify_after_close(booking, driver)
     
     @classmethod
     def handle_timeout(cls, booking, driver):
@@ -294,41 +586,150 @@ class DriverMatchingService:
         Returns:
             bool: True if there are more drivers to notify
         """
-        # Get the driver's request
-        try:
-            request = DriverOrderRequest.objects.get(booking=booking, driver=driver)
-        except DriverOrderRequest.DoesNotExist:
-            logger.error(f"No request found for driver {driver.id} and booking {booking.id}")
+        if not cls.close_offer(booking, driver, 'timeout'):
             return False
-        
-        # Mark this request as timeout
-        request.status = 'timeout'
-        request.responded_at = timezone.now()
-        request.save(update_fields=['status', 'responded_at'])
-        
+
         logger.info(f"Driver {driver.username} timed out for booking {booking.id}")
-        
-        # Notify next driver
-        next_request = cls.notify_next_driver(booking)
-        
+        return cls.notify_after_close(booking, driver)
+
+    @classmethod
+    def close_offer(cls, booking, driver, outcome):
+        """
+        Close a driver's pending offer as rejected or timed out.
+        Uses a conditional update, so an offer that was accepted or closed in
+        the meantime (e.g. a timeout firing as the driver accepts) is left alone.
+
+        Returns:
+            bool: True if this call closed the offer
+        """
+        closed = DriverOrderRequest.objects.filter(
+            booking=booking,
+            driver=driver,
+            status='pending'
+        ).update(status=outcome, responded_at=timezone.now())
+        if not closed:
+            logger.info(f"Offer of booking {booking.id} to driver {driver.id} was already closed; ignoring {outcome}")
+            return False
+
+        request = DriverOrderRequest.objects.filter(booking=booking, driver=driver).only('timeout_task_id').first()
+        if outcome != 'timeout' and request is not None:
+            cls.cancel_offer_timeout(request)
+        return True
+
+    @classmethod
+    def notify_after_close(cls, booking, driver):
+        """
+        Offer the booking to the next driver after `driver`'s offer closed.
+        The booking row is locked and re-read first, so no new offer goes out
+        for a booking another driver has just claimed.
+
+        Returns:
+            bool: True if there are more drivers to notify
+        """
+        with transaction.atomic():
+            locked_booking = Booking.objects.select_for_update().get(id=booking.id)
+            if locked_booking.driver_id or locked_booking.status not in cls.ACTIVE_NOTIFICATION_STATUSES:
+                next_request = None
+            else:
+                next_request = cls.notify_next_driver(locked_booking)
+
+        availability.release(driver.id, booking.id)
         return next_request is not None
     
+    @classmethod
+    def schedule_offer_timeout(cls, order_request):
+        """
+        Arm a delayed task that expires the offer exactly at its deadline.
+        In eager mode countdowns are ignored and no beat runs, so expiry is
+        left to expire_overdue_offers on the request path.
+        """
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            return
+
+        try:
+            from bookings.tasks import expire_driver_offer_task
+            expire_driver_offer_task.apply_async(
+                args=[order_request.id],
+                countdown=cls.DRIVER_RESPONSE_TIMEOUT_SECONDS,
+                task_id=order_request.timeout_task_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to schedule timeout for driver request {order_request.id}: {e}")
+
+    @classmethod
+    def cancel_offer_timeout(cls, order_request):
+        """Revoke the pending timeout task once the driver has responded."""
+        if order_request.timeout_task_id:
+            cls.revoke_timeout_tasks([order_request.timeout_task_id])
+
+    @classmethod
+    def revoke_timeout_tasks(cls, task_ids):
+        # Nothing is scheduled in eager mode (see schedule_offer_timeout)
+        if not task_ids or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            return
+
+        try:
+            from backend.celery import app
+            app.control.revoke(list(task_ids))
+        except Exception as e:
+            logger.warning(f"Failed to revoke offer timeout tasks {task_ids}: {e}")
+
+    @classmethod
+    def expire_offer(cls, order_request_id):
+        """
+        Expire a single offer when its deadline passes.
+        No-op if the driver already responded or the offer moved on; the
+        checks below are only a shortcut, handle_timeout closes the offer with
+        a conditional update and re-reads the booking under a lock.
+
+        Returns:
+            bool: True if the offer was timed out
+        """
+        try:
+            request = DriverOrderRequest.objects.select_related('booking', 'driver').get(id=order_request_id)
+        except DriverOrderRequest.DoesNotExist:
+            return False
+
+        if request.status != 'pending' or request.expires_at is None:
+            return False
+
+        if request.expires_at > timezone.now() + timedelta(seconds=cls.TIMEOUT_GRACE_SECONDS):
+            return False
+
+        if request.booking.driver_id or request.booking.status not in cls.ACTIVE_NOTIFICATION_STATUSES:
+            return False
+
+        logger.info(f"Timeout detected for driver {request.driver.username} booking {request.booking.id}")
+        cls.handle_timeout(request.booking, request.driver)
+        return True
+
+    @classmethod
+    def expire_overdue_offers(cls):
+        """
+        Expire overdue offers from the request path when no scheduler does it
+        (DRIVER_OFFER_EXPIRY_ON_REQUEST, on by default in eager mode). Runs at
+        most once per OFFER_SWEEP_INTERVAL_SECONDS per cache.
+        """
+        if not getattr(settings, 'DRIVER_OFFER_EXPIRY_ON_REQUEST', False):
+            return
+        if not cache.add(cls.OFFER_SWEEP_KEY, True, cls.OFFER_SWEEP_INTERVAL_SECONDS):
+            return
+
+        try:
+            cls.check_and_handle_timeouts()
+        except Exception as e:
+            logger.error(f"Failed to expire overdue driver offers: {e}")
+
     @classmethod
     def check_and_handle_timeouts(cls):
         """
-        Background task to check for timed out driver notifications.
-        Should be run periodically (e.g., every 10 seconds via Celery).
+        Safety net for offers whose timeout task was lost (e.g. broker restart
+        or eager mode). Offers normally expire via expire_driver_offer_task.
         """
-        timeout_threshold = timezone.now() - timedelta(seconds=cls.DRIVER_RESPONSE_TIMEOUT_SECONDS)
-        
-        # Find all pending requests that have timed out
-        timed_out_requests = DriverOrderRequest.objects.filter(
+        overdue_request_ids = DriverOrderRequest.objects.filter(
             status='pending',
-            notified_at__lt=timeout_threshold
-        ).select_related('booking', 'driver')
-        
-        for request in timed_out_requests:
-            # Only process if this driver is still the current notified driver
-            if request.booking.current_notified_driver == request.driver:
-                logger.info(f"Timeout detected for driver {request.driver.username} booking {request.booking.id}")
-                cls.handle_timeout(request.booking, request.driver)
+            expires_at__lte=timezone.now()
+        ).values_list('id', flat=True)
+
+        for request_id in list(overdue_request_ids):
+            cls.expire_offer(request_id)
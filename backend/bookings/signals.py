@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from bookings import availability, waitlist
+from bookings.models import Booking
+from tracking import geofence
+
+
+@receiver(post_save, sender=Booking)
+def sync_driver_availability(sender, instance, **kwargs):
+    availability.sync_booking(instance)
+
+
+@receiver(post_save, sender=Booking)
+def sync_redispatch_waitlist(sender, instance, update_fields=None, **kwargs):
+    if instance.status == 'no_driver_available':
+        waitlist.add(instance)
+    elif update_fields is None or 'status' in update_fields:
+        waitlist.remove(instance)
+
+
+@receiver(post_save, sender=Booking)
+def sync_booking_geofence(sender, instance, **kwargs):
+    geofence.sync_booking(instance)
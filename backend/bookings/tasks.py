@@ -44,7 +44,7 @@ def auto_cancel_pending_bookings():
         for booking in pending_bookings:
             if booking.slot:
                 booking.slot.status = 'available'
-                booking.slot.save(update_fields=['status'])
+                booking.slot.save(update_fields=['status', 'updated_at'])
 
             booking.status = 'cancelled'
             booking.save()
@@ -66,14 +66,31 @@ def auto_cancel_pending_bookings():
 @shared_task
 def check_driver_timeouts():
     """
-    Periodic task to check and handle driver notification timeouts.
-    Should run every 10 seconds.
+    Periodic safety-net sweep for overdue driver notifications.
+    Offers normally expire through expire_driver_offer_task.
     """
     from bookings.services import DriverMatchingService
-    logger.info("Checking for driver notification timeouts...")
     DriverMatchingService.check_and_handle_timeouts()
 
 
+@shared_task
+def expire_driver_offer_task(order_request_id):
+    """
+    Expire a driver offer at its response deadline.
+    Scheduled with a countdown when the driver is notified and revoked
+    when they accept or reject.
+
+    Args:
+        order_request_id: DriverOrderRequest ID
+    """
+    from bookings.services import DriverMatchingService
+
+    try:
+        DriverMatchingService.expire_offer(order_request_id)
+    except Exception as e:
+        logger.error(f"Failed to expire driver request {order_request_id}: {e}")
+
+
 @shared_task
 def send_driver_order_notification_task(booking_id, driver_id):
     """
@@ -88,11 +105,15 @@ def send_driver_order_notification_task(booking_id, driver_id):
     
     try:
         booking = Booking.objects.get(id=booking_id)
-        driver = User.objects.get(id=driver_id)
+        driver = User.objects.select_related('location').get(id=driver_id)
+        
+        from tracking.eta import eta_for_driver, format_eta
+        eta = format_eta(eta_for_driver(driver, booking.latitude, booking.longitude))
         
         message = (
             f"🚛 New Order Alert! #{booking.id}\n"
             f"📍 {booking.location_name}\n"
+            f"🚗 {eta} away\n"
             f"📏 Service: {booking.get_service_type_display()}\n"
             f"💰 KES {booking.estimated_price}\n"
             f"⏰ {booking.scheduled_date.strftime('%d/%m/%Y %H:%M') if booking.scheduled_date else 'To be confirmed'}\n"
@@ -129,15 +150,97 @@ def initiate_driver_search_task(booking_id):
             logger.info(f"Driver search initiated successfully for booking {booking_id}")
         else:
             logger.warning(f"No drivers available for booking {booking_id}")
-            
-            # Send notification to customer
-            from notifications.tasks import send_sms_task
-            message = (
-                f"Sorry, no exhauster drivers are currently available in your area. "
-                f"We'll keep searching and notify you when a driver is found. "
-                f"Booking #{booking.id}"
-            )
-            send_sms_task.delay(booking.customer.phone_number, message)
+            notify_customer_no_driver(booking)
             
     except Exception as e:
         logger.error(f"Error initiating driver search for booking {booking_id}: {e}")
+
+
+@shared_task
+def redispatch_near_driver_task(driver_id):
+    """
+    Re-dispatch stranded bookings around a driver who just became available
+    (went online, finished a job or moved into a new area).
+
+    Args:
+        driver_id: Driver user ID
+    """
+    from bookings import availability
+    from bookings.services import DriverMatchingService
+    from tracking.models import DriverLocation
+
+    try:
+        if availability.is_busy(availability.get_state(driver_id)):
+            return 0
+
+        location = DriverLocation.objects.filter(driver_id=driver_id).values_list('latitude', 'longitude').first()
+        if not location:
+            return 0
+
+        redispatched = DriverMatchingService.redispatch_near(*location)
+        if redispatched:
+            logger.info(f"Re-dispatched {redispatched} stranded bookings near driver {driver_id}")
+        return redispatched
+
+    except Exception as e:
+        logger.error(f"Error re-dispatching bookings near driver {driver_id}: {e}")
+        return 0
+
+
+DISPATCH_BATCH_CACHE_KEY = 'bookings:dispatch_batch_scheduled'
+
+
+def schedule_dispatch_batch():
+    """
+    Schedule a batch dispatch at the end of the current batching window.
+    Only the first booking of a window schedules the task; later bookings
+    are picked up by the same run.
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+
+    window = settings.DRIVER_DISPATCH_BATCH_WINDOW_SECONDS
+    if cache.add(DISPATCH_BATCH_CACHE_KEY, True, timeout=window + 30):
+        dispatch_pending_bookings_task.apply_async(countdown=window)
+
+
+@shared_task
+def dispatch_pending_bookings_task():
+    """
+    Dispatch every booking that is still waiting for its first driver search
+    in one batch, so simultaneous bookings are matched to drivers together.
+    """
+    from django.core.cache import cache
+    from bookings.services import DriverMatchingService
+
+    # Open the next window before dispatching so new bookings are not missed
+    cache.delete(DISPATCH_BATCH_CACHE_KEY)
+
+    try:
+        bookings = list(
+            Booking.objects.filter(
+                status='searching_driver',
+                driver__isnull=True,
+                driver_requests__isnull=True,
+            ).select_related('customer').order_by('created_at')
+        )
+        if not bookings:
+            return
+
+        logger.info(f"Batch dispatching {len(bookings)} bookings")
+        for booking in DriverMatchingService.dispatch_batch(bookings):
+            notify_customer_no_driver(booking)
+
+    except Exception as e:
+        logger.error(f"Error in batch driver dispatch: {e}")
+
+
+def notify_customer_no_driver(booking):
+    """Tell the customer that no driver is currently available."""
+    from notifications.tasks import send_sms_task
+    message = (
+        f"Sorry, no exhauster drivers are currently available in your area. "
+        f"We'll keep searching and notify you when a driver is found. "
+        f"Booking #{booking.id}"
+    )
+    send_sms_task.delay(booking.customer.phone_number, message)
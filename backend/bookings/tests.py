@@ -0,0 +1,148 @@
+from datetime import timedelta
+from itertools import count
+from unittest import mock
+
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bookings import offers, waitlist
+from bookings.management.commands.check_query_budget import Command as QueryBudgetCommand
+from bookings.models import Booking
+from bookings.services import DriverMatchingService
+from tracking import presence
+from tracking.models import DriverLocation, DriverOrderRequest
+from users.models import DriverShift, User
+
+
+phone_numbers = count(700000000)
+
+
+def create_user(username, role, **fields):
+    return User.objects.create(username=username, role=role, password='!',
+                               phone_number=f'0{next(phone_numbers)}', **fields)
+
+
+class RedispatchStrandedTests(TestCase):
+    def setUp(self):
+        self.customer = create_user('redispatch_customer', 'customer')
+        self.driver = create_user('redispatch_driver', 'driver', is_online=True, is_driver_approved=True)
+        DriverLocation.objects.create(driver=self.driver, latitude=-1.2901, longitude=36.8201)
+        presence.go_online(self.driver.id)
+
+    def strand_booking(self):
+        booking = Booking.objects.create(
+            customer=self.customer, location_name='Stranded', latitude=-1.29, longitude=36.82,
+            status='no_driver_available', estimated_price=1500
+        )
+        return booking
+
+    def test_redispatch_after_earlier_offer_expired(self):
+        booking = self.strand_booking()
+        # The driver was offered the booking before and let it time out
+        DriverOrderRequest.objects.create(
+            booking=booking, driver=self.driver, distance_km=1.0, queue_position=1, status='timeout',
+            responded_at=timezone.now() - timedelta(minutes=5), expires_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        self.assertTrue(DriverMatchingService.redispatch_stranded(booking.id))
+
+        request = DriverOrderRequest.objects.get(booking=booking, driver=self.driver)
+        self.assertEqual(request.status, 'pending')
+        self.assertIsNotNone(request.notified_at)
+        booking.refresh_from_db()
+        self.assertNotEqual(booking.status, 'searching_driver')
+        self.assertNotEqual(booking.status, 'no_driver_available')
+
+    def test_failed_requeue_leaves_booking_stranded(self):
+        booking = self.strand_booking()
+
+        with mock.patch.object(DriverMatchingService, 'queue_drivers', side_effect=RuntimeError('queue unavailable')):
+            with self.assertRaises(RuntimeError):
+                DriverMatchingService.redispatch_stranded(booking.id)
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'no_driver_available')
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_waiting_list_reads_the_database_without_a_shared_cache(self):
+        booking = self.strand_booking()
+        far_away = Booking.objects.create(
+            customer=self.customer, location_name='Far', latitude=-4.05, longitude=39.66,
+            status='no_driver_available', estimated_price=1500
+        )
+
+        waiting = waitlist.waiting_near(-1.29, 36.82, DriverMatchingService.MAX_SEARCH_RADIUS_KM)
+
+        self.assertIn(booking.id, waiting)
+        self.assertNotIn(far_away.id, waiting)
+
+
+class DriverStatsTests(TestCase):
+    def test_open_shift_counts_towards_hours_online(self):
+        driver = create_user('stats_driver', 'driver', is_online=True, is_driver_approved=True)
+        # Online since before the last periodic rollup could have run
+        started = timezone.now() - timedelta(minutes=90)
+        DriverShift.objects.create(driver=driver, started_at=started, rolled_up_until=started)
+        client = APIClient()
+        client.force_authenticate(driver)
+
+        response = client.get('/api/bookings/bookings/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        # The week also covers yesterday, should the shift have started before midnight
+        self.assertEqual(response.data['stats_table']['week']['hours_online'], 1.5)
+
+
+@override_settings(CACHE_IS_SHARED=False)
+class ListQueryBudgetTests(TestCase):
+    """List endpoints take a fixed number of queries, however many rows they return."""
+
+    def assertQueryBudget(self, role, path, budget):
+        for rows in (3, 20):
+            with self.subTest(rows=rows):
+                users = QueryBudgetCommand().seed(rows)
+                client = APIClient()
+                client.force_authenticate(users[role])
+                client.get(path)  # Warm the speed profile and other caches
+
+                with self.assertNumQueries(budget):
+                    response = client.get(path)
+                self.assertEqual(response.status_code, 200)
+
+    def test_customer_bookings(self):
+        self.assertQueryBudget('customer', '/api/bookings/bookings/', 2)
+
+    def test_driver_bookings(self):
+        self.assertQueryBudget('driver', '/api/bookings/bookings/', 2)
+
+    def test_admin_bookings(self):
+        self.assertQueryBudget('admin', '/api/bookings/bookings/', 2)
+
+    def test_available_jobs(self):
+        # One more than with a shared cache: the driver busy check reads the database
+        self.assertQueryBudget('driver', '/api/bookings/bookings/available/', 2)
+
+    def test_driver_slots(self):
+        self.assertQueryBudget('admin', '/api/bookings/driver-slots/', 2)
+
+
+class OfferWaitTests(TestCase):
+    def setUp(self):
+        self.driver = create_user('waiting_driver', 'driver', is_online=True, is_driver_approved=True)
+        self.client = AsyncClient()
+        self.token = str(AccessToken.for_user(self.driver))
+
+    async def test_answers_at_once_without_a_shared_broker(self):
+        self.assertFalse(offers.can_wait())
+
+        with mock.patch.object(DriverMatchingService, 'expire_overdue_offers') as expire:
+            response = await self.client.get('/api/bookings/bookings/offers/wait/', {'timeout': 25},
+                                             headers={'Authorization': f'Bearer {self.token}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+        self.assertEqual(response['Retry-After'], str(offers.RETRY_SECONDS))
+        # One sweep for the request, not one per recheck
+        self.assertEqual(expire.call_count, 1)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet, PricingView, CustomerDisputeViewSet, DriverSlotViewSet
+from .views import BookingViewSet, PricingView, CustomerDisputeViewSet, DriverSlotViewSet, wait_for_offers
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
@@ -8,6 +8,8 @@ router.register(r'disputes', CustomerDisputeViewSet, basename='customer-dispute'
 router.register(r'driver-slots', DriverSlotViewSet, basename='driver-slot')
 
 urlpatterns = [
+    # Async view (bookings.offers), ahead of the router's bookings/<pk>/ routes
+    path('bookings/offers/wait/', wait_for_offers, name='booking-wait-offers'),
     path('', include(router.urls)),
     path('estimate-price/', PricingView.as_view(), name='estimate-price'),
 ]
@@ -9,16 +9,33 @@ import logging
 from django.utils import timezone
 from django.db import transaction
 from django.db import IntegrityError
+from django.conf import settings
+from backend.conditional import ConditionalGetMixin
+from backend.fieldsets import project
+from backend.pagination import KeysetPagination
 
 logger = logging.getLogger(__name__)
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    # Conditional GET (backend.conditional): everything BookingSerializer reads that can change
+    validator_fields = (
+        'updated_at', 'payment__updated_at', 'rating__created_at', 'slot__updated_at',
+        'driver_requests__notified_at', 'driver_requests__responded_at',
+    )
 
-    def get_queryset(self):
+    def initial(self, request, *args, **kwargs):
+        from .services import DriverMatchingService
+
+        # Without a Celery worker nothing else expires overdue driver offers
+        DriverMatchingService.expire_overdue_offers()
+        super().initial(request, *args, **kwargs)
+
+    def get_visible_bookings(self):
         """
-        Filter queryset based on user role.
+        Filter bookings based on user role.
         Customers see their own bookings.
         Drivers see bookings assigned to them OR notified about (Uber-like).
         Admins see all bookings.
@@ -30,29 +47,49 @@ class BookingViewSet(viewsets.ModelViewSet):
                 return Booking.objects.filter(customer=user).order_by('-created_at')
             elif user.role == 'driver':
                 # Driver sees bookings they're assigned to OR currently notified about
-                bookings = Booking.objects.filter(
-                    Q(driver=user) | Q(current_notified_driver=user)
-                ).order_by('-created_at')
-                logger.info(f"Driver {user.id} ({user.username}): Found {bookings.count()} bookings")
-                return bookings
+                return Booking.objects.filter(
+                    Q(driver=user) | Q(current_notified_driver=user) |
+                    Q(driver_requests__driver=user, driver_requests__status='pending', driver_requests__expires_at__isnull=False)
+                ).distinct().order_by('-created_at')
             elif user.role == 'admin':
                 return Booking.objects.all().order_by('-created_at')
         return Booking.objects.none()
 
+    def get_validator_queryset(self):
+        return self.get_visible_bookings()
+
+    def get_validator_aggregates(self):
+        from django.db.models import Count, Max, Q
+        aggregates = super().get_validator_aggregates()
+        # New offers (driver_requests_count), and driver moves while the ETA is shown
+        aggregates['driver_requests'] = Count('driver_requests', distinct=True)
+        aggregates['max_eta_location'] = Max(
+            'driver__location__updated_at', filter=Q(status__in=('accepted', 'started'))
+        )
+        return aggregates
+
+    def get_queryset(self):
+        """Visible bookings with everything the requested fields read preloaded."""
+        return BookingSerializer.prepare_queryset(
+            self.get_visible_bookings(), self.request.user,
+            fields=BookingSerializer.requested_fields(self.request)
+        )
+
     def list(self, request, *args, **kwargs):
-        """List bookings with logging for debugging"""
-        queryset = self.get_queryset()
+        """List bookings a page at a time, with logging for debugging"""
+        page = self.paginate_queryset(self.get_queryset())
         user = request.user
         
-        logger.info(f"LIST REQUEST: User {user.id} ({user.username}) role={user.role}")
-        logger.info(f"LIST REQUEST: Total matching bookings: {queryset.count()}")
-        
-        # Show details of bookings for debugging
-        for booking in queryset[:5]:
-            logger.info(f"  - Booking #{booking.id}: status={booking.status}, customer={booking.customer_id}, driver={booking.driver_id}, notified_driver={booking.current_notified_driver_id}")
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        serializer = self.get_serializer(page, many=True)
+        data = serializer.data
+
+        logger.info(f"LIST REQUEST: User {user.id} ({user.username}) role={user.role}: {len(data)} bookings on this page")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Show details of bookings for debugging
+            for booking in data[:5]:
+                logger.debug(f"  - Booking #{booking['id']}: status={booking['status']}, customer={booking['customer']}, driver={booking['driver']}, notified_driver={booking['current_notified_driver']}")
+
+        return self.get_paginated_response(data)
 
     def create(self, request, *args, **kwargs):
         """Create a booking and return JSON even when an unexpected server error occurs."""
@@ -71,8 +108,13 @@ class BookingViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def available(self, request):
         """Get available bookings for drivers (Uber-like notification system)."""
-        from .services import DriverMatchingService
+        denied = self._check_can_receive_jobs(request)
+        if denied:
+            return denied
+        return Response(self._available_bookings(request))
 
+    def _check_can_receive_jobs(self, request):
+        """Return an error response unless the user is an online driver (or superuser)."""
         if request.user.role != 'driver' and not request.user.is_superuser:
             return Response({'detail': 'Only drivers can view available bookings.'}, 
                           status=status.HTTP_403_FORBIDDEN)
@@ -80,15 +122,22 @@ class BookingViewSet(viewsets.ModelViewSet):
         # Only allow online drivers to see jobs
         if not request.user.is_online:
             return Response({'detail': 'You must be online to receive jobs.'}, status=status.HTTP_403_FORBIDDEN)
+        return None
+
+    def _available_bookings(self, request):
+        """Serialized bookings offered to (or open to) the requesting driver."""
+        from .services import DriverMatchingService
 
         if request.user.role == 'driver' and DriverMatchingService.is_driver_busy(request.user, include_notifications=False):
-            return Response([])
+            return []
         
         # Priority 1: Bookings where this driver is the SPECIFIC notified driver
-        # These are urgent "Incoming Job" requests
+        # (or holds a broadcast offer). These are urgent "Incoming Job" requests
+        from django.db.models import Q
         incoming_bookings = Booking.objects.filter(
-            status__in=['pending', 'searching_driver'],
-            current_notified_driver=request.user
+            Q(current_notified_driver=request.user) |
+            Q(driver_requests__driver=request.user, driver_requests__status='pending', driver_requests__expires_at__isnull=False),
+            status__in=['pending', 'searching_driver']
         )
         
         # Priority 2: General pool (legacy or fallback) - 'searching_driver' with no specific target yet?
@@ -97,14 +146,18 @@ class BookingViewSet(viewsets.ModelViewSet):
         pool_bookings = Booking.objects.filter(
             status='pending', 
             driver__isnull=True,
-            current_notified_driver__isnull=True
+            current_notified_driver__isnull=True,
+            driver_requests__isnull=True
         )
         
         # Combine
-        combined = incoming_bookings | pool_bookings
+        combined = BookingSerializer.prepare_queryset(
+            (incoming_bookings | pool_bookings).distinct(), request.user,
+            fields=BookingSerializer.requested_fields(request)
+        )
         
-        serializer = self.get_serializer(combined.distinct(), many=True)
-        return Response(serializer.data)
+        serializer = self.get_serializer(combined, many=True)
+        return serializer.data
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -112,7 +165,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         Get summary statistics for the dashboard.
         """
         user = request.user
-        bookings = self.get_queryset()
+        bookings = self.get_visible_bookings()
         
         total = bookings.count()
         completed = bookings.filter(status='completed').count()
@@ -146,18 +199,30 @@ class BookingViewSet(viewsets.ModelViewSet):
             from django.db.models import Avg
             avg_rating = Rating.objects.filter(driver=user).aggregate(Avg('score'))['score__avg'] or 5.0
 
+            # Online time comes from the precomputed daily shift rollups; roll
+            # this driver's open shift up first so it counts without waiting
+            # for the periodic rollup
+            from datetime import timedelta
+            from users.shifts import rollup, summary as shift_summary
+            rollup(driver_ids=[user.id])
+            local_today = timezone.localdate()
+            shifts_today = shift_summary(user.id, local_today)
+            shifts_week = shift_summary(user.id, local_today - timedelta(days=6))
+            shifts_month = shift_summary(user.id, local_today - timedelta(days=29))
+
             return Response({
                 'summary': {
                     'jobs_done': completed,
                     'total_jobs': total,
                     'earnings': float(earnings_total),
                     'rating': round(float(avg_rating), 1),
-                    'hours_online': 0 # Mock until we have a shift/tracking model
+                    'hours_online': shifts_today['hours_online'],
+                    'utilisation': shifts_today['utilisation'],
                 },
                 'stats_table': {
-                    'today': {'earnings': float(today_earnings), 'jobs': today_jobs},
-                    'week': {'earnings': float(earnings_total), 'jobs': completed}, # Simplified for now
-                    'month': {'earnings': float(earnings_total), 'jobs': completed}
+                    'today': {'earnings': float(today_earnings), 'jobs': today_jobs, **shifts_today},
+                    'week': {'earnings': float(earnings_total), 'jobs': completed, **shifts_week}, # Earnings simplified for now
+                    'month': {'earnings': float(earnings_total), 'jobs': completed, **shifts_month}
                 }
             })
             
@@ -227,7 +292,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                     raise serializers.ValidationError({'slot_id': 'Slot not found, already booked, or no longer available.'})
 
                 slot.status = 'booked'
-                slot.save(update_fields=['status'])
+                slot.save(update_fields=['status', 'updated_at'])
 
                 booking = serializer.save(
                     customer=request.user,
@@ -295,9 +360,14 @@ class BookingViewSet(viewsets.ModelViewSet):
 
             # Initiate automatic driver search (Uber-like)
             try:
-                from .tasks import initiate_driver_search_task
-                initiate_driver_search_task.delay(booking.id)
-                logger.info(f"Driver search task queued for booking {booking.id}")
+                if settings.DRIVER_DISPATCH_BATCH_WINDOW_SECONDS > 0:
+                    from .tasks import schedule_dispatch_batch
+                    schedule_dispatch_batch()
+                    logger.info(f"Booking {booking.id} queued for batch dispatch")
+                else:
+                    from .tasks import initiate_driver_search_task
+                    initiate_driver_search_task.delay(booking.id)
+                    logger.info(f"Driver search task queued for booking {booking.id}")
             except Exception as e:
                 logger.error(f"Failed to initiate driver search: {str(e)}", exc_info=True)
     
@@ -320,8 +390,8 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # For drivers: Use the Uber-like matching service
         if is_driver:
-            # Check if this driver is the currently notified one
-            if booking.current_notified_driver != request.user:
+            # Check if this driver is the currently notified one (or holds a broadcast offer)
+            if not DriverMatchingService.has_live_offer(booking, request.user):
                 return Response({
                     'detail': 'This order has been assigned to another driver or you were not selected for this order.'
                 }, status=status.HTTP_403_FORBIDDEN)
@@ -337,7 +407,8 @@ class BookingViewSet(viewsets.ModelViewSet):
                 booking.driver = request.user
                 booking.status = 'accepted'
                 booking.current_notified_driver = None
-                booking.save(update_fields=['driver', 'status', 'current_notified_driver'])
+                booking.accepted_at = timezone.now()
+                booking.save(update_fields=['driver', 'status', 'current_notified_driver', 'accepted_at', 'updated_at'])
                 success = True
             else:
                 # Use the service to handle acceptance for Uber-like bookings
@@ -382,6 +453,7 @@ class BookingViewSet(viewsets.ModelViewSet):
             booking.driver = request.user
             booking.status = 'accepted'
             booking.current_notified_driver = None
+            booking.accepted_at = timezone.now()
             booking.save()
             
             # Log admin driver assignment
@@ -417,8 +489,8 @@ class BookingViewSet(viewsets.ModelViewSet):
         if not is_driver:
             return Response({'detail': 'Only drivers can reject bookings.'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Check if this driver is the currently notified one
-        if booking.current_notified_driver != request.user:
+        # Check if this driver is the currently notified one (or holds a broadcast offer)
+        if not DriverMatchingService.has_live_offer(booking, request.user):
             return Response({
                 'detail': 'You cannot reject this order as you were not selected for it.'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -428,10 +500,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             with transaction.atomic():
                 booking.status = 'cancelled'
                 booking.current_notified_driver = None
-                booking.save(update_fields=['status', 'current_notified_driver'])
+                booking.save(update_fields=['status', 'current_notified_driver', 'updated_at'])
 
                 booking.slot.status = 'available'
-                booking.slot.save(update_fields=['status'])
+                booking.slot.save(update_fields=['status', 'updated_at'])
 
             return Response({
                 'detail': 'Slot booking rejected. The slot has been released and the booking has been cancelled.',
@@ -456,6 +528,9 @@ class BookingViewSet(viewsets.ModelViewSet):
     def start(self, request, pk=None):
         """Mark booking as started (On the Way)"""
         booking = self.get_object()
+        # The geofence may have started the job already
+        if booking.status in ['started', 'arrived'] and booking.driver_id == request.user.id:
+            return Response({'detail': 'Job already started.'}, status=status.HTTP_200_OK)
         if booking.status != 'accepted':
             return Response({'detail': 'Job must be accepted before starting.'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -464,12 +539,21 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         booking.status = 'started'
         booking.save()
+
+        try:
+            driver_name = request.user.get_full_name() or request.user.username
+            send_driver_on_the_way_task.delay(booking.id, driver_name)
+        except Exception as e:
+            logger.error(f"Failed to queue on-the-way SMS: {str(e)}")
+
         return Response({'detail': 'Job started. You are now on the way.'})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def arrive(self, request, pk=None):
         """Mark booking as arrived"""
         booking = self.get_object()
+        if booking.status == 'arrived' and booking.driver_id == request.user.id:
+            return Response({'detail': 'Already marked as arrived.'}, status=status.HTTP_200_OK)
         if booking.status != 'started':
             return Response({'detail': 'Job must be started before arrival.'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -501,6 +585,17 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # Determine final price (could be calculated or passed in request) 
         final_price = booking.estimated_price
+
+        # Fill in trip distance and fuel from the GPS odometer unless recorded by hand
+        from tracking import odometer
+        recorded_km = odometer.distance_km(booking)
+        if recorded_km is not None and not booking.distance_km:
+            booking.distance_km = round(recorded_km, 2)
+            if not booking.fuel_used_liters:
+                from vehicles.models import Vehicle
+                vehicle = Vehicle.objects.filter(driver_id=booking.driver_id).first()
+                if vehicle:
+                    booking.fuel_used_liters = round(vehicle.estimate_fuel_liters(recorded_km), 2)
         
         # Use transaction to ensure data integrity
         from payments.models import Payment
@@ -533,6 +628,8 @@ class BookingViewSet(viewsets.ModelViewSet):
                 if not payment.payment_method:
                     payment.payment_method = 'cash'
                 payment.save()
+
+        odometer.clear(booking.id)
         
         # Log service completion
         ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR'))
@@ -558,6 +655,14 @@ class BookingViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.error(f"Failed to send completion SMS: {str(e)}")
             # Continue without failing the request
+
+        # The driver is free again: retry stranded bookings around them
+        if booking.driver_id:
+            try:
+                from .tasks import redispatch_near_driver_task
+                redispatch_near_driver_task.delay(booking.driver_id)
+            except Exception as e:
+                logger.error(f"Failed to queue re-dispatch after completion: {str(e)}")
         
         return Response({'detail': 'Booking completed successfully. Invoice generated.'})
     
@@ -584,7 +689,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.driver = driver
         if booking.status == 'pending':
             booking.status = 'accepted'
+        if booking.status == 'accepted':
+            booking.accepted_at = timezone.now()
         booking.save()
+
+        if previous_driver and previous_driver != driver:
+            from . import availability
+            availability.release(previous_driver.id, booking.id)
         
         # Log driver assignment by admin
         ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR'))
@@ -603,6 +714,24 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         return Response({'detail': f'Driver {driver.username} successfully assigned to booking #{booking.id}.'})
 
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def route(self, request, pk=None):
+        """Replay the driver's route for a booking, from acceptance to completion"""
+        from tracking.history import DEFAULT_TOLERANCE_METERS, trip_replay
+
+        booking = self.get_object()
+        if not booking.driver_id:
+            return Response({'detail': 'No driver has been assigned to this booking.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            tolerance_m = float(request.query_params.get('tolerance_m', DEFAULT_TOLERANCE_METERS))
+        except ValueError:
+            return Response({'detail': 'tolerance_m must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+        if tolerance_m < 0:
+            return Response({'detail': 'tolerance_m cannot be negative.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(trip_replay(booking, tolerance_m))
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def rate(self, request, pk=None):
         """Submit a rating for a completed booking"""
@@ -693,7 +822,7 @@ class BookingViewSet(viewsets.ModelViewSet):
                 }
             },
             'recent_ratings': recent_serializer.data,
-            'all_ratings_count': ratings.count()
+            'all_ratings_count': stats['total_count']
         })
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
@@ -704,14 +833,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         from .models import Rating
         from .serializers import RatingDetailSerializer
-        from django_filters.rest_framework import DjangoFilterBackend
         
         # Get filter parameters
         unreviewed_only = request.query_params.get('unreviewed', 'false').lower() == 'true'
         flagged_only = request.query_params.get('flagged', 'false').lower() == 'true'
         driver_id = request.query_params.get('driver_id')
         
-        ratings = Rating.objects.all().order_by('-created_at')
+        ratings = Rating.objects.select_related('customer', 'driver', 'reviewed_by').order_by('-created_at')
         
         if unreviewed_only:
             ratings = ratings.filter(is_reviewed_by_admin=False)
@@ -722,23 +850,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         if driver_id:
             ratings = ratings.filter(driver__id=driver_id)
         
-        # Pagination
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        paginated_ratings = ratings[start:end]
-        serializer = RatingDetailSerializer(paginated_ratings, many=True)
-        
-        return Response({
-            'count': ratings.count(),
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (ratings.count() + page_size - 1) // page_size,
-            'results': serializer.data
-        })
+        # Keyset pagination: ?cursor= from the previous page's next/previous link
+        page = self.paginate_queryset(ratings)
+        serializer = RatingDetailSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def review_rating(self, request):
@@ -775,6 +890,86 @@ class BookingViewSet(viewsets.ModelViewSet):
             'rating': RatingDetailSerializer(rating).data
         })
 
+def _offer_wait_user(request):
+    """
+    Authenticate an offer long-poll the way BookingViewSet would.
+
+    Returns:
+        tuple: (user, None), or (None, error JsonResponse)
+    """
+    from django.http import JsonResponse
+    from rest_framework.exceptions import APIException
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except APIException as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    if not user.is_authenticated:
+        return None, JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                                  status=status.HTTP_401_UNAUTHORIZED)
+    if user.role != 'driver' and not user.is_superuser:
+        return None, JsonResponse({'detail': 'Only drivers can view available bookings.'},
+                                  status=status.HTTP_403_FORBIDDEN)
+    if not user.is_online:
+        return None, JsonResponse({'detail': 'You must be online to receive jobs.'},
+                                  status=status.HTTP_403_FORBIDDEN)
+    return user, None
+
+
+def _offer_wait_offers(request):
+    """The driver's available bookings, as BookingViewSet.available serves them."""
+    response = BookingViewSet.as_view({'get': 'available'})(request)
+    return response.data if response.status_code == status.HTTP_200_OK else []
+
+
+async def wait_for_offers(request):
+    """
+    Long-poll for incoming job offers.
+    Query params: timeout (seconds, at most OFFER_WAIT_SECONDS),
+                  known (comma-separated booking IDs the client already shows)
+
+    Answers with the same list as BookingViewSet.available as soon as the
+    driver has an offer not in `known`, or with [] once the timeout passes;
+    the client then asks again. This is a plain async view (DRF views are
+    sync) so waiting drivers share the ASGI worker's event loop. Under WSGI,
+    or without a shared broker to signal it, it answers at once with
+    Retry-After instead of holding the request.
+    Waiting costs no database queries (see bookings.offers).
+    """
+    from asgiref.sync import sync_to_async
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse
+    from . import offers
+
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'},
+                            status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user, denied = await sync_to_async(_offer_wait_user)(request)
+    if denied:
+        return denied
+
+    try:
+        timeout = float(request.GET.get('timeout', settings.OFFER_WAIT_SECONDS))
+        known = {int(value) for value in request.GET.get('known', '').split(',') if value.strip()}
+    except ValueError:
+        return JsonResponse({'detail': 'timeout must be a number of seconds and known a list of booking IDs.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    timeout = max(0, min(timeout, settings.OFFER_WAIT_SECONDS))
+
+    held = isinstance(request, ASGIRequest) and offers.can_wait()
+    result = await offers.wait_for_offers(
+        user.id, timeout if held else 0, sync_to_async(lambda: _offer_wait_offers(request)), known
+    )
+    response = JsonResponse(result, safe=False)
+    if not held:
+        response['Retry-After'] = str(offers.RETRY_SECONDS)
+    return response
+
+
 from rest_framework.views import APIView
 
 from users.admin_panel.models import Dispute
@@ -783,6 +978,7 @@ from .serializers import CustomerDisputeSerializer
 class CustomerDisputeViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CustomerDisputeSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -804,23 +1000,27 @@ class CustomerDisputeViewSet(viewsets.ModelViewSet):
 
         serializer.save(raised_by=self.request.user, reason=reason)
 
-class DriverSlotViewSet(viewsets.ModelViewSet):
+class DriverSlotViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing driver availability slots"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = DriverSlotSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'driver':
-            return DriverSlot.objects.filter(driver=user).order_by('-date', '-start_time')
+            queryset = DriverSlot.objects.filter(driver=user).order_by('-date', '-start_time')
         elif user.role == 'admin' or user.is_superuser:
-            return DriverSlot.objects.all().order_by('-date', '-start_time')
-        # Customers can see available slots from approved drivers only
-        return DriverSlot.objects.filter(
-            status='available',
-            date__gte=timezone.now().date(),
-            driver__is_driver_approved=True
-        ).order_by('date', 'start_time')
+            queryset = DriverSlot.objects.order_by('-date', '-start_time')
+        else:
+            # Customers can see available slots from approved drivers only
+            queryset = DriverSlot.objects.filter(
+                status='available',
+                date__gte=timezone.now().date(),
+                driver__is_driver_approved=True
+            ).order_by('date', 'start_time')
+        # Only the columns and joins of the requested fields (?fields=, ?profile=)
+        return project(queryset, DriverSlotSerializer, self.request)
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -0,0 +1,152 @@
+"""
+Spatial waiting list of stranded bookings.
+
+Bookings that end up 'no_driver_available' are parked here, bucketed by a
+coarse lat/lon region (each region is one cache entry mapping booking ID to
+its pickup point). When supply appears somewhere (a driver goes online,
+finishes a job or moves into a new area) only the regions around that point
+are read, so finding stranded bookings in range never scans the bookings table.
+A region entry is only changed under a cache.add lock, so two bookings
+parked in the same region at once don't overwrite each other.
+
+Like the availability registry, the regions need a cache shared by every
+process (CACHE_IS_SHARED): with a per-process cache a booking parked by one
+worker would be invisible to the others. Without one, the waiting list is
+read from the bookings table instead: stranded bookings inside the search
+radius's bounding box, by status.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from tracking.geo import bounding_box, grid_indices, haversine_km, min_cell_size_km
+
+logger = logging.getLogger(__name__)
+
+# Region size in degrees (~55km at the equator), so a search radius of
+# MAX_SEARCH_RADIUS_KM only touches the surrounding 3x3 regions
+REGION_DEGREES = 0.5
+KEY_PREFIX = 'waitlist:region:'
+LOCK_PREFIX = 'waitlist:lock:'
+LOCK_TIMEOUT_SECONDS = 5
+LOCK_WAIT_SECONDS = 2
+
+# Stranded bookings stop being re-dispatched after a day
+MAX_WAIT_SECONDS = 60 * 60 * 24
+
+
+def _region_key(row, col):
+    return f"{KEY_PREFIX}{row}:{col}"
+
+
+def _booking_region_key(booking):
+    return _region_key(*grid_indices(booking.latitude, booking.longitude, REGION_DEGREES))
+
+
+@contextmanager
+def _region_lock(key):
+    """Serialize read-modify-write of one region entry across processes."""
+    lock_key = f"{LOCK_PREFIX}{key}"
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while not cache.add(lock_key, True, LOCK_TIMEOUT_SECONDS):
+        if time.monotonic() > deadline:
+            logger.warning(f"Waiting list lock for {key} is held too long; proceeding")
+            break
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def add(booking):
+    """Park a stranded booking on the waiting list."""
+    if not settings.CACHE_IS_SHARED:
+        # Its status already puts it on the list (see waiting_near)
+        return
+    key = _booking_region_key(booking)
+    with _region_lock(key):
+        entries = cache.get(key) or {}
+        if booking.id in entries:
+            return
+        entries[booking.id] = (booking.latitude, booking.longitude, time.time())
+        cache.set(key, entries, MAX_WAIT_SECONDS)
+    logger.info(f"Booking {booking.id} added to the re-dispatch waiting list")
+
+
+def remove(booking):
+    """Take a booking off the waiting list (matched, cancelled or expired)."""
+    if not settings.CACHE_IS_SHARED:
+        return
+    key = _booking_region_key(booking)
+    with _region_lock(key):
+        entries = cache.get(key)
+        if not entries or booking.id not in entries:
+            return
+        entries.pop(booking.id)
+        if entries:
+            cache.set(key, entries, MAX_WAIT_SECONDS)
+        else:
+            cache.delete(key)
+
+
+def _waiting_in_database(lat, lon, radius_km):
+    """(parked at, booking ID, lat, lon) of stranded bookings in the radius's bounding box."""
+    from .models import Booking
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    bookings = Booking.objects.filter(
+        status='no_driver_available', driver__isnull=True,
+        updated_at__gte=timezone.now() - timedelta(seconds=MAX_WAIT_SECONDS),
+        latitude__gte=min_lat, latitude__lte=max_lat
+    )
+    if min_lon is not None:
+        bookings = bookings.filter(longitude__gte=min_lon, longitude__lte=max_lon)
+    return [
+        (updated_at.timestamp(), booking_id, booking_lat, booking_lon)
+        for booking_id, booking_lat, booking_lon, updated_at
+        in bookings.values_list('id', 'latitude', 'longitude', 'updated_at')
+    ]
+
+
+def _waiting_in_cache(lat, lon, radius_km):
+    row, col = grid_indices(lat, lon, REGION_DEGREES)
+    rings = int(ceil(radius_km / min_cell_size_km(lat, radius_km, REGION_DEGREES)))
+    keys = [
+        _region_key(row + d_row, col + d_col)
+        for d_row in range(-rings, rings + 1)
+        for d_col in range(-rings, rings + 1)
+    ]
+
+    cutoff = time.time() - MAX_WAIT_SECONDS
+    return [
+        (added_at, booking_id, booking_lat, booking_lon)
+        for entries in cache.get_many(keys).values()
+        for booking_id, (booking_lat, booking_lon, added_at) in entries.items()
+        if added_at >= cutoff
+    ]
+
+
+def waiting_near(lat, lon, radius_km):
+    """
+    Return IDs of stranded bookings within `radius_km` of a point, longest
+    waiting first.
+    """
+    if settings.CACHE_IS_SHARED:
+        candidates = _waiting_in_cache(lat, lon, radius_km)
+    else:
+        candidates = _waiting_in_database(lat, lon, radius_km)
+
+    waiting = [
+        (added_at, booking_id)
+        for added_at, booking_id, booking_lat, booking_lon in candidates
+        if haversine_km(lat, lon, booking_lat, booking_lon) <= radius_km
+    ]
+    waiting.sort()
+    return [booking_id for _, booking_id in waiting]
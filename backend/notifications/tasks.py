@@ -109,6 +109,8 @@ def send_driver_accepted_task(booking_id):
         driver_phone = booking.driver.phone_number
         service_type = booking.get_service_type_display()
         scheduled_time = booking.scheduled_date.strftime('%H:%M') if booking.scheduled_date else "to be confirmed"
+        from tracking.eta import eta_for_driver, format_eta
+        eta = format_eta(eta_for_driver(booking.driver, booking.latitude, booking.longitude))
         
         if not customer_phone:
             logger.warning(f"Booking {booking_id} has no customer phone number; cannot send acceptance SMS")
@@ -124,6 +126,7 @@ def send_driver_accepted_task(booking_id):
             f"Great news! Driver {driver_name} has accepted your booking!\n"
             f"Service: {service_type}\n"
             f"Scheduled: {scheduled_time}\n"
+            f"Driver ETA: {eta}\n"
             f"Driver Contact: {driver_phone}\n"
             f"Booking #: {booking.id}\n"
             f"Track your booking in the UsafiLink app."
@@ -135,10 +138,13 @@ def send_driver_accepted_task(booking_id):
         return {"success": False, "error": str(e)}
 
 @shared_task
-def send_driver_on_the_way_task(booking_id, driver_name, eta):
-    """Send driver on the way notification"""
+def send_driver_on_the_way_task(booking_id, driver_name, eta=None):
+    """Send driver on the way notification (ETA is estimated when not given)"""
     try:
         booking = Booking.objects.get(id=booking_id)
+        if eta is None:
+            from tracking.eta import eta_for_driver, format_eta
+            eta = format_eta(eta_for_driver(booking.driver, booking.latitude, booking.longitude))
         message = (
             f"Driver {driver_name} is on the way!\n"
             f"ETA: {eta}\n"
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_remove_payment_payments_pa_mpesa_r_10ee83_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at', 'id'], name='payments_created_id_idx'),
+        ),
+    ]
@@ -84,6 +84,7 @@ class Payment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id'], name='payments_created_id_idx'),
             models.Index(fields=['intasend_api_ref']),
             models.Index(fields=['invoice_id']),
             models.Index(fields=['bank_reference']),
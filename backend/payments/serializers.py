@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Payment, TransactionLog
 from bookings.models import Booking
+from backend.fieldsets import SparseFieldsetsMixin
 
 class PaymentCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,7 +15,7 @@ class PaymentUpdateSerializer(serializers.ModelSerializer):
         fields = ['status', 'intasend_api_ref', 'notes']
         read_only_fields = ['booking', 'amount', 'created_at']
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     booking_details = serializers.SerializerMethodField()
     customer_name = serializers.SerializerMethodField()
     
@@ -22,6 +23,14 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
         read_only_fields = ('status', 'created_at', 'updated_at')
+        # Sparse fieldsets (backend.fieldsets): ?fields=, ?profile=summary, ?expand=
+        profiles = {
+            'summary': ('id', 'booking', 'amount', 'status', 'payment_method', 'created_at'),
+        }
+        field_dependencies = {
+            'booking_details': ('booking',),
+            'customer_name': ('booking__customer',),
+        }
     
     def get_booking_details(self, obj):
         if not obj.booking:
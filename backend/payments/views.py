@@ -14,6 +14,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 
+from backend.conditional import ConditionalGetMixin
+from backend.fieldsets import project
+from backend.pagination import KeysetPagination
 from bookings.models import Booking
 from notifications.tasks import send_payment_confirmation_task, send_sms_task, notify_admins_bank_payment_task
 from .models import Payment, TransactionLog
@@ -32,13 +35,17 @@ from users.admin_panel.services import log_system_action
 logger = logging.getLogger(__name__)
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for handling payment operations.
     Supports: Mobile Money, Card Payments, Bank Transfers via Intasend.
     """
     queryset = Payment.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    # Conditional GET (backend.conditional) for the polled payment reads
+    conditional_actions = ('list', 'retrieve', 'my_payments', 'status')
+    validator_fields = ('updated_at', 'booking__updated_at')
     
     def get_serializer_class(self):
         """
@@ -50,6 +57,13 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return PaymentUpdateSerializer
         return PaymentSerializer
     
+    def get_validator_queryset(self):
+        queryset = super().get_validator_queryset()
+        if self.action == 'status':
+            # Pending Intasend payments are checked with Intasend on every poll, so never 304
+            queryset = queryset.exclude(status='pending', intasend_api_ref__gt='')
+        return queryset
+    
     def get_queryset(self):
         """
         Filter queryset based on user role.
@@ -74,7 +88,8 @@ class PaymentViewSet(viewsets.ModelViewSet):
         if payment_method:
             queryset = queryset.filter(payment_method=payment_method)
             
-        return queryset
+        # Only the columns and joins of the requested fields (?fields=, ?profile=)
+        return project(queryset, PaymentSerializer, self.request)
     
     def create(self, request, *args, **kwargs):
         """
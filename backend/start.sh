@@ -15,6 +15,7 @@ echo "⏰ Starting Celery Beat..."
 celery -A backend beat --loglevel=info --scheduler django_celery_beat.schedulers:DatabaseScheduler &
 
 # 3. Start Gunicorn in the foreground
-# This must be the last command and remain in the foreground so the Render service stays alive
+# This must be the last command and remain in the foreground so the Render service stays alive.
+# Uvicorn workers serve the ASGI app, so live streams and offer long-polls don't pin a worker each.
 echo "🌐 Starting Gunicorn Web Server..."
-exec gunicorn backend.wsgi:application --bind 0.0.0.0:$PORT --timeout 120
+exec gunicorn backend.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:$PORT --timeout 120
@@ -0,0 +1,208 @@
+"""
+Server-side marker clustering for the admin map.
+
+The map asks for a zoom level and its viewport. The viewport is covered by
+the map's own web-mercator tiles (256px, the z/x/y scheme Leaflet uses) and
+each tile is clustered on a fixed grid of CELLS_PER_TILE x CELLS_PER_TILE
+cells: every cell with markers becomes one cluster with a count per kind
+(online drivers, open bookings) and the centroid of its points. A cell
+holding a single marker returns that marker instead.
+
+Clustered tiles are cached per (zoom, x, y) for a few seconds, so admins
+looking at the same area share the work and a pan only computes the tiles
+that came into view. The response grows with the viewport, never with the
+fleet.
+"""
+import logging
+from math import asinh, atan, degrees, floor, pi, radians, sinh, tan
+
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'tracking:clusters:'
+CACHE_TIMEOUT_SECONDS = 10
+
+# 8 cells per 256px tile: clusters are ~32px apart on screen
+CELLS_PER_TILE = 8
+MIN_ZOOM, MAX_ZOOM = 0, 20
+# Larger viewports should zoom out instead
+MAX_TILES_PER_REQUEST = 64
+
+# Web-mercator cuts off at this latitude
+MAX_MERCATOR_LAT = 85.05112878
+
+OPEN_BOOKING_STATUSES = (
+    'searching_driver', 'pending', 'payment_pending', 'accepted', 'started', 'arrived', 'no_driver_available'
+)
+
+
+def _key(zoom, x, y):
+    return f"{KEY_PREFIX}{zoom}:{x}:{y}"
+
+
+def _clamp_lat(lat):
+    return max(min(lat, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT)
+
+
+def tile_xy(lat, lon, zoom):
+    """Return the (x, y) index of the tile containing a point at `zoom`."""
+    n = 2 ** zoom
+    x = int(floor((lon + 180) / 360 * n))
+    y = int(floor((1 - asinh(tan(radians(_clamp_lat(lat)))) / pi) / 2 * n))
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """Return (min_lat, min_lon, max_lat, max_lon) of a tile."""
+    n = 2 ** zoom
+    max_lat = degrees(atan(sinh(pi * (1 - 2 * y / n))))
+    min_lat = degrees(atan(sinh(pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, x / n * 360 - 180, max_lat, (x + 1) / n * 360 - 180
+
+
+def viewport_tiles(zoom, min_lat, min_lon, max_lat, max_lon):
+    """
+    Return the (x, y) tiles covering a viewport at `zoom`.
+
+    Raises:
+        ValueError: If that is more than MAX_TILES_PER_REQUEST tiles
+    """
+    min_x, min_y = tile_xy(max_lat, min_lon, zoom)
+    max_x, max_y = tile_xy(min_lat, max_lon, zoom)
+    count = (max_x - min_x + 1) * (max_y - min_y + 1)
+    if count > MAX_TILES_PER_REQUEST:
+        raise ValueError(f"Viewport covers {count} tiles at zoom {zoom}; zoom in or shrink the bbox")
+    return [(x, y) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)]
+
+
+def _cell_indices(lats, lons, zoom):
+    """Global grid cell (column, row) of each point at `zoom`."""
+    scale = 2 ** zoom * CELLS_PER_TILE
+    lats = np.radians(np.clip(lats, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    cols = np.floor((lons + 180) / 360 * scale).astype(np.int64)
+    rows = np.floor((1 - np.arcsinh(np.tan(lats)) / np.pi) / 2 * scale).astype(np.int64)
+    return np.clip(cols, 0, scale - 1), np.clip(rows, 0, scale - 1)
+
+
+def _markers(min_lat, min_lon, max_lat, max_lon):
+    """Online drivers and open bookings inside a box, as (kind, id, lat, lon) tuples."""
+    from bookings.models import Booking
+    from . import ingestion
+    from .models import DriverLocation
+
+    box = {'latitude__range': (min_lat, max_lat), 'longitude__range': (min_lon, max_lon)}
+    drivers = ingestion.apply_buffered_values(list(DriverLocation.objects.filter(
+        driver__role='driver', driver__is_online=True, driver__is_active=True, **box
+    ).values('driver_id', 'latitude', 'longitude', 'updated_at')))
+    bookings = Booking.objects.filter(status__in=OPEN_BOOKING_STATUSES, **box).values_list(
+        'id', 'latitude', 'longitude'
+    )
+
+    markers = [('driver', row['driver_id'], row['latitude'], row['longitude']) for row in drivers]
+    markers.extend(('booking', booking_id, lat, lon) for booking_id, lat, lon in bookings)
+    return markers
+
+
+def cluster_tiles(zoom, tiles):
+    """
+    Cluster the markers in the given tiles.
+
+    Args:
+        zoom: Map zoom level
+        tiles: (x, y) tiles to cluster
+
+    Returns:
+        dict: {(x, y): [cluster, ...]} for every requested tile
+    """
+    result = {tile: [] for tile in tiles}
+    if not tiles:
+        return result
+
+    bounds = [tile_bounds(zoom, x, y) for x, y in tiles]
+    markers = _markers(
+        min(b[0] for b in bounds), min(b[1] for b in bounds),
+        max(b[2] for b in bounds), max(b[3] for b in bounds)
+    )
+    if not markers:
+        return result
+
+    kinds = np.array([m[0] == 'driver' for m in markers], dtype=bool)
+    lats = np.array([m[2] for m in markers], dtype=float)
+    lons = np.array([m[3] for m in markers], dtype=float)
+    cols, rows = _cell_indices(lats, lons, zoom)
+
+    cells, inverse = np.unique(np.stack([cols, rows], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse, minlength=len(cells))
+    driver_counts = np.bincount(inverse, weights=kinds, minlength=len(cells))
+    lat_sums = np.bincount(inverse, weights=lats, minlength=len(cells))
+    lon_sums = np.bincount(inverse, weights=lons, minlength=len(cells))
+    first = np.full(len(cells), len(markers))
+    np.minimum.at(first, inverse, np.arange(len(markers)))
+
+    for i, (col, row) in enumerate(cells):
+        tile = (int(col) // CELLS_PER_TILE, int(row) // CELLS_PER_TILE)
+        if tile not in result:
+            continue  # Inside the combined box but outside the requested tiles
+        count = int(counts[i])
+        if count == 1:
+            kind, marker_id, lat, lon = markers[first[i]]
+            result[tile].append({'type': kind, 'id': marker_id, 'lat': lat, 'lon': lon, 'count': 1})
+            continue
+        drivers = int(driver_counts[i])
+        result[tile].append({
+            'type': 'cluster',
+            'lat': round(float(lat_sums[i] / count), 6),
+            'lon': round(float(lon_sums[i] / count), 6),
+            'count': count,
+            'drivers': drivers,
+            'bookings': count - drivers,
+        })
+    return result
+
+
+def get_clusters(zoom, min_lat, min_lon, max_lat, max_lon):
+    """
+    Return the clustered markers for a viewport, computing only the tiles
+    that aren't cached.
+
+    Returns:
+        dict: {'zoom', 'tiles': {'z/x/y': [cluster, ...]}, 'totals'}
+
+    Raises:
+        ValueError: If the zoom is out of range or the viewport covers too
+            many tiles at this zoom
+    """
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between {MIN_ZOOM} and {MAX_ZOOM}")
+    tiles = viewport_tiles(zoom, min_lat, min_lon, max_lat, max_lon)
+
+    keys = {tile: _key(zoom, *tile) for tile in tiles}
+    cached = cache.get_many(keys.values())
+    missing = [tile for tile in tiles if keys[tile] not in cached]
+    if missing:
+        computed = cluster_tiles(zoom, missing)
+        cache.set_many({keys[tile]: clusters for tile, clusters in computed.items()}, CACHE_TIMEOUT_SECONDS)
+        cached.update((keys[tile], clusters) for tile, clusters in computed.items())
+
+    tile_clusters = {f"{zoom}/{x}/{y}": cached[keys[(x, y)]] for x, y in tiles}
+    drivers = bookings = 0
+    for clusters in tile_clusters.values():
+        for cluster in clusters:
+            if cluster['type'] == 'cluster':
+                drivers += cluster['drivers']
+                bookings += cluster['bookings']
+            elif cluster['type'] == 'driver':
+                drivers += 1
+            else:
+                bookings += 1
+
+    return {
+        'zoom': zoom,
+        'cells_per_tile': CELLS_PER_TILE,
+        'cached_tiles': len(tiles) - len(missing),
+        'tiles': tile_clusters,
+        'totals': {'drivers': drivers, 'bookings': bookings},
+    }
@@ -0,0 +1,160 @@
+"""
+ETA engine.
+
+Travel time = road distance / expected speed for the hour of day.
+
+- Road distance is the haversine distance scaled by a detour factor. Trips
+  spanning several grid cells use the distance between cell centres, kept
+  in an in-process LRU cache keyed by the (cell, cell) pair.
+- Speed profiles (average km/h per hour of day) are learned from the
+  speeds drivers report in DriverLocation, saved in SpeedProfileHour and
+  cached. Each process keeps a short-lived copy, so an ETA lookup does no
+  I/O and costs microseconds. The copy is refreshed from the cache, or from
+  the database when the cache misses or is per-process (CACHE_IS_SHARED),
+  so every process answers with the same profile.
+"""
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Avg
+from django.utils import timezone
+
+from .geo import GRID_CELL_DEGREES, grid_cell_key, grid_indices, haversine_km
+
+logger = logging.getLogger(__name__)
+
+# Roads are longer than the straight line between two points
+ROAD_DETOUR_FACTOR = 1.3
+
+# Used for hours with no observed speeds yet (urban exhauster truck)
+DEFAULT_SPEED_KMH = 25.0
+MIN_SPEED_KMH = 5.0
+
+# Smoothing applied when blending new observations into an hour's average
+SPEED_PROFILE_ALPHA = 0.2
+SPEED_PROFILE_CACHE_KEY = 'tracking:speed_profile'
+SPEED_PROFILE_LOCAL_TTL_SECONDS = 60
+
+# Only moving drivers tell us anything about traffic
+MIN_SAMPLE_SPEED_KMH = 3.0
+
+_local_profile = {'profile': None, 'loaded_at': 0.0}
+
+
+def cell_center(cell):
+    row, col = (int(part) for part in cell.split(':'))
+    lat = (row + 0.5) * GRID_CELL_DEGREES - 90
+    lon = (col + 0.5) * GRID_CELL_DEGREES - 180
+    return lat, lon
+
+
+@lru_cache(maxsize=65536)
+def cell_pair_distance_km(cell_a, cell_b):
+    """Road distance (km) between the centres of two grid cells."""
+    if cell_b < cell_a:
+        cell_a, cell_b = cell_b, cell_a
+    return haversine_km(*cell_center(cell_a), *cell_center(cell_b)) * ROAD_DETOUR_FACTOR
+
+
+def road_distance_km(lat1, lon1, lat2, lon2):
+    """
+    Estimated road distance between two points. Nearby points use the exact
+    haversine distance; points several cells apart use the cached cell-pair
+    distance, whose centre-to-centre error is small relative to the trip.
+    """
+    row_a, col_a = grid_indices(lat1, lon1)
+    row_b, col_b = grid_indices(lat2, lon2)
+    if max(abs(row_a - row_b), abs(col_a - col_b)) <= 2:
+        return haversine_km(lat1, lon1, lat2, lon2) * ROAD_DETOUR_FACTOR
+    return cell_pair_distance_km(grid_cell_key(row_a, col_a), grid_cell_key(row_b, col_b))
+
+
+def load_speed_profile():
+    """Read the profile from the cache, falling back to the saved SpeedProfileHour rows."""
+    from .models import SpeedProfileHour
+
+    profile = cache.get(SPEED_PROFILE_CACHE_KEY) if settings.CACHE_IS_SHARED else None
+    if profile is None:
+        profile = [DEFAULT_SPEED_KMH] * 24
+        for hour, speed_kmh in SpeedProfileHour.objects.values_list('hour', 'speed_kmh'):
+            profile[hour] = speed_kmh
+        cache.set(SPEED_PROFILE_CACHE_KEY, profile, None)
+    return profile
+
+
+def get_speed_profile():
+    """Return the 24 hourly average speeds (km/h), index = local hour of day."""
+    now = time.monotonic()
+    if _local_profile['profile'] is None or now - _local_profile['loaded_at'] > SPEED_PROFILE_LOCAL_TTL_SECONDS:
+        try:
+            _local_profile['profile'] = load_speed_profile()
+        except Exception as e:
+            logger.error(f"Failed to load speed profile: {e}")
+            _local_profile['profile'] = _local_profile['profile'] or [DEFAULT_SPEED_KMH] * 24
+        _local_profile['loaded_at'] = now
+    return _local_profile['profile']
+
+
+def expected_speed_kmh(at=None):
+    at = timezone.localtime(at) if at else timezone.localtime()
+    return max(get_speed_profile()[at.hour], MIN_SPEED_KMH)
+
+
+def eta_seconds(lat1, lon1, lat2, lon2, at=None):
+    """Estimated driving time in seconds from (lat1, lon1) to (lat2, lon2)."""
+    distance_km = road_distance_km(lat1, lon1, lat2, lon2)
+    return int(round(distance_km / expected_speed_kmh(at) * 3600))
+
+
+def eta_for_driver(driver, lat, lon, at=None):
+    """ETA in seconds from a driver's last known location, or None without one."""
+    try:
+        location = driver.location
+    except ObjectDoesNotExist:
+        return None
+    return eta_seconds(location.latitude, location.longitude, lat, lon, at)
+
+
+def format_eta(seconds):
+    """Human-readable ETA for SMS text, e.g. '12 min' or '1 h 05 min'."""
+    if seconds is None:
+        return 'to be confirmed'
+    minutes = max(int(round(seconds / 60)), 1)
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d} min"
+
+
+def update_speed_profile(window_minutes=15):
+    """
+    Blend the average speed of drivers who reported movement in the last
+    `window_minutes` into the profile slot for the current hour.
+
+    Returns:
+        float or None: The observed average speed, if there were samples
+    """
+    from .models import DriverLocation, SpeedProfileHour
+
+    now = timezone.now()
+    observed = DriverLocation.objects.filter(
+        updated_at__gte=now - timedelta(minutes=window_minutes),
+        speed__gte=MIN_SAMPLE_SPEED_KMH
+    ).aggregate(avg=Avg('speed'))['avg']
+    if observed is None:
+        return None
+
+    profile = list(load_speed_profile())
+    hour = timezone.localtime(now).hour
+    profile[hour] = (1 - SPEED_PROFILE_ALPHA) * profile[hour] + SPEED_PROFILE_ALPHA * observed
+    SpeedProfileHour.objects.update_or_create(hour=hour, defaults={'speed_kmh': profile[hour]})
+    cache.set(SPEED_PROFILE_CACHE_KEY, profile, None)
+
+    _local_profile['profile'] = profile
+    _local_profile['loaded_at'] = time.monotonic()
+    logger.info(f"Updated speed profile for hour {hour}: {profile[hour]:.1f} km/h (observed {observed:.1f})")
+    return observed
@@ -0,0 +1,151 @@
+"""
+Geospatial helpers for driver tracking and matching.
+
+Driver positions are bucketed into a fixed lat/lon grid so that proximity
+lookups only touch the cells around a point instead of every online driver.
+"""
+from math import radians, sin, cos, sqrt, atan2, floor, ceil
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Grid cell size in degrees (~5.5km at the equator)
+GRID_CELL_DEGREES = 0.05
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometers."""
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_matrix(lats_a, lons_a, lats_b, lons_b):
+    """
+    Pairwise great-circle distances (km) between two sets of points.
+    Returns an array of shape (len(a), len(b)).
+    """
+    lat_a = np.radians(np.asarray(lats_a, dtype=float))[:, None]
+    lon_a = np.radians(np.asarray(lons_a, dtype=float))[:, None]
+    lat_b = np.radians(np.asarray(lats_b, dtype=float))[None, :]
+    lon_b = np.radians(np.asarray(lons_b, dtype=float))[None, :]
+
+    a = np.sin((lat_b - lat_a) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def grid_indices(lat, lon, cell_degrees=GRID_CELL_DEGREES):
+    """Return the (row, col) grid indices for a coordinate."""
+    row = int(floor((lat + 90) / cell_degrees))
+    col = int(floor((lon + 180) / cell_degrees))
+    return row, col
+
+
+def grid_cell_key(row, col):
+    return f"{row}:{col}"
+
+
+def grid_cell(lat, lon):
+    """Return the grid cell key a coordinate falls into."""
+    return grid_cell_key(*grid_indices(lat, lon))
+
+
+def ring_cells(lat, lon, ring):
+    """
+    Return the cell keys exactly `ring` cells away (Chebyshev distance)
+    from the cell containing the point. Ring 0 is the point's own cell.
+    """
+    row, col = grid_indices(lat, lon)
+    if ring == 0:
+        return [grid_cell_key(row, col)]
+
+    cells = []
+    for d in range(-ring, ring + 1):
+        cells.append(grid_cell_key(row - ring, col + d))
+        cells.append(grid_cell_key(row + ring, col + d))
+    for d in range(-ring + 1, ring):
+        cells.append(grid_cell_key(row + d, col - ring))
+        cells.append(grid_cell_key(row + d, col + ring))
+    return cells
+
+
+def min_cell_size_km(lat, radius_km=0, cell_degrees=GRID_CELL_DEGREES):
+    """
+    Smallest edge length (km) of any grid cell within `radius_km` of `lat`.
+    Longitude cells shrink away from the equator, so use the widest latitude.
+    """
+    widest_lat = min(abs(lat) + radius_km / KM_PER_DEGREE_LAT, 89.0)
+    lat_edge = cell_degrees * KM_PER_DEGREE_LAT
+    lon_edge = lat_edge * cos(radians(widest_lat))
+    return min(lat_edge, lon_edge)
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing every point within
+    `radius_km` of (lat, lon). The longitude range is None when the box
+    reaches a pole or wraps around the antimeridian.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = lat - lat_delta, lat + lat_delta
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    lon_delta = lat_delta / cos(radians(widest_lat))
+    min_lon, max_lon = lon - lon_delta, lon + lon_delta
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def find_nearest_locations(queryset, lat, lon, radius_km, limit, include=None):
+    """
+    Return up to `limit` (location, distance_km) pairs from a DriverLocation
+    queryset, nearest first, within `radius_km` of the point. If `include`
+    is given, it is called with each batch of fetched locations and returns
+    the ones to keep.
+
+    Cells are searched ring by ring outward and the search stops as soon as
+    no unsearched ring can contain anything closer than what was found.
+    """
+    cell_km = min_cell_size_km(lat, radius_km)
+    max_ring = int(ceil(radius_km / cell_km)) + 1
+
+    found = []
+    ring = 0
+    while ring <= max_ring:
+        # Anything in ring r is at least (r - 1) full cells away
+        lower_bound_km = max(ring - 1, 0) * cell_km
+        if lower_bound_km > radius_km:
+            break
+        if len(found) >= limit and lower_bound_km > found[limit - 1][1]:
+            break
+
+        # The first query covers the point's own cell and its neighbours
+        rings = [0, 1] if ring == 0 else [ring]
+        cells = []
+        for r in rings:
+            cells.extend(ring_cells(lat, lon, r))
+
+        locations = list(queryset.filter(grid_cell__in=cells))
+        if include is not None:
+            locations = include(locations)
+
+        for location in locations:
+            distance = haversine_km(location.latitude, location.longitude, lat, lon)
+            if distance <= radius_km:
+                found.append((location, distance))
+
+        found.sort(key=lambda item: item[1])
+        ring = rings[-1] + 1
+
+    return found[:limit]
@@ -0,0 +1,188 @@
+"""
+Geofence-driven booking transitions.
+
+Drivers often forget to tap 'start' and 'arrive'. Each accepted GPS point for
+a driver on a job is checked against a small fence kept in the cache for the
+booking:
+
+    accepted -> started    the driver has moved off the point where they
+                           were when the job was first tracked
+    started  -> arrived    the driver is within the arrival radius of the
+                           pickup (Booking.latitude/longitude)
+
+The fence holds the booking's status, pickup point and the driver's start
+point, so the check is a single cache read on top of the registry lookup
+that ingestion already does. Transitions are conditional updates, so a
+driver tapping the button at the same moment can't be overridden.
+
+Fences need a cache every process shares (CACHE_IS_SHARED): with a
+per-process cache a worker would keep checking a fence another worker has
+already moved on. Without one the fence is rebuilt from the booking row on
+every point, and the start point is the driver's first point in the location
+history since acceptance (written through on every ping in that mode).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .geo import haversine_km
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'geofence:booking:'
+FENCE_TIMEOUT_SECONDS = 60 * 60 * 24
+
+# Statuses with a fence; only the first two still have a transition ahead
+FENCED_STATUSES = ('accepted', 'started', 'arrived')
+
+
+def _key(booking_id):
+    return f"{KEY_PREFIX}{booking_id}"
+
+
+def _tracked_origin(driver_id, accepted_at):
+    """The driver's first recorded point since accepting the job, if any."""
+    from datetime import timedelta
+
+    from .history import CHUNK_SECONDS, points_between
+
+    points = points_between(driver_id, accepted_at, accepted_at + timedelta(seconds=CHUNK_SECONDS))
+    return (points[0][1], points[0][2]) if points else None
+
+
+def _load(booking_id, driver_id=None):
+    """
+    Build a booking's fence from the database.
+
+    Args:
+        booking_id: Booking ID
+        driver_id: When given, the start point is read from the driver's
+            location history instead of being set by the next point
+
+    Returns:
+        dict or None: The fence, or None if the booking doesn't exist
+    """
+    from bookings.models import Booking
+
+    booking = Booking.objects.filter(id=booking_id).values(
+        'status', 'latitude', 'longitude', 'accepted_at'
+    ).first()
+    if booking is None:
+        return None
+    origin = None
+    if driver_id is not None and booking['status'] == 'accepted' and booking['accepted_at']:
+        origin = _tracked_origin(driver_id, booking['accepted_at'])
+    return {
+        'status': booking['status'],
+        'pickup': (booking['latitude'], booking['longitude']),
+        'origin': origin,
+    }
+
+
+def sync_booking(booking):
+    """Keep a booking's fence in step with its saved status."""
+    if not settings.CACHE_IS_SHARED:
+        return  # Fences are read from the booking row
+    if booking.status not in FENCED_STATUSES:
+        cache.delete(_key(booking.id))
+        return
+    fence = cache.get(_key(booking.id)) or {'origin': None}
+    fence['status'] = booking.status
+    fence['pickup'] = (booking.latitude, booking.longitude)
+    cache.set(_key(booking.id), fence, FENCE_TIMEOUT_SECONDS)
+
+
+def _transition(booking_id, driver_id, from_status, to_status):
+    from bookings.models import Booking
+    from users.admin_panel.services import log_system_action
+
+    changed = Booking.objects.filter(
+        id=booking_id, driver_id=driver_id, status=from_status
+    ).update(status=to_status, updated_at=timezone.now())
+    if not changed:
+        return False
+
+    logger.info(f"Booking {booking_id} moved {from_status} -> {to_status} by geofence")
+    log_system_action(
+        action='booking_updated',
+        details={
+            'booking_id': booking_id,
+            'driver_id': driver_id,
+            'from_status': from_status,
+            'status': to_status,
+            'trigger': 'geofence'
+        }
+    )
+
+    if to_status == 'started':
+        try:
+            from users.models import User
+            from notifications.tasks import send_driver_on_the_way_task
+
+            driver = User.objects.get(id=driver_id)
+            send_driver_on_the_way_task.delay(booking_id, driver.get_full_name() or driver.username)
+        except Exception as e:
+            logger.error(f"Failed to queue on-the-way SMS: {str(e)}")
+    return True
+
+
+def evaluate(booking_id, driver_id, entry, previous=None):
+    """
+    Check a driver's new position against their booking's fence and apply any
+    transition it triggers.
+
+    Args:
+        booking_id: The booking the driver is on
+        driver_id: Driver user ID
+        entry: The driver's latest accepted position
+        previous: Their position before this update, if known
+
+    Returns:
+        str or None: The booking's new status if it changed
+    """
+    if not settings.GEOFENCE_AUTO_TRANSITIONS:
+        return None
+
+    key = _key(booking_id)
+    if not settings.CACHE_IS_SHARED:
+        fence = _load(booking_id, driver_id)
+        if fence is None or fence['status'] not in FENCED_STATUSES:
+            return None
+    else:
+        fence = cache.get(key)
+        if fence is None:
+            fence = _load(booking_id)
+            if fence is None or fence['status'] not in FENCED_STATUSES:
+                return None
+            cache.set(key, fence, FENCE_TIMEOUT_SECONDS)
+    if fence['status'] == 'arrived':
+        return None
+
+    position = (entry['latitude'], entry['longitude'])
+    if fence['origin'] is None:
+        origin = previous or entry
+        fence['origin'] = (origin['latitude'], origin['longitude'])
+
+    new_status = None
+    if fence['status'] == 'accepted':
+        moved_m = haversine_km(*fence['origin'], *position) * 1000
+        if moved_m >= settings.GEOFENCE_START_RADIUS_METERS:
+            if not _transition(booking_id, driver_id, 'accepted', 'started'):
+                # Changed elsewhere without a save signal; reload next time
+                cache.delete(key)
+                return None
+            fence['status'] = new_status = 'started'
+
+    if fence['status'] == 'started':
+        to_pickup_m = haversine_km(*fence['pickup'], *position) * 1000
+        if to_pickup_m <= settings.GEOFENCE_ARRIVAL_RADIUS_METERS:
+            if not _transition(booking_id, driver_id, 'started', 'arrived'):
+                cache.delete(key)
+                return None
+            fence['status'] = new_status = 'arrived'
+
+    if settings.CACHE_IS_SHARED:
+        cache.set(key, fence, FENCE_TIMEOUT_SECONDS)
+    return new_status
@@ -0,0 +1,144 @@
+"""
+Supply/demand heatmap.
+
+A periodic task buckets recent booking pickups (demand) and online driver
+positions (supply) into the lat/lon grid from tracking.geo and stores a
+compact per-cell snapshot in the cache. Dispatch reads it to widen the
+search radius in starved cells, and the admin map renders it without
+touching the bookings table.
+"""
+import logging
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from .geo import GRID_CELL_DEGREES, grid_cell, grid_cell_key
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'tracking:heatmap'
+SNAPSHOT_TIMEOUT_SECONDS = 30 * 60
+DEMAND_WINDOW_MINUTES = 60
+
+# A cell is starved when it has real demand and far too few drivers for it,
+# or when most of its bookings found no driver
+STARVED_MIN_DEMAND = 2
+STARVED_DEMAND_PER_DRIVER = 2.0
+STARVED_UNMET_RATIO = 0.5
+
+UNMET_STATUSES = ('no_driver_available', 'searching_driver')
+
+LOCAL_TTL_SECONDS = 60
+_local_snapshot = {'snapshot': None, 'loaded_at': 0.0}
+
+
+def _cell_indices(lats, lons):
+    rows = np.floor((lats + 90) / GRID_CELL_DEGREES).astype(np.int64)
+    cols = np.floor((lons + 180) / GRID_CELL_DEGREES).astype(np.int64)
+    return rows, cols
+
+
+def build_snapshot(window_minutes=DEMAND_WINDOW_MINUTES):
+    """
+    Compute per-cell demand, supply and unmet demand and store the snapshot.
+
+    Returns:
+        dict: The snapshot
+    """
+    from bookings.models import Booking
+    from .models import DriverLocation
+
+    since = timezone.now() - timedelta(minutes=window_minutes)
+    bookings = list(
+        Booking.objects.filter(created_at__gte=since).values_list('latitude', 'longitude', 'status')
+    )
+    drivers = list(
+        DriverLocation.objects.filter(
+            driver__role='driver', driver__is_online=True, driver__is_active=True
+        ).values_list('latitude', 'longitude')
+    )
+
+    booking_lats = np.array([b[0] for b in bookings], dtype=float)
+    booking_lons = np.array([b[1] for b in bookings], dtype=float)
+    unmet_mask = np.array([b[2] in UNMET_STATUSES for b in bookings], dtype=bool)
+    driver_lats = np.array([d[0] for d in drivers], dtype=float)
+    driver_lons = np.array([d[1] for d in drivers], dtype=float)
+
+    rows, cols = _cell_indices(
+        np.concatenate([booking_lats, driver_lats]),
+        np.concatenate([booking_lons, driver_lons])
+    )
+    cells, inverse = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    booking_cells = inverse[:len(bookings)]
+    driver_cells = inverse[len(bookings):]
+
+    demand = np.bincount(booking_cells, minlength=len(cells))
+    unmet = np.bincount(booking_cells[unmet_mask], minlength=len(cells))
+    supply = np.bincount(driver_cells, minlength=len(cells))
+
+    demand_per_driver = demand / np.maximum(supply, 1)
+    unmet_ratio = np.divide(unmet, demand, out=np.zeros(len(cells)), where=demand > 0)
+    starved = (demand >= STARVED_MIN_DEMAND) & (
+        (demand_per_driver >= STARVED_DEMAND_PER_DRIVER) | (unmet_ratio >= STARVED_UNMET_RATIO)
+    )
+
+    snapshot = {
+        'generated_at': timezone.now().isoformat(),
+        'window_minutes': window_minutes,
+        'cell_degrees': GRID_CELL_DEGREES,
+        'cells': [
+            {
+                'cell': grid_cell_key(int(row), int(col)),
+                'lat': round((int(row) + 0.5) * GRID_CELL_DEGREES - 90, 5),
+                'lon': round((int(col) + 0.5) * GRID_CELL_DEGREES - 180, 5),
+                'demand': int(demand[i]),
+                'supply': int(supply[i]),
+                'unmet': int(unmet[i]),
+                'unmet_ratio': round(float(unmet_ratio[i]), 3),
+                'starved': bool(starved[i]),
+            }
+            for i, (row, col) in enumerate(cells)
+        ],
+        'starved_cells': [grid_cell_key(int(row), int(col)) for row, col in cells[starved]],
+        'totals': {
+            'demand': int(demand.sum()),
+            'supply': int(supply.sum()),
+            'unmet': int(unmet.sum()),
+        },
+    }
+
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_TIMEOUT_SECONDS)
+    _local_snapshot['snapshot'] = snapshot
+    _local_snapshot['starved'] = set(snapshot['starved_cells'])
+    _local_snapshot['loaded_at'] = time.monotonic()
+    logger.info(
+        f"Built heatmap: {len(cells)} cells, {len(snapshot['starved_cells'])} starved, "
+        f"demand={snapshot['totals']['demand']} supply={snapshot['totals']['supply']}"
+    )
+    return snapshot
+
+
+def get_snapshot(build_if_missing=False):
+    """Return the latest snapshot (None if not built yet, unless build_if_missing)."""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None and build_if_missing:
+        snapshot = build_snapshot()
+    return snapshot
+
+
+def _starved_cells():
+    now = time.monotonic()
+    if _local_snapshot['snapshot'] is None or now - _local_snapshot['loaded_at'] > LOCAL_TTL_SECONDS:
+        _local_snapshot['snapshot'] = cache.get(SNAPSHOT_CACHE_KEY) or {}
+        _local_snapshot['loaded_at'] = now
+        _local_snapshot['starved'] = set(_local_snapshot['snapshot'].get('starved_cells', ()))
+    return _local_snapshot.get('starved', set())
+
+
+def is_starved(lat, lon):
+    """True if the point falls in a cell the latest snapshot marks as starved."""
+    return grid_cell(lat, lon) in _starved_cells()
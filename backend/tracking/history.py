@@ -0,0 +1,268 @@
+"""
+Driver location history.
+
+DriverLocation only keeps each driver's latest position. Every accepted ping
+is also appended to an append-only trail: one LocationHistoryChunk row per
+driver per hour, holding the points as delta-encoded (latitude, longitude,
+seconds) triplets in the polyline character format. A moving truck costs a
+few bytes per point and a parked one almost nothing (the ingestion deadband
+drops its jitter), so months of pings stay a small table.
+
+Points reach the trail through the ingestion flush, in bulk. Appends skip
+points at or before a chunk's last stored point, so a trail flushed twice is
+only stored once. Readers decode the chunks covering a time window; trip
+replays are simplified with Douglas-Peucker and returned as a standard
+encoded polyline for map display.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from .geo import KM_PER_DEGREE_LAT, haversine_km
+
+logger = logging.getLogger(__name__)
+
+COORDINATE_PRECISION = 1e5
+CHUNK_SECONDS = 60 * 60
+
+# Default Douglas-Peucker tolerance for replays (GPS accuracy is ~10m)
+DEFAULT_TOLERANCE_METERS = 15
+
+
+def _encode_value(value, out):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def _decode_values(encoded):
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return values
+
+
+def encode_polyline(coordinates):
+    """Encode (lat, lon) pairs in the Google encoded polyline format."""
+    out = []
+    prev_lat = prev_lon = 0
+    for lat, lon in coordinates:
+        lat_e5, lon_e5 = int(round(lat * COORDINATE_PRECISION)), int(round(lon * COORDINATE_PRECISION))
+        _encode_value(lat_e5 - prev_lat, out)
+        _encode_value(lon_e5 - prev_lon, out)
+        prev_lat, prev_lon = lat_e5, lon_e5
+    return ''.join(out)
+
+
+def decode_polyline(encoded):
+    """Decode a Google encoded polyline into (lat, lon) pairs."""
+    values = _decode_values(encoded)
+    lats = np.cumsum(values[0::2]) / COORDINATE_PRECISION
+    lons = np.cumsum(values[1::2]) / COORDINATE_PRECISION
+    return list(zip(lats.tolist(), lons.tolist()))
+
+
+def _hour_start(ts):
+    return int(ts // CHUNK_SECONDS * CHUNK_SECONDS)
+
+
+def append_points(trails):
+    """
+    Append GPS points to the drivers' hourly history chunks in bulk.
+
+    Args:
+        trails: {driver_id: [(ts, lat, lon), ...]} in time order
+
+    Returns:
+        int: Number of points stored
+    """
+    from .models import LocationHistoryChunk
+
+    groups = {}
+    for driver_id, points in trails.items():
+        for ts, lat, lon in points:
+            groups.setdefault((driver_id, _hour_start(ts)), []).append((ts, lat, lon))
+    if not groups:
+        return 0
+
+    hours = {datetime.fromtimestamp(hour, tz=dt_timezone.utc) for _, hour in groups}
+    existing = {
+        (chunk.driver_id, int(chunk.hour_start.timestamp())): chunk
+        for chunk in LocationHistoryChunk.objects.filter(
+            driver_id__in={driver_id for driver_id, _ in groups}, hour_start__in=hours
+        )
+    }
+
+    now = timezone.now()
+    to_update, to_create = [], []
+    stored = 0
+    for (driver_id, hour), points in groups.items():
+        chunk = existing.get((driver_id, hour))
+        if chunk is None:
+            chunk = LocationHistoryChunk(
+                driver_id=driver_id, hour_start=datetime.fromtimestamp(hour, tz=dt_timezone.utc)
+            )
+            to_create.append(chunk)
+        else:
+            to_update.append(chunk)
+
+        out = []
+        for ts, lat, lon in points:
+            offset = int(ts) - hour
+            if chunk.point_count and offset <= chunk.last_offset_seconds:
+                continue  # Already stored, or two pings within the same second
+            lat_e5, lon_e5 = int(round(lat * COORDINATE_PRECISION)), int(round(lon * COORDINATE_PRECISION))
+            _encode_value(lat_e5 - chunk.last_lat_e5, out)
+            _encode_value(lon_e5 - chunk.last_lon_e5, out)
+            _encode_value(offset - chunk.last_offset_seconds, out)
+            chunk.last_lat_e5, chunk.last_lon_e5, chunk.last_offset_seconds = lat_e5, lon_e5, offset
+            chunk.point_count += 1
+            stored += 1
+        chunk.encoded_points += ''.join(out)
+        chunk.updated_at = now
+
+    LocationHistoryChunk.objects.bulk_update(
+        to_update,
+        ['encoded_points', 'point_count', 'last_lat_e5', 'last_lon_e5', 'last_offset_seconds', 'updated_at'],
+        batch_size=500
+    )
+    LocationHistoryChunk.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    return stored
+
+
+def decode_chunk(chunk):
+    """Decode a chunk into [(ts, lat, lon), ...]."""
+    values = _decode_values(chunk.encoded_points)
+    lats = np.cumsum(values[0::3]) / COORDINATE_PRECISION
+    lons = np.cumsum(values[1::3]) / COORDINATE_PRECISION
+    timestamps = np.cumsum(values[2::3]) + int(chunk.hour_start.timestamp())
+    return list(zip(timestamps.tolist(), lats.tolist(), lons.tolist()))
+
+
+def points_between(driver_id, start, end):
+    """
+    Return a driver's recorded points between two datetimes.
+
+    Returns:
+        list: [(ts, lat, lon), ...] in time order
+    """
+    from .models import LocationHistoryChunk
+
+    chunks = LocationHistoryChunk.objects.filter(
+        driver_id=driver_id,
+        hour_start__gt=start - timedelta(seconds=CHUNK_SECONDS),
+        hour_start__lte=end
+    ).order_by('hour_start')
+
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    return [
+        point
+        for chunk in chunks
+        for point in decode_chunk(chunk)
+        if start_ts <= point[0] <= end_ts
+    ]
+
+
+def douglas_peucker(points, tolerance_m=DEFAULT_TOLERANCE_METERS):
+    """
+    Simplify a trail, keeping the points that deviate more than `tolerance_m`
+    from the simplified line.
+
+    Args:
+        points: [(ts, lat, lon), ...]
+        tolerance_m: Maximum allowed deviation in meters
+
+    Returns:
+        list: The kept points, in order
+    """
+    if len(points) < 3:
+        return list(points)
+
+    # Project onto a local plane (meters); fine at trip scale
+    lats = np.array([p[1] for p in points])
+    lons = np.array([p[2] for p in points])
+    y = lats * KM_PER_DEGREE_LAT * 1000
+    x = lons * KM_PER_DEGREE_LAT * 1000 * np.cos(np.radians(lats.mean()))
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance_m:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def trail_distance_km(points):
+    return sum(
+        haversine_km(a[1], a[2], b[1], b[2])
+        for a, b in zip(points, points[1:])
+    )
+
+
+def trip_replay(booking, tolerance_m=DEFAULT_TOLERANCE_METERS):
+    """
+    Build the replay of a booking's trip: the assigned driver's trail from
+    acceptance until completion (or now, for a trip still in progress).
+
+    Returns:
+        dict: Encoded polyline of the simplified trail plus per-point
+            time offsets (seconds from the window start) and totals
+    """
+    start = booking.accepted_at or booking.created_at
+    end = booking.completed_at or timezone.now()
+    points = points_between(booking.driver_id, start, end) if booking.driver_id else []
+    simplified = douglas_peucker(points, tolerance_m)
+
+    return {
+        'booking_id': booking.id,
+        'driver_id': booking.driver_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'tolerance_m': tolerance_m,
+        'point_count': len(points),
+        'simplified_point_count': len(simplified),
+        'distance_km': round(trail_distance_km(points), 3),
+        'polyline': encode_polyline((lat, lon) for _, lat, lon in simplified),
+        'offsets_seconds': [int(ts - start.timestamp()) for ts, _, _ in simplified],
+    }
+
+
+def prune(retention_days):
+    """
+    Delete history chunks older than `retention_days`.
+
+    Returns:
+        int: Number of chunks deleted
+    """
+    from .models import LocationHistoryChunk
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = LocationHistoryChunk.objects.filter(hour_start__lt=cutoff).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} location history chunks older than {retention_days} days")
+    return deleted
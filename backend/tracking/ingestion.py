@@ -0,0 +1,348 @@
+"""
+Write-behind GPS ingestion.
+
+Driver pings are not written to DriverLocation one by one. The latest
+accepted position per driver is buffered in the cache and flushed to the
+database in bulk on an interval. Points inside a movement deadband (the
+truck hasn't really moved) are dropped unless the driver has been silent
+for a while, so a parked truck costs almost nothing.
+
+Readers that need the freshest position overlay the buffered values on the
+DriverLocation rows they loaded (see apply_buffered). The flush stamps
+DriverLocation.updated_at with the time of the write, so it only ever moves
+forward and can serve as a change cursor (see the admin live map feed).
+
+Each driver's buffer entry is read, extended and written back under a
+per-driver cache.add lock, so concurrent pings (a batch and a single ping)
+don't drop each other's points. Buffering needs a cache every process shares
+(CACHE_IS_SHARED): the flush runs in whichever process its task lands in.
+Without one, pings are written through to DriverLocation instead, with the
+driver's row locked while it is read and updated.
+
+Accepted positions are pushed to live map subscribers as they arrive (see
+tracking.streaming) and, during a job, extend its odometer (tracking.odometer)
+and are checked against its geofence (tracking.geofence). Each entry also
+carries the trail of accepted points since the last flush, which the flush
+appends to the location history (see tracking.history). Every ping, accepted
+or not, renews the driver's presence (tracking.presence).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import geofence, odometer, presence, streaming
+from .geo import grid_cell, haversine_km
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'tracking:location:'
+LOCK_PREFIX = 'tracking:location_lock:'
+BUFFER_TIMEOUT_SECONDS = 60 * 60
+# A lock outlives a crashed holder by this long at most
+LOCK_TIMEOUT_SECONDS = 5
+LOCK_WAIT_SECONDS = 2
+
+# Movement below this is GPS jitter, not travel
+DEADBAND_METERS = 20
+# ...but still accept a point this often so updated_at/speed stay fresh
+HEARTBEAT_SECONDS = 60
+
+FLUSH_INTERVAL_SECONDS = 10
+FLUSH_GUARD_KEY = 'tracking:location_flush_scheduled'
+
+MAX_BATCH_POINTS = 500
+# Cap on unflushed trail points per driver, in case flushes stall
+MAX_TRAIL_POINTS = 2000
+
+FIELDS = ('latitude', 'longitude', 'heading', 'speed', 'accuracy')
+
+
+def _key(driver_id):
+    return f"{KEY_PREFIX}{driver_id}"
+
+
+def is_buffering():
+    """Pings are buffered only in a cache shared by every process."""
+    return settings.CACHE_IS_SHARED
+
+
+@contextmanager
+def _driver_lock(driver_id):
+    """Serialize read-modify-write of one driver's buffer entry across processes."""
+    key = f"{LOCK_PREFIX}{driver_id}"
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while not cache.add(key, True, LOCK_TIMEOUT_SECONDS):
+        if time.monotonic() > deadline:
+            logger.warning(f"Location buffer lock for driver {driver_id} is held too long; proceeding")
+            break
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _timestamp(point, default):
+    value = point.get('timestamp')
+    if value is None:
+        return default
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, dt_timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def get_buffered(driver_id):
+    """Return the buffered position for a driver, or None."""
+    if not is_buffering():
+        return None
+    return cache.get(_key(driver_id))
+
+
+def get_buffered_many(driver_ids):
+    if not is_buffering():
+        return {}
+    keys = {_key(driver_id): driver_id for driver_id in driver_ids}
+    return {keys[key]: entry for key, entry in cache.get_many(list(keys)).items()}
+
+
+def ingest(driver_id, points):
+    """
+    Buffer a batch of GPS points for a driver (or write them through when
+    the cache is not shared).
+
+    Args:
+        driver_id: Driver user ID
+        points: Iterable of dicts with latitude, longitude and optional
+            heading, speed, accuracy and timestamp (datetime or epoch seconds)
+
+    Returns:
+        tuple: (accepted point count, previous grid cell or None, buffered entry)
+    """
+    now = time.time()
+    # Any ping shows the app is alive, even one the deadband drops
+    presence.heartbeat(driver_id)
+
+    if is_buffering():
+        with _driver_lock(driver_id):
+            previous = cache.get(_key(driver_id))
+            accepted, last = _accept(points, previous, now)
+            if accepted:
+                cache.set(_key(driver_id), last, BUFFER_TIMEOUT_SECONDS)
+        if accepted:
+            schedule_flush()
+    else:
+        from .models import DriverLocation
+
+        with transaction.atomic():
+            location = DriverLocation.objects.select_for_update().filter(driver_id=driver_id).first()
+            previous = _stored_entry(location)
+            accepted, last = _accept(points, previous, now)
+            if accepted:
+                _write({driver_id: last}, {driver_id: location} if location else {})
+
+    previous_cell = previous['cell'] if previous else None
+    if accepted:
+        booking_id = active_booking_id(driver_id)
+        if booking_id is not None:
+            odometer.accumulate(booking_id, accepted)
+            geofence.evaluate(booking_id, driver_id, last, previous)
+        streaming.publish_position(driver_id, last, previous, booking_id)
+
+    return len(accepted), previous_cell, last
+
+
+def _accept(points, previous, now):
+    """
+    Drop out-of-order, duplicate and deadband points.
+
+    Returns:
+        tuple: (accepted entries, new latest entry carrying the unflushed trail)
+    """
+    last = previous
+    trail = list(previous.get('trail', ())) if previous and not previous['flushed'] else []
+
+    accepted = []
+    for point in sorted(points, key=lambda p: _timestamp(p, now)):
+        ts = _timestamp(point, now)
+        if last is not None:
+            if ts <= last['ts']:
+                continue  # Out of order or duplicate
+            moved_m = haversine_km(last['latitude'], last['longitude'], point['latitude'], point['longitude']) * 1000
+            if moved_m < DEADBAND_METERS and ts - last['ts'] < HEARTBEAT_SECONDS:
+                continue
+
+        last = {field: point.get(field) for field in FIELDS}
+        last['ts'] = ts
+        last['cell'] = grid_cell(point['latitude'], point['longitude'])
+        last['flushed'] = False
+        trail.append((ts, point['latitude'], point['longitude']))
+        accepted.append(last)
+
+    if accepted:
+        last['trail'] = trail[-MAX_TRAIL_POINTS:]
+    return accepted, last
+
+
+def _stored_entry(location):
+    """A DriverLocation row as a (flushed) buffer entry, for write-through."""
+    if location is None:
+        return None
+    entry = {field: getattr(location, field) for field in FIELDS}
+    # Compare incoming points with the device time of the stored one, not the
+    # server time it was written at: a phone clock running behind the server
+    # would otherwise have every ping dropped as out of order
+    recorded_at = location.recorded_at or location.updated_at
+    entry.update(ts=recorded_at.timestamp(), cell=location.grid_cell, flushed=True, trail=[])
+    return entry
+
+
+def active_booking_id(driver_id):
+    """The booking a driver is working on, from the availability registry."""
+    from bookings import availability
+
+    state, booking_id = availability.get_state(driver_id)
+    return booking_id if state == availability.ON_JOB else None
+
+
+def schedule_flush():
+    """Queue a flush unless one is already due within the flush interval."""
+    if cache.add(FLUSH_GUARD_KEY, True, FLUSH_INTERVAL_SECONDS):
+        try:
+            from tracking.tasks import flush_driver_locations_task
+            flush_driver_locations_task.apply_async(countdown=FLUSH_INTERVAL_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to schedule location flush: {e}")
+
+
+def _apply(location, entry):
+    for field in FIELDS:
+        setattr(location, field, entry[field])
+    location.grid_cell = entry['cell']
+    location.recorded_at = location.updated_at = datetime.fromtimestamp(entry['ts'], tz=dt_timezone.utc)
+
+
+def _is_newer(entry, updated_at):
+    return entry is not None and (not entry['flushed'] or entry['ts'] > updated_at.timestamp())
+
+
+def apply_buffered(locations):
+    """Overlay buffered positions on DriverLocation instances (in place)."""
+    locations = list(locations)
+    buffered = get_buffered_many(location.driver_id for location in locations)
+    for location in locations:
+        entry = buffered.get(location.driver_id)
+        if _is_newer(entry, location.updated_at):
+            _apply(location, entry)
+    return locations
+
+
+def apply_buffered_values(rows):
+    """
+    Overlay buffered positions on DriverLocation values() rows (in place).
+    Rows need driver_id and updated_at plus any of the location fields.
+    """
+    buffered = get_buffered_many(row['driver_id'] for row in rows)
+    for row in rows:
+        entry = buffered.get(row['driver_id'])
+        if _is_newer(entry, row['updated_at']):
+            for field in FIELDS:
+                if field in row:
+                    row[field] = entry[field]
+            row['updated_at'] = datetime.fromtimestamp(entry['ts'], tz=dt_timezone.utc)
+    return rows
+
+
+def touch(driver_ids):
+    """Bump updated_at for drivers whose presence changed, so change feeds pick them up."""
+    from .models import DriverLocation
+
+    DriverLocation.objects.filter(driver_id__in=list(driver_ids)).update(updated_at=timezone.now())
+
+
+def flush(driver_ids=None):
+    """
+    Write buffered positions to DriverLocation and their trails to the
+    location history, in bulk.
+
+    Args:
+        driver_ids: Drivers to flush (default: every online driver)
+
+    Returns:
+        int: Number of locations written
+    """
+    from users.models import User
+
+    if not is_buffering():
+        return 0
+    if driver_ids is None:
+        driver_ids = User.objects.filter(role='driver', is_online=True).values_list('id', flat=True)
+    buffered = {
+        driver_id: entry for driver_id, entry in get_buffered_many(driver_ids).items()
+        if not entry['flushed']
+    }
+    if not buffered:
+        return 0
+
+    written = _write(buffered)
+
+    # Mark entries flushed unless a newer point arrived meanwhile; in that
+    # case only drop the part of the trail that was just stored
+    for driver_id, flushed_entry in buffered.items():
+        flushed_trail = flushed_entry.get('trail', ())
+        with _driver_lock(driver_id):
+            entry = cache.get(_key(driver_id))
+            if entry is None:
+                continue
+            if entry['ts'] == flushed_entry['ts']:
+                cache.set(_key(driver_id), {**entry, 'flushed': True, 'trail': []}, BUFFER_TIMEOUT_SECONDS)
+            elif flushed_trail:
+                remaining = [point for point in entry.get('trail', ()) if point[0] > flushed_trail[-1][0]]
+                cache.set(_key(driver_id), {**entry, 'trail': remaining}, BUFFER_TIMEOUT_SECONDS)
+
+    logger.info(f"Flushed {written} buffered driver locations")
+    return written
+
+
+def _write(entries, existing=None):
+    """
+    Write entries to DriverLocation and their trails to the location history.
+
+    Args:
+        entries: {driver_id: entry}
+        existing: {driver_id: DriverLocation} already loaded (default: load them)
+
+    Returns:
+        int: Number of locations written
+    """
+    from . import history
+    from .models import DriverLocation
+
+    if existing is None:
+        existing = DriverLocation.objects.in_bulk(list(entries), field_name='driver_id')
+    now = timezone.now()
+    to_update, to_create = [], []
+    for driver_id, entry in entries.items():
+        location = existing.get(driver_id)
+        if location is None:
+            location = DriverLocation(driver_id=driver_id)
+            to_create.append(location)
+        else:
+            to_update.append(location)
+        _apply(location, entry)
+        location.updated_at = now
+
+    DriverLocation.objects.bulk_update(to_update, FIELDS + ('grid_cell', 'recorded_at', 'updated_at'), batch_size=500)
+    DriverLocation.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    history.append_points({
+        driver_id: entry.get('trail', ()) for driver_id, entry in entries.items()
+    })
+
+    return len(to_update) + len(to_create)
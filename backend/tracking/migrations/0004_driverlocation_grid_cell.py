@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+from tracking.geo import grid_cell
+
+
+def populate_grid_cells(apps, schema_editor):
+    """Bucket existing driver locations into the spatial grid"""
+    DriverLocation = apps.get_model('tracking', 'DriverLocation')
+    locations = list(DriverLocation.objects.all())
+    for location in locations:
+        location.grid_cell = grid_cell(location.latitude, location.longitude)
+    DriverLocation.objects.bulk_update(locations, ['grid_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0003_alter_driverlocation_options_driverlocation_accuracy_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverlocation',
+            name='grid_cell',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Spatial grid bucket, kept in sync with latitude/longitude', max_length=20),
+        ),
+        migrations.RunPython(populate_grid_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:31
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_deadlines_for_live_offers(apps, schema_editor):
+    """Give offers that are currently awaiting a response a deadline"""
+    DriverOrderRequest = apps.get_model('tracking', 'DriverOrderRequest')
+    live_offers = DriverOrderRequest.objects.filter(
+        status='pending',
+        booking__current_notified_driver_id=F('driver_id')
+    )
+    for offer in live_offers:
+        offer.expires_at = offer.notified_at + timedelta(seconds=30)
+        offer.save(update_fields=['expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0004_driverlocation_grid_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverorderrequest',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Response deadline, set when the offer is sent to the driver', null=True),
+        ),
+        migrations.AddField(
+            model_name='driverorderrequest',
+            name='timeout_task_id',
+            field=models.CharField(blank=True, help_text='Celery task that expires this offer', max_length=50, null=True),
+        ),
+        migrations.RunPython(set_deadlines_for_live_offers, migrations.RunPython.noop),
+    ]
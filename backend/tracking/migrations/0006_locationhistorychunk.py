@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tracking', '0005_driverorderrequest_expires_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationHistoryChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour_start', models.DateTimeField(help_text='Start of the hour this chunk covers (UTC)')),
+                ('point_count', models.PositiveIntegerField(default=0)),
+                ('encoded_points', models.TextField(blank=True, default='')),
+                ('last_lat_e5', models.IntegerField(default=0)),
+                ('last_lon_e5', models.IntegerField(default=0)),
+                ('last_offset_seconds', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Location History Chunk',
+                'verbose_name_plural': 'Location History Chunks',
+                'ordering': ['driver', 'hour_start'],
+                'indexes': [models.Index(fields=['hour_start'], name='tracking_history_hour_idx')],
+                'unique_together': {('driver', 'hour_start')},
+            },
+        ),
+    ]
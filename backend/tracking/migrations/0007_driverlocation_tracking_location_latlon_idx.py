@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_locationhistorychunk'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='driverlocation',
+            index=models.Index(fields=['latitude', 'longitude'], name='tracking_location_latlon_idx'),
+        ),
+    ]
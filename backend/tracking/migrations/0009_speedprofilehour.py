@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0008_alter_driverlocation_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeedProfileHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField(help_text='Local hour of day (0-23)', unique=True)),
+                ('speed_kmh', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Speed Profile Hour',
+                'verbose_name_plural': 'Speed Profile Hours',
+                'ordering': ['hour'],
+            },
+        ),
+    ]
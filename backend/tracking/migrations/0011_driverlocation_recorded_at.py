@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0010_streamticket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverlocation',
+            name='recorded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,10 @@
+import secrets
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
-from math import radians, sin, cos, sqrt, atan2
+from django.utils import timezone
+from .geo import grid_cell, haversine_km
 
 User = settings.AUTH_USER_MODEL
 
@@ -11,32 +15,37 @@ class DriverLocation(models.Model):
     heading = models.FloatField(null=True, blank=True, help_text="Direction in degrees (0-360)")
     speed = models.FloatField(null=True, blank=True, help_text="Speed in km/h")
     accuracy = models.FloatField(null=True, blank=True, help_text="GPS accuracy in meters")
-    updated_at = models.DateTimeField(auto_now=True)
+    grid_cell = models.CharField(max_length=20, blank=True, default='', db_index=True,
+                                 help_text="Spatial grid bucket, kept in sync with latitude/longitude")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # When the device took this position (its own clock); updated_at is when
+    # the server stored it. Newer points are recognised by recorded_at.
+    recorded_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.driver} location"
+
+    def save(self, *args, **kwargs):
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'grid_cell' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['grid_cell']
+        super().save(*args, **kwargs)
     
     def distance_to(self, lat, lon):
         """
         Calculate distance to a point using Haversine formula.
         Returns distance in kilometers.
         """
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1, lon1 = radians(self.latitude), radians(self.longitude)
-        lat2, lon2 = radians(lat), radians(lon)
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        
-        return R * c
+        return haversine_km(self.latitude, self.longitude, lat, lon)
     
     class Meta:
         verbose_name = "Driver Location"
         verbose_name_plural = "Driver Locations"
+        indexes = [
+            # Bounding-box prefilter for nearby-driver queries
+            models.Index(fields=['latitude', 'longitude'], name='tracking_location_latlon_idx'),
+        ]
 
 
 class DriverOrderRequest(models.Model):
@@ -61,6 +70,10 @@ class DriverOrderRequest(models.Model):
     # Request tracking
     notified_at = models.DateTimeField(auto_now_add=True)
     responded_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True,
+                                      help_text="Response deadline, set when the offer is sent to the driver")
+    timeout_task_id = models.CharField(max_length=50, blank=True, null=True,
+                                       help_text="Celery task that expires this offer")
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     
     # Queue position (1 = first driver notified, 2 = second, etc.)
@@ -74,3 +87,102 @@ class DriverOrderRequest(models.Model):
     
     def __str__(self):
         return f"Booking #{self.booking.id} -> {self.driver.username} (Position {self.queue_position})"
+
+
+class LocationHistoryChunk(models.Model):
+    """
+    One hour of a driver's GPS trail, stored compactly (see tracking.history).
+    Points are delta-encoded (latitude, longitude, seconds) triplets in the
+    polyline character format, appended as buffered pings are flushed.
+    """
+    driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='location_history')
+    hour_start = models.DateTimeField(help_text="Start of the hour this chunk covers (UTC)")
+    point_count = models.PositiveIntegerField(default=0)
+    encoded_points = models.TextField(blank=True, default='')
+
+    # Last point in the chunk (1e-5 degrees / seconds into the hour), so new
+    # points can be appended without decoding the chunk
+    last_lat_e5 = models.IntegerField(default=0)
+    last_lon_e5 = models.IntegerField(default=0)
+    last_offset_seconds = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Location History Chunk"
+        verbose_name_plural = "Location History Chunks"
+        ordering = ['driver', 'hour_start']
+        unique_together = ['driver', 'hour_start']
+        indexes = [
+            models.Index(fields=['hour_start'], name='tracking_history_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.driver} trail from {self.hour_start:%Y-%m-%d %H:00} ({self.point_count} points)"
+
+
+class SpeedProfileHour(models.Model):
+    """
+    Learned average driving speed for one hour of the day (see tracking.eta).
+    The ETA engine reads the profile from the cache; these rows keep it across
+    restarts and cache evictions.
+    """
+    hour = models.PositiveSmallIntegerField(unique=True, help_text="Local hour of day (0-23)")
+    speed_kmh = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Speed Profile Hour"
+        verbose_name_plural = "Speed Profile Hours"
+        ordering = ['hour']
+
+    def __str__(self):
+        return f"{self.hour:02d}:00 {self.speed_kmh:.1f} km/h"
+
+
+class StreamTicket(models.Model):
+    """
+    Short-lived, single-use credential for opening a live position stream.
+    Browsers' EventSource cannot send an Authorization header, and a JWT in
+    the URL would end up in access and proxy logs, so clients exchange their
+    JWT for a ticket (valid TTL_SECONDS, redeemed once) and pass that instead.
+    """
+    TTL_SECONDS = 30
+
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stream_tickets')
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Stream Ticket"
+        verbose_name_plural = "Stream Tickets"
+
+    def __str__(self):
+        return f"Stream ticket for {self.user} until {self.expires_at:%H:%M:%S}"
+
+    @classmethod
+    def issue(cls, user):
+        """Create a ticket for `user`, clearing out expired ones."""
+        now = timezone.now()
+        cls.objects.filter(expires_at__lte=now).delete()
+        return cls.objects.create(
+            key=secrets.token_urlsafe(32),
+            user=user,
+            expires_at=now + timedelta(seconds=cls.TTL_SECONDS)
+        )
+
+    @classmethod
+    def redeem(cls, key):
+        """
+        Consume a ticket.
+
+        Returns:
+            User or None: The ticket's user, if the ticket was valid and unused
+        """
+        ticket = cls.objects.filter(key=key, expires_at__gt=timezone.now()).select_related('user').first()
+        if ticket is None:
+            return None
+        # Whoever deletes the row redeems it; a replay finds nothing to delete
+        deleted, _ = cls.objects.filter(pk=ticket.pk).delete()
+        return ticket.user if deleted else None
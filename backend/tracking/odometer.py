@@ -0,0 +1,144 @@
+"""
+Trip odometer.
+
+While a driver is on a job, every accepted GPS point extends a running
+distance for that booking, kept in the cache next to the last counted point.
+When the job completes the total is read back and cleared, so trip distance
+never needs a scan of raw points.
+
+GPS jitter is filtered out before it adds up: fixes with poor accuracy are
+ignored, movement within the combined accuracy of two fixes is not counted
+(the anchor stays put until the truck has clearly moved), and jumps faster
+than any truck can drive are treated as bad fixes.
+
+A booking's entry is read, extended and written back under a cache.add
+lock, so pings handled by two workers at once don't drop each other's
+distance. The running total needs a cache every process shares
+(CACHE_IS_SHARED); with a per-process cache each worker would only hold the
+part of the trip it happened to see. Without one nothing is accumulated and
+the distance is measured at completion from the driver's location history
+instead (written through on every ping in that mode), with the same filter.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .geo import haversine_km
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'tracking:odometer:'
+LOCK_PREFIX = 'tracking:odometer:lock:'
+LOCK_TIMEOUT_SECONDS = 5
+LOCK_WAIT_SECONDS = 2
+ODOMETER_TIMEOUT_SECONDS = 60 * 60 * 24
+
+# Fixes less accurate than this are not used for distance
+MAX_ACCURACY_METERS = 50
+# Assumed accuracy for devices that don't report one
+DEFAULT_ACCURACY_METERS = 10
+MAX_PLAUSIBLE_SPEED_KMH = 130
+
+
+def _key(booking_id):
+    return f"{KEY_PREFIX}{booking_id}"
+
+
+@contextmanager
+def _booking_lock(booking_id):
+    """Serialize read-modify-write of one booking's odometer across processes."""
+    lock_key = f"{LOCK_PREFIX}{booking_id}"
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while not cache.add(lock_key, True, LOCK_TIMEOUT_SECONDS):
+        if time.monotonic() > deadline:
+            logger.warning(f"Odometer lock for booking {booking_id} is held too long; proceeding")
+            break
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def _advance(state, points):
+    """Extend an odometer state ({'km', 'anchor'}) with new points, in place."""
+    anchor = state['anchor']
+
+    for point in points:
+        accuracy = point.get('accuracy')
+        accuracy = DEFAULT_ACCURACY_METERS if accuracy is None else accuracy
+        if accuracy > MAX_ACCURACY_METERS:
+            continue
+
+        fix = (point['latitude'], point['longitude'], accuracy, point['ts'])
+        if anchor is None:
+            anchor = fix
+            continue
+
+        moved_km = haversine_km(anchor[0], anchor[1], fix[0], fix[1])
+        if moved_km * 1000 <= max(anchor[2], fix[2]):
+            continue  # Within GPS uncertainty
+        elapsed_hours = max(fix[3] - anchor[3], 1) / 3600
+        if moved_km / elapsed_hours > MAX_PLAUSIBLE_SPEED_KMH:
+            continue  # Teleport, keep the anchor
+
+        state['km'] += moved_km
+        anchor = fix
+
+    state['anchor'] = anchor
+    return state
+
+
+def accumulate(booking_id, points):
+    """
+    Add the distance covered by new points to a booking's odometer.
+
+    Args:
+        booking_id: The booking the driver is on
+        points: Accepted points in time order, dicts with latitude, longitude,
+            accuracy and ts (epoch seconds)
+
+    Returns:
+        float: The booking's distance so far in km, or None when the cache
+            isn't shared (the distance is measured from history instead)
+    """
+    if not settings.CACHE_IS_SHARED:
+        return None
+
+    key = _key(booking_id)
+    with _booking_lock(booking_id):
+        state = _advance(cache.get(key) or {'km': 0.0, 'anchor': None}, points)
+        cache.set(key, state, ODOMETER_TIMEOUT_SECONDS)
+    return state['km']
+
+
+def _distance_from_history(booking):
+    from .history import points_between
+
+    if not booking.driver_id:
+        return None
+    start = booking.accepted_at or booking.created_at
+    points = points_between(booking.driver_id, start, booking.completed_at or timezone.now())
+    if not points:
+        return None
+    # History doesn't keep accuracy; its points were already through the ingestion filter
+    state = _advance({'km': 0.0, 'anchor': None}, [
+        {'latitude': lat, 'longitude': lon, 'ts': ts} for ts, lat, lon in points
+    ])
+    return state['km']
+
+
+def distance_km(booking):
+    """Distance recorded for a booking so far (km), or None if nothing was recorded."""
+    if not settings.CACHE_IS_SHARED:
+        return _distance_from_history(booking)
+    state = cache.get(_key(booking.id))
+    return state['km'] if state else None
+
+
+def clear(booking_id):
+    cache.delete(_key(booking_id))
@@ -0,0 +1,154 @@
+"""
+Driver presence.
+
+User.is_online records what the driver chose; presence records whether their
+app is still there. Going online creates a presence key in the cache that
+expires after DRIVER_PRESENCE_TTL_SECONDS. Heartbeats from the app, and every
+location ping, push the expiry back. A driver whose app crashed or lost
+signal simply stops renewing it:
+
+    - matching reads presence from the cache and stops offering them jobs
+      as soon as the key expires
+    - a periodic sweep sets is_online=False for every driver whose key has
+      expired, in one bulk update, and ends their shift (users.shifts)
+
+Heartbeats only renew a key that exists, so they never bring a driver who
+went (or was put) offline back online; the app has to toggle online again.
+
+Like the availability registry, presence keys need a cache shared by the
+web and worker processes (Redis, see CACHES in settings). When the cache has
+lost its keys, presence is reseeded from is_online and drivers get one TTL to
+check in before the sweep takes them offline.
+
+Without a shared cache (CACHE_IS_SHARED off, e.g. per-process LocMem), a key
+set by one worker is invisible to the others, which would see live drivers
+as absent and sweep them offline. Presence then lives in the database
+instead: heartbeats stamp User.last_seen_at, and a driver is present while
+they are online and were seen within the TTL. Drivers online from before
+last_seen_at was stamped count as seen when the sweep first finds them.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'presence:driver:'
+SYNC_MARKER_KEY = 'presence:synced'
+
+
+def _key(driver_id):
+    return f"{KEY_PREFIX}{driver_id}"
+
+
+def _cutoff():
+    return timezone.now() - timedelta(seconds=settings.DRIVER_PRESENCE_TTL_SECONDS)
+
+
+def _seen_recently():
+    """Filter matching online drivers seen within the TTL (database presence)."""
+    return Q(is_online=True) & (Q(last_seen_at__isnull=True) | Q(last_seen_at__gte=_cutoff()))
+
+
+def _ensure_seeded():
+    if not cache.get(SYNC_MARKER_KEY):
+        seed()
+
+
+def seed():
+    """Give every driver marked online a fresh presence key."""
+    from users.models import User
+
+    driver_ids = list(User.objects.filter(role='driver', is_online=True).values_list('id', flat=True))
+    cache.set_many({_key(driver_id): True for driver_id in driver_ids}, settings.DRIVER_PRESENCE_TTL_SECONDS)
+    cache.set(SYNC_MARKER_KEY, True, None)
+    logger.info(f"Seeded driver presence for {len(driver_ids)} online drivers")
+
+
+def go_online(driver_id):
+    if not settings.CACHE_IS_SHARED:
+        from users.models import User
+
+        User.objects.filter(id=driver_id).update(last_seen_at=timezone.now())
+        return
+    cache.set(_key(driver_id), True, settings.DRIVER_PRESENCE_TTL_SECONDS)
+
+
+def go_offline(driver_ids):
+    cache.delete_many([_key(driver_id) for driver_id in driver_ids])
+
+
+def heartbeat(driver_id):
+    """
+    Renew a driver's presence.
+
+    Returns:
+        bool: False if the driver has no presence (offline or expired)
+    """
+    if not settings.CACHE_IS_SHARED:
+        from users.models import User
+
+        return bool(User.objects.filter(_seen_recently(), id=driver_id).update(last_seen_at=timezone.now()))
+    _ensure_seeded()
+    return cache.touch(_key(driver_id), settings.DRIVER_PRESENCE_TTL_SECONDS)
+
+
+def is_present(driver_id):
+    return driver_id in present_ids([driver_id])
+
+
+def present_ids(driver_ids):
+    """Return the subset of `driver_ids` with live presence, in one lookup."""
+    driver_ids = list(driver_ids)
+    if not driver_ids:
+        return set()
+    if not settings.CACHE_IS_SHARED:
+        from users.models import User
+
+        return set(User.objects.filter(_seen_recently(), id__in=driver_ids).values_list('id', flat=True))
+    keys = {_key(driver_id): driver_id for driver_id in driver_ids}
+    _ensure_seeded()
+    return {keys[key] for key in cache.get_many(keys.keys())}
+
+
+def expire_stale():
+    """
+    Take every online driver whose presence has expired offline.
+
+    Returns:
+        list: IDs of the drivers taken offline
+    """
+    from users.models import User
+    from users.shifts import end_shifts
+    from . import ingestion
+
+    online = User.objects.filter(role='driver', is_online=True)
+    if settings.CACHE_IS_SHARED:
+        online_ids = list(online.values_list('id', flat=True))
+        stale_ids = sorted(set(online_ids) - present_ids(online_ids))
+    else:
+        # Drivers never stamped get one TTL from now to check in
+        online.filter(last_seen_at__isnull=True).update(last_seen_at=timezone.now())
+        stale_ids = sorted(online.filter(last_seen_at__lt=_cutoff()).values_list('id', flat=True))
+    if not stale_ids:
+        return []
+
+    # Persist their last buffered positions before they drop out of flushes
+    ingestion.flush(stale_ids)
+    User.objects.filter(id__in=stale_ids, is_online=True).update(is_online=False)
+    # A heartbeat that raced the sweep must not leave them half online
+    go_offline(stale_ids)
+    # Their last heartbeat was at least one TTL ago
+    end_shifts(
+        stale_ids, 'presence_expired',
+        at=timezone.now() - timedelta(seconds=settings.DRIVER_PRESENCE_TTL_SECONDS)
+    )
+    # Let the admin live map's delta feed see them leave
+    ingestion.touch(stale_ids)
+
+    logger.info(f"Took {len(stale_ids)} drivers offline after missed heartbeats: {stale_ids}")
+    return stale_ids
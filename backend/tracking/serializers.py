@@ -14,6 +14,16 @@ class DriverLocationSerializer(serializers.ModelSerializer):
         return obj.driver.get_full_name() or obj.driver.username
 
 
+class LocationPointSerializer(serializers.Serializer):
+    """A single GPS point in a batch upload"""
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    heading = serializers.FloatField(required=False, allow_null=True)
+    speed = serializers.FloatField(required=False, allow_null=True)
+    accuracy = serializers.FloatField(required=False, allow_null=True)
+    timestamp = serializers.DateTimeField(required=False)
+
+
 class DriverOrderRequestSerializer(serializers.ModelSerializer):
     driver_name = serializers.SerializerMethodField()
     booking_id = serializers.IntegerField(source='booking.id', read_only=True)
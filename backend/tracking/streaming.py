@@ -0,0 +1,303 @@
+"""
+Live driver position streaming (Server-Sent Events).
+
+Every accepted GPS point is published once, straight from the ingestion path,
+tagged with the channels it belongs to:
+
+    booking:<id>        the booking the driver is on (its customer's map)
+    tile:<row>:<col>    the viewport tiles the driver is in or just left
+    fleet               every position (zoomed-out admin maps)
+
+Each process runs one Hub that fans messages out to its local subscribers,
+so subscribers never hold a broker connection of their own. With Redis
+configured (STREAM_BROKER_URL) messages cross processes over a single Redis
+pub/sub channel read by one listener thread per process; otherwise they are
+delivered in-process only, which is enough for development and tests.
+
+Streams are async iterators when served over ASGI, so hundreds of them share
+one worker's event loop; under WSGI each stream holds a worker thread. Every
+stream ends after STREAM_MAX_SECONDS and the browser's EventSource reconnects.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .geo import grid_indices
+
+logger = logging.getLogger(__name__)
+
+# Viewport tile size in degrees (~11km at the equator)
+TILE_DEGREES = 0.1
+# Larger viewports subscribe to the whole fleet instead
+MAX_TILES_PER_STREAM = 400
+
+FLEET_CHANNEL = 'fleet'
+REDIS_CHANNEL = 'tracking:stream'
+
+KEEPALIVE_SECONDS = 15
+RECONNECT_MILLISECONDS = 3000
+# Slow consumers drop their oldest positions instead of buffering forever
+MAX_QUEUED_MESSAGES = 256
+
+
+def booking_channel(booking_id):
+    return f"booking:{booking_id}"
+
+
+def tile_channel(row, col):
+    return f"tile:{row}:{col}"
+
+
+def position_tile(lat, lon):
+    return tile_channel(*grid_indices(lat, lon, TILE_DEGREES))
+
+
+def viewport_channels(min_lat, min_lon, max_lat, max_lon):
+    """Channels covering a viewport: its tiles, or the fleet channel if too large."""
+    min_row, min_col = grid_indices(min_lat, min_lon, TILE_DEGREES)
+    max_row, max_col = grid_indices(max_lat, max_lon, TILE_DEGREES)
+    if (max_row - min_row + 1) * (max_col - min_col + 1) > MAX_TILES_PER_STREAM:
+        return [FLEET_CHANNEL]
+    return [
+        tile_channel(row, col)
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+
+class SyncSubscription:
+    """Message queue for a stream consumed by a WSGI worker thread."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=MAX_QUEUED_MESSAGES)
+
+    def deliver(self, message):
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Message queue for a stream consumed on an asyncio event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=MAX_QUEUED_MESSAGES)
+
+    def _put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        # Publishers run on other threads (sync views, the Redis listener)
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    """Per-process registry of subscriptions by channel."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels, subscription):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+
+    def unsubscribe(self, channels, subscription):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscribers.values()))
+
+    def dispatch(self, message):
+        with self._lock:
+            targets = set()
+            for channel in message['channels']:
+                targets.update(self._subscribers.get(channel, ()))
+        for subscription in targets:
+            subscription.deliver(message)
+
+
+class InMemoryBroker:
+    """Delivers messages to subscribers in this process only."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, message):
+        self.hub.dispatch(message)
+
+    def start(self):
+        pass
+
+
+class RedisBroker:
+    """Relays messages between processes over one Redis pub/sub channel."""
+
+    def __init__(self, hub, url):
+        import redis
+
+        self.hub = hub
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        self.client.publish(REDIS_CHANNEL, json.dumps(message, separators=(',', ':')))
+
+    def start(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='tracking-stream', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                for item in pubsub.listen():
+                    if item['type'] == 'message':
+                        self.hub.dispatch(json.loads(item['data']))
+            except Exception as e:
+                logger.error(f"Position stream listener lost Redis, reconnecting: {e}")
+                time.sleep(1)
+
+
+hub = Hub()
+_broker = {'instance': None}
+
+
+def get_broker():
+    if _broker['instance'] is None:
+        url = settings.STREAM_BROKER_URL
+        if url.startswith(('redis://', 'rediss://')):
+            _broker['instance'] = RedisBroker(hub, url)
+        else:
+            _broker['instance'] = InMemoryBroker(hub)
+    return _broker['instance']
+
+
+def is_shared():
+    """True when messages reach subscribers in other processes (Redis)."""
+    return isinstance(get_broker(), RedisBroker)
+
+
+def publish(channels, event, data):
+    try:
+        get_broker().publish({'channels': list(channels), 'event': event, 'data': data})
+    except Exception as e:
+        logger.error(f"Failed to publish {event} to position streams: {e}")
+
+
+def position_payload(driver_id, entry, booking_id=None):
+    return {
+        'driver_id': driver_id,
+        'booking_id': booking_id,
+        'latitude': entry['latitude'],
+        'longitude': entry['longitude'],
+        'heading': entry.get('heading'),
+        'speed': entry.get('speed'),
+        'ts': entry['ts'],
+    }
+
+
+def publish_position(driver_id, entry, previous=None, booking_id=None):
+    """
+    Publish a driver's new position to the booking they are on (if any), the
+    tile they are in and the tile they just left.
+    """
+    channels = [FLEET_CHANNEL, position_tile(entry['latitude'], entry['longitude'])]
+    if previous is not None:
+        previous_tile = position_tile(previous['latitude'], previous['longitude'])
+        if previous_tile != channels[1]:
+            channels.append(previous_tile)
+    if booking_id is not None:
+        channels.append(booking_channel(booking_id))
+
+    publish(channels, 'position', position_payload(driver_id, entry, booking_id))
+
+
+def _format(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+def _sync_stream(channels, initial):
+    subscription = SyncSubscription()
+    hub.subscribe(channels, subscription)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        for event, data in initial:
+            yield _format(event, data)
+
+        deadline = time.monotonic() + settings.STREAM_MAX_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = subscription.get(min(KEEPALIVE_SECONDS, remaining))
+            yield ': keepalive\n\n' if message is None else _format(message['event'], message['data'])
+    finally:
+        hub.unsubscribe(channels, subscription)
+
+
+async def _async_stream(channels, initial):
+    subscription = AsyncSubscription(asyncio.get_running_loop())
+    hub.subscribe(channels, subscription)
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        for event, data in initial:
+            yield _format(event, data)
+
+        deadline = time.monotonic() + settings.STREAM_MAX_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await subscription.get(min(KEEPALIVE_SECONDS, remaining))
+            yield ': keepalive\n\n' if message is None else _format(message['event'], message['data'])
+    finally:
+        hub.unsubscribe(channels, subscription)
+
+
+def event_stream(channels, initial=(), asynchronous=False):
+    """
+    Return an SSE body iterator for the given channels.
+
+    Args:
+        channels: Channels to subscribe to
+        initial: (event, data) pairs sent before any live message
+        asynchronous: Return an async iterator (ASGI) instead of a generator
+    """
+    get_broker().start()
+    if asynchronous:
+        return _async_stream(list(channels), list(initial))
+    return _sync_stream(list(channels), list(initial))
@@ -0,0 +1,67 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def update_speed_profile_task():
+    """Learn the hour-of-day speed profile used for ETAs from recent driver speeds"""
+    from tracking.eta import update_speed_profile
+
+    try:
+        observed = update_speed_profile()
+        return {"observed_kmh": observed, "status": "success"}
+    except Exception as e:
+        logger.error(f"Speed profile update failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
+
+
+@shared_task
+def flush_driver_locations_task():
+    """Write buffered GPS positions to DriverLocation in bulk"""
+    from tracking import ingestion
+
+    try:
+        return {"flushed": ingestion.flush(), "status": "success"}
+    except Exception as e:
+        logger.error(f"Driver location flush failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
+
+
+@shared_task
+def refresh_heatmap_task():
+    """Rebuild the supply/demand heatmap snapshot used by dispatch and the admin map"""
+    from tracking.heatmap import build_snapshot
+
+    try:
+        snapshot = build_snapshot()
+        return {"cells": len(snapshot['cells']), "starved": len(snapshot['starved_cells']), "status": "success"}
+    except Exception as e:
+        logger.error(f"Heatmap refresh failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
+
+
+@shared_task
+def prune_location_history_task():
+    """Delete location history older than the retention period"""
+    from django.conf import settings
+    from tracking.history import prune
+
+    try:
+        return {"deleted": prune(settings.LOCATION_HISTORY_RETENTION_DAYS), "status": "success"}
+    except Exception as e:
+        logger.error(f"Location history pruning failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
+
+
+@shared_task
+def expire_driver_presence_task():
+    """Take drivers offline whose app stopped sending heartbeats"""
+    from tracking.presence import expire_stale
+
+    try:
+        return {"expired": len(expire_stale()), "status": "success"}
+    except Exception as e:
+        logger.error(f"Driver presence sweep failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Booking
+from tracking import geofence, ingestion, odometer
+from tracking.geo import haversine_km
+from tracking.models import DriverLocation
+from users.models import User
+
+
+@override_settings(CACHE_IS_SHARED=False)
+class WriteThroughIngestionTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create(username='ingest_driver', role='driver', password='!',
+                                          phone_number='0711000001', is_online=True)
+
+    def test_client_clock_behind_the_server(self):
+        # The phone's clock runs 30 seconds behind the server's
+        skew = 30
+        start = time.time() - skew
+        ingestion.ingest(self.driver.id, [{'latitude': -1.2900, 'longitude': 36.8200, 'timestamp': start}])
+
+        accepted, _, _ = ingestion.ingest(
+            self.driver.id, [{'latitude': -1.2910, 'longitude': 36.8210, 'timestamp': start + 5}]
+        )
+
+        self.assertEqual(accepted, 1)
+        location = DriverLocation.objects.get(driver=self.driver)
+        self.assertAlmostEqual(location.latitude, -1.2910)
+        self.assertAlmostEqual(location.recorded_at.timestamp(), start + 5, places=3)
+
+    def test_older_point_is_still_dropped(self):
+        start = time.time() - 30
+        ingestion.ingest(self.driver.id, [{'latitude': -1.2900, 'longitude': 36.8200, 'timestamp': start}])
+
+        accepted, _, _ = ingestion.ingest(
+            self.driver.id, [{'latitude': -1.2950, 'longitude': 36.8250, 'timestamp': start - 1}]
+        )
+
+        self.assertEqual(accepted, 0)
+        self.assertAlmostEqual(DriverLocation.objects.get(driver=self.driver).latitude, -1.2900)
+
+
+@override_settings(CACHE_IS_SHARED=False)
+class OdometerWithoutSharedCacheTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create(username='odometer_driver', role='driver', password='!',
+                                          phone_number='0711000002', is_online=True)
+        customer = User.objects.create(username='odometer_customer', role='customer', password='!',
+                                       phone_number='0711000003')
+        self.booking = Booking.objects.create(
+            customer=customer, driver=self.driver, location_name='Trip', latitude=-1.29, longitude=36.82,
+            status='started', estimated_price=1500, accepted_at=timezone.now() - timedelta(minutes=10)
+        )
+
+    def test_distance_is_measured_from_history(self):
+        start = time.time() - 300
+        route = [(-1.2900, 36.8200), (-1.2990, 36.8200), (-1.3080, 36.8200)]
+        for offset, (lat, lon) in enumerate(route):
+            ingestion.ingest(self.driver.id, [{'latitude': lat, 'longitude': lon, 'timestamp': start + offset * 60}])
+
+        expected = sum(haversine_km(*a, *b) for a, b in zip(route, route[1:]))
+        self.assertAlmostEqual(odometer.distance_km(self.booking), expected, places=2)
+
+    def test_nothing_is_accumulated_per_process(self):
+        self.assertIsNone(odometer.accumulate(self.booking.id, [
+            {'latitude': -1.29, 'longitude': 36.82, 'accuracy': 5, 'ts': time.time()},
+        ]))
+        self.assertIsNone(odometer.distance_km(self.booking))
+
+
+@override_settings(CACHE_IS_SHARED=False, GEOFENCE_AUTO_TRANSITIONS=True)
+class GeofenceWithoutSharedCacheTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create(username='geofence_driver', role='driver', password='!',
+                                          phone_number='0711000004', is_online=True)
+        customer = User.objects.create(username='geofence_customer', role='customer', password='!',
+                                       phone_number='0711000005')
+        self.booking = Booking.objects.create(
+            customer=customer, driver=self.driver, location_name='Pickup', latitude=-1.3100, longitude=36.8200,
+            status='accepted', estimated_price=1500, accepted_at=timezone.now() - timedelta(minutes=20)
+        )
+
+    def ping(self, lat, lon, ts):
+        # Ingestion checks the fence of the driver's active booking
+        ingestion.ingest(self.driver.id, [{'latitude': lat, 'longitude': lon, 'timestamp': ts}])
+        self.booking.refresh_from_db()
+        return self.booking.status
+
+    def test_fence_is_rebuilt_from_the_booking_row(self):
+        start = time.time() - 900
+        # The first point since acceptance is the start point
+        self.assertEqual(self.ping(-1.2900, 36.8200, start), 'accepted')
+        self.assertEqual(self.ping(-1.2905, 36.8200, start + 300), 'accepted')
+
+        self.assertEqual(self.ping(-1.2930, 36.8200, start + 400), 'started')
+        self.assertEqual(self.ping(-1.3100, 36.8201, start + 600), 'arrived')
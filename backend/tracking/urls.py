@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DriverLocationViewSet
+from .views import DriverLocationViewSet, StreamTicketView, booking_position_stream, fleet_position_stream
 
 router = DefaultRouter()
 router.register(r'locations', DriverLocationViewSet, basename='driverlocation')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('stream/ticket/', StreamTicketView.as_view(), name='stream-ticket'),
+    path('stream/bookings/<int:booking_id>/', booking_position_stream, name='booking-position-stream'),
+    path('stream/fleet/', fleet_position_stream, name='fleet-position-stream'),
 ]
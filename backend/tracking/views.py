@@ -1,34 +1,122 @@
-from rest_framework import viewsets, permissions, status
+import numpy as np
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import serializers, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import DriverLocation
-from .serializers import DriverLocationSerializer
+from rest_framework.views import APIView
+from .geo import bounding_box, haversine_km_matrix
+from .models import DriverLocation, StreamTicket
+from .serializers import DriverLocationSerializer, LocationPointSerializer
+from . import ingestion, presence, streaming
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DriverLocationViewSet(viewsets.ModelViewSet):
-    queryset = DriverLocation.objects.all()
+    queryset = DriverLocation.objects.select_related('driver')
     serializer_class = DriverLocationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        """Update or create driver location"""
-        # Use update_or_create to avoid duplicate entries
-        instance, created = DriverLocation.objects.update_or_create(
-            driver=self.request.user,
-            defaults={
-                'latitude': serializer.validated_data['latitude'],
-                'longitude': serializer.validated_data['longitude'],
-                'heading': serializer.validated_data.get('heading'),
-                'speed': serializer.validated_data.get('speed'),
-                'accuracy': serializer.validated_data.get('accuracy'),
-            }
-        )
+        """Buffer a single location ping (written to the database in bulk by the flush task)"""
+        user = self.request.user
+        accepted, previous_cell, entry = ingestion.ingest(user.id, [serializer.validated_data])
+
+        instance = DriverLocation.objects.select_related('driver').filter(driver=user).first()
+        if instance is None:
+            # First ping: the row must exist right away for matching
+            ingestion.flush([user.id])
+            instance = DriverLocation.objects.select_related('driver').get(driver=user)
+        else:
+            ingestion.apply_buffered([instance])
+            if previous_cell is None:
+                previous_cell = instance.grid_cell
         serializer.instance = instance
+
+        if accepted:
+            self.on_moved(previous_cell, entry['cell'])
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Ingest a batch of timestamped GPS points from the driver app.
+        Body: {"points": [{"latitude", "longitude", "heading", "speed", "accuracy", "timestamp"}, ...]}
+        """
+        if request.user.role != 'driver':
+            return Response({'detail': 'Only drivers can report locations.'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = LocationPointSerializer(data=request.data.get('points', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        points = serializer.validated_data
+        if len(points) > ingestion.MAX_BATCH_POINTS:
+            return Response(
+                {'detail': f'At most {ingestion.MAX_BATCH_POINTS} points per batch.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        accepted, previous_cell, entry = ingestion.ingest(request.user.id, points)
+        if accepted:
+            if previous_cell is None:
+                previous_cell = DriverLocation.objects.filter(
+                    driver=request.user
+                ).values_list('grid_cell', flat=True).first()
+                if previous_cell is None:
+                    ingestion.flush([request.user.id])
+            self.on_moved(previous_cell, entry['cell'])
+
+        return Response({'received': len(points), 'accepted': accepted})
+
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        """
+        Tell the server the driver app is still running (no body; see tracking.presence).
+        Location pings count as heartbeats too, so this is only needed while no
+        pings are being sent. `is_online` false means the driver was taken offline
+        and has to toggle online again.
+        """
+        if request.user.role != 'driver':
+            return Response({'detail': 'Only drivers can send heartbeats.'}, status=status.HTTP_403_FORBIDDEN)
+
+        from django.conf import settings
+
+        return Response({
+            'is_online': presence.heartbeat(request.user.id),
+            'ttl_seconds': settings.DRIVER_PRESENCE_TTL_SECONDS,
+        })
+
+    def on_moved(self, previous_cell, cell):
+        """Moving into a new area may bring stranded bookings into range"""
+        if cell != previous_cell and self.request.user.is_online:
+            try:
+                from bookings.tasks import redispatch_near_driver_task
+                redispatch_near_driver_task.delay(self.request.user.id)
+            except Exception as e:
+                logger.error(f"Failed to queue re-dispatch for driver {self.request.user.id}: {str(e)}")
+
+    def list(self, request, *args, **kwargs):
+        locations = ingestion.apply_buffered(self.filter_queryset(self.get_queryset()))
+        return Response(self.get_serializer(locations, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        location = ingestion.apply_buffered([self.get_object()])[0]
+        return Response(self.get_serializer(location).data)
     
     def perform_update(self, serializer):
         """Ensure driver can only update their own location"""
-        if serializer.instance.driver != self.request.user:
+        instance = serializer.instance
+        if instance.driver != self.request.user:
             raise permissions.PermissionDenied("You can only update your own location")
-        serializer.save()
+
+        # Same path as pings, so a flush of an older buffered point can't overwrite it
+        ingestion.apply_buffered([instance])
+        point = {field: serializer.validated_data.get(field, getattr(instance, field)) for field in ingestion.FIELDS}
+        accepted, previous_cell, entry = ingestion.ingest(instance.driver_id, [point])
+
+        instance.refresh_from_db()
+        serializer.instance = ingestion.apply_buffered([instance])[0]
+        if accepted:
+            self.on_moved(previous_cell or instance.grid_cell, entry['cell'])
 
     def get_queryset(self):
         """Drivers only see their own location; admins and customers can filter or see all."""
@@ -46,49 +134,207 @@ class DriverLocationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def nearby(self, request):
         """
-        Get nearby online drivers.
-        Query params: lat, lon, radius_km (optional, default 50)
+        Get nearby online drivers, nearest first.
+        Query params: lat, lon, radius_km (optional, default 50), limit (optional)
+
+        Candidates come from an indexed lat/lon bounding-box query, projected
+        straight to dicts; exact distances are computed in one vectorized pass.
         """
-        lat = request.query_params.get('lat')
-        lon = request.query_params.get('lon')
-        radius_km = float(request.query_params.get('radius_km', 50))
-        
-        if not lat or not lon:
+        try:
+            lat = float(request.query_params['lat'])
+            lon = float(request.query_params['lon'])
+            radius_km = float(request.query_params.get('radius_km', 50))
+            limit = request.query_params.get('limit')
+            limit = int(limit) if limit else None
+        except KeyError:
             return Response(
                 {'detail': 'lat and lon parameters are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        lat = float(lat)
-        lon = float(lon)
-        
-        # Get all online drivers with locations
-        from users.models import User
-        online_drivers = User.objects.filter(
-            role='driver',
-            is_online=True,
-            is_active=True,
-            location__isnull=False
-        ).select_related('location')
-        
-        # Calculate distances and filter by radius
+        except ValueError:
+            return Response(
+                {'detail': 'lat, lon, radius_km and limit must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit is not None and limit < 1:
+            return Response({'detail': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        candidates = DriverLocation.objects.filter(
+            driver__role='driver',
+            driver__is_online=True,
+            driver__is_active=True,
+            latitude__range=(min_lat, max_lat)
+        )
+        if min_lon is not None:
+            candidates = candidates.filter(longitude__range=(min_lon, max_lon))
+        rows = ingestion.apply_buffered_values(list(candidates.values(
+            'id', 'driver_id', 'latitude', 'longitude', 'heading', 'speed', 'accuracy', 'updated_at',
+            'driver__first_name', 'driver__last_name', 'driver__username'
+        )))
+        if not rows:
+            return Response({'count': 0, 'drivers': []})
+
+        distances = haversine_km_matrix(
+            [lat], [lon],
+            [row['latitude'] for row in rows], [row['longitude'] for row in rows]
+        )[0]
+        in_range = np.flatnonzero(distances <= radius_km)
+        if limit is not None and limit < len(in_range):
+            in_range = in_range[np.argpartition(distances[in_range], limit - 1)[:limit]]
+        in_range = in_range[np.argsort(distances[in_range], kind='stable')]
+
+        format_datetime = serializers.DateTimeField().to_representation
         nearby_drivers = []
-        for driver in online_drivers:
-            try:
-                distance = driver.location.distance_to(lat, lon)
-                if distance <= radius_km:
-                    location_data = DriverLocationSerializer(driver.location).data
-                    location_data['distance_km'] = round(distance, 2)
-                    location_data['driver_name'] = driver.get_full_name() or driver.username
-                    location_data['driver_id'] = driver.id
-                    nearby_drivers.append(location_data)
-            except Exception:
-                continue
-        
-        # Sort by distance
-        nearby_drivers.sort(key=lambda x: x['distance_km'])
-        
+        for index in in_range:
+            row = rows[index]
+            driver_name = f"{row['driver__first_name']} {row['driver__last_name']}".strip()
+            nearby_drivers.append({
+                'id': row['id'],
+                'driver': row['driver_id'],
+                'driver_id': row['driver_id'],
+                'driver_name': driver_name or row['driver__username'],
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'heading': row['heading'],
+                'speed': row['speed'],
+                'accuracy': row['accuracy'],
+                'updated_at': format_datetime(row['updated_at']),
+                'distance_km': round(float(distances[index]), 2),
+            })
+
         return Response({
             'count': len(nearby_drivers),
             'drivers': nearby_drivers
         })
+
+
+class StreamTicketView(APIView):
+    """
+    Exchange the caller's credentials for a single-use stream ticket.
+
+    EventSource cannot send an Authorization header, so stream URLs carry
+    ?ticket=<key> instead of the JWT itself; the ticket expires within
+    StreamTicket.TTL_SECONDS and stops working once a stream has used it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ticket = StreamTicket.issue(request.user)
+        return Response({
+            'ticket': ticket.key,
+            'expires_in': StreamTicket.TTL_SECONDS
+        }, status=status.HTTP_201_CREATED)
+
+
+def _stream_user(request):
+    """
+    Authenticate a stream request: a single-use ?ticket= from
+    StreamTicketView, a JWT Authorization header, or a Django session.
+    """
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return StreamTicket.redeem(ticket)
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token:
+        try:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+    return request.user if request.user.is_authenticated else None
+
+
+def _event_stream_response(request, channels, initial):
+    response = StreamingHttpResponse(
+        streaming.event_stream(channels, initial, asynchronous=isinstance(request, ASGIRequest)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+def _location_payload(location, booking_id=None):
+    return streaming.position_payload(location.driver_id, {
+        'latitude': location.latitude,
+        'longitude': location.longitude,
+        'heading': location.heading,
+        'speed': location.speed,
+        'ts': location.updated_at.timestamp(),
+    }, booking_id)
+
+
+def booking_position_stream(request, booking_id):
+    """
+    Server-Sent Events stream of the assigned driver's position for a booking.
+    Open to the booking's customer, its driver and admins.
+    """
+    from bookings.models import Booking
+
+    user = _stream_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    booking = Booking.objects.filter(pk=booking_id).only('id', 'customer_id', 'driver_id', 'status').first()
+    if booking is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    is_admin = user.role == 'admin' or user.is_superuser
+    if not is_admin and user.id not in (booking.customer_id, booking.driver_id):
+        return JsonResponse({'detail': 'You do not have permission to follow this booking.'}, status=status.HTTP_403_FORBIDDEN)
+
+    initial = []
+    if booking.driver_id and booking.status in ('accepted', 'started', 'arrived'):
+        location = DriverLocation.objects.filter(driver_id=booking.driver_id).first()
+        if location is not None:
+            ingestion.apply_buffered([location])
+            initial.append(('position', _location_payload(location, booking.id)))
+
+    return _event_stream_response(request, [streaming.booking_channel(booking.id)], initial)
+
+
+def fleet_position_stream(request):
+    """
+    Server-Sent Events stream of driver positions inside an admin map viewport.
+    Query params: bbox=min_lat,min_lon,max_lat,max_lon
+
+    Starts with a 'snapshot' event of the online drivers in the viewport,
+    followed by a 'position' event per accepted GPS point.
+    """
+    user = _stream_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+    if not (user.role == 'admin' or user.is_superuser):
+        return JsonResponse({'detail': 'Only admins can follow the fleet.'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(value) for value in request.GET['bbox'].split(','))
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {'detail': 'bbox=min_lat,min_lon,max_lat,max_lon is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if min_lat > max_lat or min_lon > max_lon:
+        return JsonResponse({'detail': 'bbox minimums must not exceed maximums'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = ingestion.apply_buffered_values(list(DriverLocation.objects.filter(
+        driver__role='driver',
+        driver__is_online=True,
+        driver__is_active=True,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lon, max_lon)
+    ).values('driver_id', 'latitude', 'longitude', 'heading', 'speed', 'updated_at')))
+    snapshot = [
+        streaming.position_payload(row['driver_id'], {**row, 'ts': row['updated_at'].timestamp()})
+        for row in rows
+    ]
+
+    channels = streaming.viewport_channels(min_lat, min_lon, max_lat, max_lon)
+    return _event_stream_response(request, channels, [('snapshot', {'drivers': snapshot})])
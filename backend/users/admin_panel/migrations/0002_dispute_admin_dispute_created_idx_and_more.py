@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['created_at', 'id'], name='admin_dispute_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(fields=['raised_by', 'created_at', 'id'], name='admin_dispute_raiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['created_at', 'id'], name='admin_log_created_id_idx'),
+        ),
+    ]
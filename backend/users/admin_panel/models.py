@@ -27,6 +27,9 @@ class SystemLog(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='admin_log_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_action_display()} - {self.created_at}"
@@ -51,6 +54,10 @@ class Dispute(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='admin_dispute_created_idx'),
+            models.Index(fields=['raised_by', 'created_at', 'id'], name='admin_dispute_raiser_idx'),
+        ]
     
     def __str__(self):
         return f"Dispute #{self.id} - {self.booking}"
@@ -2,15 +2,20 @@
 from django.db import transaction
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
-from datetime import timedelta
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
 from rest_framework import serializers, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from users.models import User
+from users.shifts import end_shifts
 from tracking.models import DriverLocation
-from tracking.serializers import DriverLocationSerializer
+from tracking import ingestion, presence
+from backend.conditional import etag_matches
+from backend.pagination import KeysetPagination
 from bookings.models import Booking
 from payments.models import Payment
 from .models import SystemLog, Dispute, Announcement
@@ -219,6 +224,9 @@ class AdminUserViewSet(viewsets.ModelViewSet):
                 'two_factor_secret',
                 'is_two_factor_enabled',
             ])
+            presence.go_offline([instance.id])
+            end_shifts([instance.id], 'deactivated')
+            ingestion.touch([instance.id])
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -233,6 +241,7 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         user.is_active = True
         user.save()
+        ingestion.touch([user.id])
         ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR'))
         log_system_action(
             action='user_updated',
@@ -251,6 +260,8 @@ class AdminUserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         user.is_active = False
         user.save()
+        end_shifts([user.id], 'deactivated')
+        ingestion.touch([user.id])
         ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR'))
         log_system_action(
             action='user_updated',
@@ -290,8 +301,9 @@ class AdminUserViewSet(viewsets.ModelViewSet):
 
 class AdminBookingViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    queryset = Booking.objects.all()
+    queryset = Booking.objects.order_by('-created_at')
     serializer_class = BookingSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = super().get_queryset().select_related('customer', 'driver')
@@ -310,61 +322,174 @@ class AdminBookingViewSet(viewsets.ReadOnlyModelViewSet):
             
         return queryset
 
+def _format_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def _parse_cursor(cursor):
+    return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+
+
+def _conditional_response(request, data, validator):
+    """
+    Respond with a strong ETag, or 304 if the client already has it.
+
+    Args:
+        data: The response payload
+        validator: The part of the payload the ETag is computed over
+    """
+    etag = '"%s"' % hashlib.md5(
+        json.dumps(validator, sort_keys=True, separators=(',', ':')).encode()
+    ).hexdigest()
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    return response
+
+
 class DriverLocationViewSet(viewsets.ViewSet):
-    """Admin view for all driver locations"""
+    """
+    Admin view for all driver locations.
+
+    The live map listings support a delta mode: pass the `cursor` from the
+    previous response as `?since=` to get only locations written since then,
+    plus `tombstones` (IDs of drivers who dropped off the list). Responses
+    carry a strong ETag, and an unchanged feed answers If-None-Match with 304.
+    """
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    
+
+    # Writes stamped shortly before a response may commit after it, so the
+    # cursor never runs closer to the present than this
+    CURSOR_OVERLAP = timedelta(seconds=2)
+
+    def _location_feed(self, request, visible, build):
+        """
+        Args:
+            visible: Driver field lookups a location must match to be listed,
+                e.g. {'driver__is_online': True}
+            build: Callable adding view-specific fields to a location dict
+        """
+        since = request.query_params.get('since')
+        started = timezone.now()
+
+        locations = DriverLocation.objects.filter(driver__role='driver')
+        if since:
+            try:
+                since_at = _parse_cursor(since)
+            except (TypeError, ValueError, OverflowError):
+                return Response({'detail': 'Invalid since cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+            locations = locations.filter(updated_at__gt=since_at)
+        else:
+            locations = locations.filter(**visible)
+
+        rows = ingestion.apply_buffered_values(list(locations.values(
+            'id', 'driver_id', 'latitude', 'longitude', 'heading', 'speed', 'accuracy', 'updated_at',
+            'driver__first_name', 'driver__last_name', 'driver__username', 'driver__phone_number',
+            'driver__is_online', 'driver__is_active', 'driver__is_driver_approved'
+        )))
+
+        format_datetime = serializers.DateTimeField().to_representation
+        listed, tombstones = [], []
+        for row in rows:
+            if any(row[field] != value for field, value in visible.items()):
+                tombstones.append(row['driver_id'])
+                continue
+            driver_name = f"{row['driver__first_name']} {row['driver__last_name']}".strip()
+            listed.append(build(row, {
+                'id': row['id'],
+                'driver': row['driver_id'],
+                'driver_name': driver_name or row['driver__username'],
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'heading': row['heading'],
+                'speed': row['speed'],
+                'accuracy': row['accuracy'],
+                'updated_at': format_datetime(row['updated_at']),
+                'driver_id': row['driver_id'],
+                'driver_phone': row['driver__phone_number'],
+            }))
+
+        # The cursor is the newest write returned, held back by CURSOR_OVERLAP so
+        # a late commit is still picked up; an empty delta keeps the client's
+        # cursor. The ETag covers the cursor too: a 304 makes the client keep
+        # its cached body, cursor included, so it must only match when the
+        # cursor is the same. Once an idle fleet's last writes are older than
+        # the overlap the cursor stops moving and polling it gets 304.
+        ceiling = started - self.CURSOR_OVERLAP
+        if rows:
+            cursor = _format_cursor(min(max(row['updated_at'] for row in rows), ceiling))
+        elif since:
+            cursor = since
+        else:
+            cursor = _format_cursor(ceiling)
+        tombstones = sorted(tombstones) if since else []
+        return _conditional_response(request, {
+            'count': len(listed),
+            'locations': listed,
+            'tombstones': tombstones,
+            'cursor': cursor,
+        }, {'locations': listed, 'tombstones': tombstones, 'cursor': cursor})
+
     def list(self, request):
-        """Get all active driver locations for live map"""
-        online_drivers = User.objects.filter(
-            role='driver',
-            is_online=True,
-            is_active=True,
-            location__isnull=False
-        ).select_related('location')
-        
-        locations = []
-        for driver in online_drivers:
-            location_data = DriverLocationSerializer(driver.location).data
-            location_data['driver_name'] = driver.get_full_name() or driver.username
-            location_data['driver_id'] = driver.id
-            location_data['driver_phone'] = driver.phone_number
-            location_data['vehicle_info'] = getattr(driver, 'vehicle_info', None)
-            locations.append(location_data)
-        
-        return Response({
-            'count': len(locations),
-            'locations': locations
-        })
-    
+        """Get all active driver locations for live map (?since=<cursor> for changes only)"""
+        def build(row, data):
+            data['vehicle_info'] = None
+            return data
+
+        return self._location_feed(request, {'driver__is_online': True, 'driver__is_active': True}, build)
+
     @action(detail=False, methods=['get'])
     def all_drivers(self, request):
-        """Get all drivers with their locations (for admin map)"""
-        drivers = User.objects.filter(
-            role='driver',
-            is_active=True,
-            location__isnull=False
-        ).select_related('location')
-        
-        locations = []
-        for driver in drivers:
-            location_data = DriverLocationSerializer(driver.location).data
-            location_data['driver_name'] = driver.get_full_name() or driver.username
-            location_data['driver_id'] = driver.id
-            location_data['driver_phone'] = driver.phone_number
-            location_data['is_online'] = driver.is_online
-            location_data['is_approved'] = getattr(driver, 'is_driver_approved', False)
-            locations.append(location_data)
-        
-        return Response({
-            'count': len(locations),
-            'locations': locations
-        })
+        """Get all drivers with their locations for admin map (?since=<cursor> for changes only)"""
+        def build(row, data):
+            data['is_online'] = row['driver__is_online']
+            data['is_approved'] = row['driver__is_driver_approved']
+            return data
+
+        return self._location_feed(request, {'driver__is_active': True}, build)
+
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Get driver and open booking markers clustered for the map viewport (see tracking.clustering)
+        Query params: zoom, bbox=min_lat,min_lon,max_lat,max_lon
+        """
+        from tracking.clustering import get_clusters
+
+        try:
+            zoom = int(request.query_params['zoom'])
+            min_lat, min_lon, max_lat, max_lon = (float(value) for value in request.query_params['bbox'].split(','))
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'zoom and bbox=min_lat,min_lon,max_lat,max_lon are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if min_lat > max_lat or min_lon > max_lon:
+            return Response({'detail': 'bbox minimums must not exceed maximums'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response(get_clusters(zoom, min_lat, min_lon, max_lat, max_lon))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """Get the latest supply/demand heatmap snapshot (precomputed, see tracking.heatmap)"""
+        from tracking.heatmap import get_snapshot, build_snapshot
+
+        if request.query_params.get('refresh') == 'true':
+            snapshot = build_snapshot()
+        else:
+            snapshot = get_snapshot(build_if_missing=True)
+        return Response(snapshot)
 
 class DisputeViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     queryset = Dispute.objects.all()
     serializer_class = DisputeSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = super().get_queryset().select_related('booking', 'raised_by', 'resolved_by')
@@ -434,6 +559,7 @@ class SystemLogViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
     queryset = SystemLog.objects.all()
     serializer_class = SystemLogSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = super().get_queryset().select_related('user')
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def open_shifts_for_online_drivers(apps, schema_editor):
+    """Drivers already online start their first shift now"""
+    User = apps.get_model('users', 'User')
+    DriverShift = apps.get_model('users', 'DriverShift')
+    now = timezone.now()
+    DriverShift.objects.bulk_create([
+        DriverShift(driver_id=driver_id, started_at=now, rolled_up_until=now)
+        for driver_id in User.objects.filter(role='driver', is_online=True).values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverShift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('end_reason', models.CharField(blank=True, choices=[('toggled_offline', 'Went Offline'), ('presence_expired', 'Heartbeats Stopped'), ('deactivated', 'Account Deactivated')], max_length=20)),
+                ('rolled_up_until', models.DateTimeField()),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['driver', 'ended_at'], name='users_shift_driver_open_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DriverDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('online_seconds', models.PositiveIntegerField(default=0)),
+                ('on_job_seconds', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('driver', 'date')},
+            },
+        ),
+        migrations.RunPython(open_shifts_for_online_drivers, migrations.RunPython.noop),
+    ]
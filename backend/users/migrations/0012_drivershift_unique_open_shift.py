@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+def close_duplicate_open_shifts(apps, schema_editor):
+    """Keep each driver's latest open shift; close older ones where they were rolled up to"""
+    DriverShift = apps.get_model('users', 'DriverShift')
+    seen, duplicates = set(), []
+    for shift in DriverShift.objects.filter(ended_at__isnull=True).order_by('driver_id', '-started_at', '-id'):
+        if shift.driver_id in seen:
+            shift.ended_at = shift.rolled_up_until
+            shift.end_reason = 'toggled_offline'
+            duplicates.append(shift)
+        seen.add(shift.driver_id)
+    DriverShift.objects.bulk_update(duplicates, ['ended_at', 'end_reason'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_user_last_seen_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_shifts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='drivershift',
+            constraint=models.UniqueConstraint(condition=models.Q(('ended_at__isnull', True)), fields=('driver',), name='unique_open_shift_per_driver'),
+        ),
+    ]
@@ -14,6 +14,9 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=15, unique=True, null=True, blank=True)
     address = models.TextField(blank=True, null=True)
     is_online = models.BooleanField(default=False)
+    # Last heartbeat or location ping from a driver's app (tracking.presence,
+    # when the cache is not shared between processes)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
     
     # Email verification fields
     is_email_verified = models.BooleanField(default=False)
@@ -46,3 +49,62 @@ class User(AbstractUser):
         days_until_expiry = (self.driver_license_expiry_date - timezone.now().date()).days
         return 0 <= days_until_expiry <= 7
 
+
+
+class DriverShift(models.Model):
+    """One online session of a driver, from going online until going offline"""
+    END_REASON_CHOICES = (
+        ('toggled_offline', 'Went Offline'),
+        ('presence_expired', 'Heartbeats Stopped'),
+        ('deactivated', 'Account Deactivated'),
+    )
+
+    driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shifts')
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(null=True, blank=True)
+    end_reason = models.CharField(max_length=20, choices=END_REASON_CHOICES, blank=True)
+    # How far this shift has been added into DriverDailyStats
+    rolled_up_until = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-started_at']
+        # At most one open shift per driver, however many requests race to open one
+        constraints = [
+            models.UniqueConstraint(
+                fields=['driver'],
+                condition=models.Q(ended_at__isnull=True),
+                name='unique_open_shift_per_driver'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['driver', 'ended_at'], name='users_shift_driver_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"Shift {self.driver.username} - {self.started_at}"
+
+
+class DriverDailyStats(models.Model):
+    """Per-driver daily online and on-job time, kept up to date from shifts"""
+    driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    online_seconds = models.PositiveIntegerField(default=0)
+    # Time online with an accepted, started or arrived booking
+    on_job_seconds = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['driver', 'date']
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Stats {self.driver.username} - {self.date}"
+
+    @property
+    def idle_seconds(self):
+        return max(self.online_seconds - self.on_job_seconds, 0)
+
+    @property
+    def utilisation(self):
+        """Share of online time spent on jobs (0-1)"""
+        return round(self.on_job_seconds / self.online_seconds, 3) if self.online_seconds else 0.0
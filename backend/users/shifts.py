@@ -0,0 +1,209 @@
+"""
+Driver shifts and daily online-time rollups.
+
+Every online session is one DriverShift row, opened when the driver goes
+online and closed when they go offline, their presence expires (see
+tracking.presence) or their account is deactivated.
+
+DriverDailyStats holds each driver's online and on-job seconds per local day.
+It is kept up to date incrementally: each shift remembers how far it has been
+rolled up (rolled_up_until), and a rollup only adds the time since then,
+split at midnight, plus the part of it the driver spent on a job (from the
+accepted_at / completed_at of their bookings). Rollups run periodically and
+whenever a shift ends, so dashboards read a handful of daily rows instead of
+scanning shifts or bookings.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Booking states that keep a driver on a job (mirrors bookings.availability)
+ACTIVE_JOB_STATUSES = ('accepted', 'started', 'arrived')
+
+
+def start_shift(driver_id, at=None):
+    """
+    Open a shift for a driver who went online, unless one is already open.
+
+    The unique_open_shift_per_driver constraint settles concurrent calls:
+    whichever insert loses finds the winner's shift open and leaves it.
+    """
+    from .models import DriverShift
+
+    at = at or timezone.now()
+    if DriverShift.objects.filter(driver_id=driver_id, ended_at__isnull=True).exists():
+        return
+    try:
+        with transaction.atomic():
+            DriverShift.objects.create(driver_id=driver_id, started_at=at, rolled_up_until=at)
+    except IntegrityError:
+        logger.info(f"Driver {driver_id} already has an open shift")
+
+
+def end_shifts(driver_ids, reason, at=None):
+    """
+    Close the open shifts of drivers who went offline and roll them up.
+
+    Args:
+        driver_ids: Driver user IDs
+        reason: One of DriverShift.END_REASON_CHOICES
+        at: When they went offline (default: now)
+    """
+    from .models import DriverShift
+
+    at = at or timezone.now()
+    with transaction.atomic():
+        shifts = list(DriverShift.objects.select_for_update().filter(
+            driver_id__in=list(driver_ids), ended_at__isnull=True
+        ))
+        for shift in shifts:
+            # Time already rolled up stays counted
+            shift.ended_at = max(at, shift.rolled_up_until)
+            shift.end_reason = reason
+        DriverShift.objects.bulk_update(shifts, ['ended_at', 'end_reason'])
+
+    if shifts:
+        rollup(driver_ids=[shift.driver_id for shift in shifts], now=at)
+
+
+def _split_days(start, end):
+    """Split [start, end) at local midnights into (date, start, end) pieces."""
+    while start < end:
+        day = timezone.localtime(start).date()
+        midnight = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        cut = min(end, midnight)
+        yield day, start, cut
+        start = cut
+
+
+def _job_intervals(driver_ids, start, end):
+    """Merged on-job (start, end) intervals per driver overlapping [start, end)."""
+    from bookings.models import Booking
+
+    bookings = Booking.objects.filter(
+        driver_id__in=driver_ids, accepted_at__isnull=False, accepted_at__lt=end
+    ).filter(
+        Q(status__in=ACTIVE_JOB_STATUSES)
+        | Q(status='completed', completed_at__gt=start)
+        | Q(status='cancelled', updated_at__gt=start)
+    ).values_list('driver_id', 'status', 'accepted_at', 'completed_at', 'updated_at')
+
+    intervals = defaultdict(list)
+    for driver_id, status, accepted_at, completed_at, updated_at in bookings:
+        if status in ACTIVE_JOB_STATUSES:
+            job_end = end
+        elif status == 'completed':
+            job_end = completed_at
+        else:
+            job_end = updated_at
+        intervals[driver_id].append((accepted_at, job_end))
+
+    merged = {}
+    for driver_id, jobs in intervals.items():
+        jobs.sort()
+        merged[driver_id] = [list(jobs[0])]
+        for job_start, job_end in jobs[1:]:
+            if job_start <= merged[driver_id][-1][1]:
+                merged[driver_id][-1][1] = max(merged[driver_id][-1][1], job_end)
+            else:
+                merged[driver_id].append([job_start, job_end])
+    return merged
+
+
+def rollup(driver_ids=None, now=None):
+    """
+    Add shift time not yet rolled up into DriverDailyStats.
+
+    Args:
+        driver_ids: Only roll up these drivers (default: everyone)
+        now: Roll open shifts up to this time (default: now)
+
+    Returns:
+        int: Number of shifts rolled up
+    """
+    from .models import DriverDailyStats, DriverShift
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        shifts = DriverShift.objects.select_for_update().filter(
+            Q(ended_at__isnull=True) | Q(rolled_up_until__lt=F('ended_at'))
+        )
+        if driver_ids is not None:
+            shifts = shifts.filter(driver_id__in=list(driver_ids))
+
+        windows = []
+        for shift in shifts:
+            end = min(shift.ended_at or now, now)
+            if end > shift.rolled_up_until:
+                windows.append((shift, shift.rolled_up_until, end))
+        if not windows:
+            return 0
+
+        jobs = _job_intervals(
+            {shift.driver_id for shift, _, _ in windows},
+            min(start for _, start, _ in windows),
+            max(end for _, _, end in windows)
+        )
+
+        added = defaultdict(lambda: [0.0, 0.0])  # (driver_id, date) -> [online, on job]
+        for shift, start, end in windows:
+            for day, piece_start, piece_end in _split_days(start, end):
+                added[(shift.driver_id, day)][0] += (piece_end - piece_start).total_seconds()
+            for job_start, job_end in jobs.get(shift.driver_id, ()):
+                overlap_start, overlap_end = max(start, job_start), min(end, job_end)
+                for day, piece_start, piece_end in _split_days(overlap_start, overlap_end):
+                    added[(shift.driver_id, day)][1] += (piece_end - piece_start).total_seconds()
+            shift.rolled_up_until = end
+
+        existing = {
+            (stats.driver_id, stats.date): stats
+            for stats in DriverDailyStats.objects.filter(
+                driver_id__in={driver_id for driver_id, _ in added},
+                date__in={day for _, day in added}
+            )
+        }
+        to_update, to_create = [], []
+        for (driver_id, day), (online, on_job) in added.items():
+            stats = existing.get((driver_id, day))
+            if stats is None:
+                stats = DriverDailyStats(driver_id=driver_id, date=day)
+                to_create.append(stats)
+            else:
+                to_update.append(stats)
+            stats.online_seconds += round(online)
+            stats.on_job_seconds = min(stats.on_job_seconds + round(on_job), stats.online_seconds)
+            stats.updated_at = now
+
+        DriverDailyStats.objects.bulk_update(to_update, ['online_seconds', 'on_job_seconds', 'updated_at'])
+        DriverDailyStats.objects.bulk_create(to_create)
+        DriverShift.objects.bulk_update([shift for shift, _, _ in windows], ['rolled_up_until'])
+
+    return len(windows)
+
+
+def summary(driver_id, since):
+    """
+    Total online, on-job and idle time for a driver from the date `since` on.
+
+    Returns:
+        dict: hours_online, hours_on_job, hours_idle and utilisation (0-1)
+    """
+    from django.db.models import Sum
+    from .models import DriverDailyStats
+
+    totals = DriverDailyStats.objects.filter(driver_id=driver_id, date__gte=since).aggregate(
+        online=Sum('online_seconds'), on_job=Sum('on_job_seconds')
+    )
+    online, on_job = totals['online'] or 0, totals['on_job'] or 0
+    return {
+        'hours_online': round(online / 3600, 1),
+        'hours_on_job': round(on_job / 3600, 1),
+        'hours_idle': round(max(online - on_job, 0) / 3600, 1),
+        'utilisation': round(on_job / online, 3) if online else 0.0,
+    }
@@ -0,0 +1,16 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rollup_driver_shifts_task():
+    """Add the latest online and on-job time of driver shifts to the daily stats"""
+    from users.shifts import rollup
+
+    try:
+        return {"shifts": rollup(), "status": "success"}
+    except Exception as e:
+        logger.error(f"Driver shift rollup failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from bookings.management.commands.check_query_budget import Command as QueryBudgetCommand
+from users.models import User
+
+
+@override_settings(CACHE_IS_SHARED=False)
+class DriverLocationFeedTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create(username='feed_admin', role='admin', password='!', phone_number='0722000001')
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_etag_changes_with_the_cursor(self):
+        first = self.client.get('/api/admin/driver-locations/', {'since': '1700000000000000'})
+        self.assertEqual(first.status_code, 200)
+
+        # Same (empty) delta, but a different cursor to hand back
+        second = self.client.get('/api/admin/driver-locations/', {'since': '1700000001000000'},
+                                 HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['cursor'], '1700000001000000')
+
+        third = self.client.get('/api/admin/driver-locations/', {'since': '1700000001000000'},
+                                HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 304)
+
+
+class AdminBookingQueryBudgetTests(TestCase):
+    def test_admin_bookings_take_one_query_whatever_their_size(self):
+        for rows in (3, 20):
+            with self.subTest(rows=rows):
+                users = QueryBudgetCommand().seed(rows)
+                client = APIClient()
+                client.force_authenticate(users['admin'])
+                client.get('/api/admin/bookings/')
+
+                with self.assertNumQueries(1):
+                    response = client.get('/api/admin/bookings/')
+                self.assertEqual(response.status_code, 200)
@@ -3,6 +3,7 @@ import qrcode
 import io
 import base64
 import threading
+import logging
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework import generics, serializers
@@ -26,6 +27,7 @@ from google.auth.transport import requests as google_requests
 from google.auth.exceptions import TransportError
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 def get_effective_role(user):
@@ -490,7 +492,29 @@ class ToggleOnlineView(APIView):
             return Response({'detail': 'Only drivers can toggle online status.'}, status=status.HTTP_403_FORBIDDEN)
         
         request.user.is_online = not request.user.is_online
-        request.user.save()
+        request.user.save(update_fields=['is_online'])
+
+        if request.user.role == 'driver':
+            from tracking import ingestion, presence
+            from .shifts import end_shifts, start_shift
+            if request.user.is_online:
+                presence.go_online(request.user.id)
+                start_shift(request.user.id)
+            else:
+                presence.go_offline([request.user.id])
+                end_shifts([request.user.id], 'toggled_offline')
+                # Persist the last buffered position before the driver drops out of flushes
+                ingestion.flush([request.user.id])
+            # Let the admin live map's delta feed see the presence change
+            ingestion.touch([request.user.id])
+
+        if request.user.is_online and request.user.role == 'driver':
+            # New supply: retry stranded bookings around this driver
+            try:
+                from bookings.tasks import redispatch_near_driver_task
+                redispatch_near_driver_task.delay(request.user.id)
+            except Exception as e:
+                logger.error(f"Failed to queue re-dispatch for driver {request.user.id}: {str(e)}")
         
         return Response({
             'is_online': request.user.is_online,
@@ -516,6 +540,9 @@ class ApproveDriverView(APIView):
         driver.is_driver_approved = True
         driver.save(update_fields=['is_driver_approved'])
         
+        from tracking import ingestion
+        ingestion.touch([driver.id])
+        
         return Response({
             'detail': f'Driver {driver.username} has been approved.',
             'driver': {
@@ -0,0 +1,190 @@
+"""
+Driver eligibility index.
+
+Maps each driver with an assigned vehicle to the jobs that vehicle can take:
+its capacity class, the service types it handles and any compliance problems
+(vehicle off the road, expired insurance/registration, expired licence).
+The index lives in the cache so driver matching can filter candidates in
+memory instead of checking every driver's vehicle and documents per booking.
+Drivers with no vehicle assigned are not in the index: matching keeps
+offering them jobs as it did before vehicles were checked, so a fleet whose
+vehicles are not all registered yet keeps being dispatched.
+
+The index is stored as one cache entry tagged with a version number. Saving
+a Vehicle or driver User bumps the version once the transaction commits, and
+the next lookup rebuilds the index (one process at a time, under a cache.add
+lock). A rebuild tags the index with the version it read before querying, so
+a rebuild racing a change never stores an index that outlives it. A nightly
+sweep also rebuilds it so date-based expiries are picked up. With a
+per-process cache (no Redis) other processes never see the version bump, so
+their copy of the index is only kept for LOCAL_INDEX_TIMEOUT_SECONDS.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+INDEX_CACHE_KEY = 'vehicles:eligibility_index'
+VERSION_CACHE_KEY = 'vehicles:eligibility_version'
+REBUILD_LOCK_KEY = 'vehicles:eligibility_rebuild'
+INDEX_TIMEOUT_SECONDS = 60 * 60 * 24
+LOCAL_INDEX_TIMEOUT_SECONDS = 60
+REBUILD_LOCK_SECONDS = 30
+
+# Tank sizes offered to customers (see Booking.TANK_SIZE_CHOICES), in liters
+CAPACITY_CLASSES = (1000, 2000, 3000, 5000, 10000)
+
+# Booking service types each vehicle type can handle
+VEHICLE_SERVICE_TYPES = {
+    'exhauster': ('septic', 'pit_latrine', 'grease_trap', 'other'),
+    'sewage': ('septic', 'pit_latrine', 'other'),
+    'other': ('other',),
+}
+
+OFF_ROAD_SERVICE_STATUSES = ('repair', 'maintenance')
+
+# Compliance flags that keep a driver from receiving offers
+BLOCKING_FLAGS = {
+    'vehicle_inactive',
+    'vehicle_off_road',
+    'insurance_expired',
+    'registration_expired',
+    'license_expired',
+}
+
+
+def capacity_class(capacity):
+    """Largest bookable tank size a vehicle of `capacity` liters can empty (0 if none)."""
+    eligible = [size for size in CAPACITY_CLASSES if size <= (capacity or 0)]
+    return eligible[-1] if eligible else 0
+
+
+def build_entry(vehicle, driver):
+    """Build the index entry for a driver and their assigned vehicle."""
+    flags = []
+    if not vehicle.is_active:
+        flags.append('vehicle_inactive')
+    if vehicle.service_status in OFF_ROAD_SERVICE_STATUSES:
+        flags.append('vehicle_off_road')
+    if vehicle.is_insurance_expired():
+        flags.append('insurance_expired')
+    elif vehicle.is_insurance_expiring_soon():
+        flags.append('insurance_expiring')
+    if vehicle.is_registration_expired():
+        flags.append('registration_expired')
+    elif vehicle.is_registration_expiring_soon():
+        flags.append('registration_expiring')
+
+    license_expiry = driver.driver_license_expiry_date
+    if license_expiry and license_expiry < timezone.now().date():
+        flags.append('license_expired')
+    elif driver.is_license_expiring_soon():
+        flags.append('license_expiring')
+
+    return {
+        'vehicle_id': vehicle.id,
+        'capacity_class': capacity_class(vehicle.capacity),
+        'service_types': list(VEHICLE_SERVICE_TYPES.get(vehicle.vehicle_type, ())),
+        'flags': flags,
+        'eligible': not BLOCKING_FLAGS.intersection(flags),
+    }
+
+
+def _current_version():
+    cache.add(VERSION_CACHE_KEY, 1, None)
+    return cache.get(VERSION_CACHE_KEY) or 1
+
+
+def _build_index():
+    from vehicles.models import Vehicle
+
+    index = {}
+    vehicles = Vehicle.objects.filter(
+        driver__isnull=False, driver__role='driver'
+    ).select_related('driver')
+    for vehicle in vehicles:
+        index[vehicle.driver_id] = build_entry(vehicle, vehicle.driver)
+    return index
+
+
+def _store(version, index):
+    timeout = INDEX_TIMEOUT_SECONDS if settings.CACHE_IS_SHARED else LOCAL_INDEX_TIMEOUT_SECONDS
+    cache.set(INDEX_CACHE_KEY, (version, index), timeout)
+
+
+def rebuild_index():
+    """Recompute the whole index from the database and store it in the cache."""
+    version = _current_version()
+    index = _build_index()
+    _store(version, index)
+    logger.info(f"Rebuilt driver eligibility index with {len(index)} drivers")
+    return index
+
+
+def get_index():
+    """Return the eligibility index, rebuilding it if it is missing or out of date."""
+    version = _current_version()
+    cached = cache.get(INDEX_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = _build_index()
+    # Only one process stores a rebuild; the others just use theirs
+    if cache.add(REBUILD_LOCK_KEY, True, REBUILD_LOCK_SECONDS):
+        try:
+            _store(version, index)
+        finally:
+            cache.delete(REBUILD_LOCK_KEY)
+    return index
+
+
+def invalidate():
+    """Mark the cached index out of date; it is rebuilt on the next lookup."""
+    _current_version()
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        # Evicted between the two calls
+        cache.add(VERSION_CACHE_KEY, 1, None)
+
+
+def invalidate_on_commit():
+    """
+    Invalidate once the current transaction commits, so the rebuild sees the
+    change. Called when a Vehicle or driver User is saved or deleted.
+    """
+    transaction.on_commit(invalidate)
+
+
+def ineligible_driver_ids(booking, index=None):
+    """
+    Return the IDs of drivers whose vehicle cannot take `booking`.
+
+    Drivers without an assigned vehicle are not in the index, so they are
+    never in the result.
+
+    Args:
+        booking: Booking instance
+        index: Optional index already fetched with get_index()
+
+    Returns:
+        set: Driver user IDs
+    """
+    if index is None:
+        index = get_index()
+
+    try:
+        tank_size = int(booking.tank_size)
+    except (TypeError, ValueError):
+        tank_size = 0
+
+    return {
+        driver_id for driver_id, entry in index.items()
+        if not entry['eligible']
+        or entry['capacity_class'] < tank_size
+        or booking.service_type not in entry['service_types']
+    }
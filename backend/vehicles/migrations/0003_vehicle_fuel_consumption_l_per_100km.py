@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-16 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_vehicle_insurance_expiry_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='fuel_consumption_l_per_100km',
+            field=models.FloatField(blank=True, help_text='Average fuel consumption in liters per 100km (defaults by vehicle type)', null=True),
+        ),
+    ]
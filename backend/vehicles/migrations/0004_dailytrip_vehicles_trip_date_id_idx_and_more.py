@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-16 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_vehicle_fuel_consumption_l_per_100km'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailytrip',
+            index=models.Index(fields=['date', 'id'], name='vehicles_trip_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fuellog',
+            index=models.Index(fields=['date', 'id'], name='vehicles_fuel_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fuellog',
+            index=models.Index(fields=['driver', 'date', 'id'], name='vehicles_fuel_driver_date_idx'),
+        ),
+    ]
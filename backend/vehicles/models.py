@@ -13,6 +13,13 @@ class Vehicle(models.Model):
         ('other', 'Other'),
     )
     
+    # Typical consumption (liters per 100km) used when a vehicle has no rate of its own
+    DEFAULT_FUEL_CONSUMPTION_L_PER_100KM = {
+        'exhauster': 30.0,
+        'sewage': 35.0,
+        'other': 25.0,
+    }
+    
     SERVICE_STATUS_CHOICES = (
         ('operational', 'Operational'),
         ('repair', 'Under Repair'),
@@ -40,6 +47,12 @@ class Vehicle(models.Model):
     next_service_date = models.DateField(null=True, blank=True)
     service_notes = models.TextField(blank=True, null=True)
     
+    # Fuel model for trip estimates
+    fuel_consumption_l_per_100km = models.FloatField(
+        null=True, blank=True,
+        help_text="Average fuel consumption in liters per 100km (defaults by vehicle type)"
+    )
+    
     def clean(self):
         """Ensure a driver can only have one vehicle"""
         if self.driver and self.id:
@@ -51,6 +64,13 @@ class Vehicle(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
     
+    def estimate_fuel_liters(self, distance_km):
+        """Estimated fuel burned over a distance, from this vehicle's consumption rate"""
+        rate = self.fuel_consumption_l_per_100km or self.DEFAULT_FUEL_CONSUMPTION_L_PER_100KM.get(
+            self.vehicle_type, self.DEFAULT_FUEL_CONSUMPTION_L_PER_100KM['other']
+        )
+        return distance_km * rate / 100
+    
     def is_insurance_expiring_soon(self):
         """Check if insurance expires within 7 days"""
         if not self.insurance_expiry_date:
@@ -130,6 +150,9 @@ class DailyTrip(models.Model):
     class Meta:
         unique_together = ['driver', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'id'], name='vehicles_trip_date_id_idx'),
+        ]
     
     def __str__(self):
         return f"Trip {self.driver.username} - {self.date}"
@@ -152,6 +175,10 @@ class FuelLog(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'id'], name='vehicles_fuel_date_id_idx'),
+            models.Index(fields=['driver', 'date', 'id'], name='vehicles_fuel_driver_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_log_type_display()} - {self.driver.username} - {self.liters}L"
\ No newline at end of file
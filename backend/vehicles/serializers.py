@@ -25,7 +25,8 @@ class VehicleSerializer(serializers.ModelSerializer):
             'driver', 'driver_id', 'driver_details', 'created_at',
             'insurance_expiry_date', 'registration_expiry_date',
             'service_status', 'last_service_date', 'next_service_date',
-            'service_notes', 'insurance_expiring_soon', 'registration_expiring_soon',
+            'service_notes', 'fuel_consumption_l_per_100km',
+            'insurance_expiring_soon', 'registration_expiring_soon',
             'insurance_expired', 'registration_expired'
         ]
         read_only_fields = ['created_at', 'insurance_expiring_soon', 'registration_expiring_soon', 'insurance_expired', 'registration_expired']
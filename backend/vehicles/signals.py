@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from vehicles import eligibility
+from vehicles.models import Vehicle
+
+# User fields that affect driver eligibility
+ELIGIBILITY_USER_FIELDS = {'role', 'driver_license_expiry_date'}
+
+
+@receiver(post_save, sender=Vehicle)
+def refresh_eligibility_on_vehicle_save(sender, instance, **kwargs):
+    eligibility.invalidate_on_commit()
+
+
+@receiver(post_delete, sender=Vehicle)
+def refresh_eligibility_on_vehicle_delete(sender, instance, **kwargs):
+    if instance.driver_id:
+        eligibility.invalidate_on_commit()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_eligibility_on_driver_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    # Skip frequent saves that cannot change eligibility (e.g. going online)
+    if update_fields is not None and not ELIGIBILITY_USER_FIELDS.intersection(update_fields):
+        return
+    eligibility.invalidate_on_commit()
@@ -0,0 +1,18 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_eligibility_index_task():
+    """Nightly sweep: rebuild the driver eligibility index so date-based expiries take effect"""
+    from vehicles import eligibility
+
+    try:
+        index = eligibility.rebuild_index()
+        eligible = sum(1 for entry in index.values() if entry['eligible'])
+        return {"drivers": len(index), "eligible": eligible, "status": "success"}
+    except Exception as e:
+        logger.error(f"Eligibility index rebuild failed: {str(e)}")
+        return {"error": str(e), "status": "failed"}
@@ -10,6 +10,7 @@ from .serializers import (
     DailyTripSerializer, FuelLogSerializer
 )
 from users.models import User
+from backend.pagination import KeysetPagination
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -107,7 +108,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def driver_metrics(self, request):
-        """Get fuel and revenue metrics for all drivers"""
+        """Get fuel, revenue and online-time metrics for all drivers"""
         from bookings.models import Booking
         from django.db.models import Sum
         from decimal import Decimal
@@ -115,6 +116,15 @@ class VehicleViewSet(viewsets.ModelViewSet):
         drivers = User.objects.filter(role='driver').prefetch_related('vehicle', 'daily_trips', 'fuel_logs')
         metrics = []
 
+        # Online time over the last 30 days from the daily shift rollups
+        from users.models import DriverDailyStats
+        shift_totals = {
+            row['driver_id']: row
+            for row in DriverDailyStats.objects.filter(
+                date__gte=timezone.localdate() - timedelta(days=29)
+            ).values('driver_id').annotate(online=Sum('online_seconds'), on_job=Sum('on_job_seconds'))
+        }
+
         for driver in drivers:
             total_fuel = FuelLog.objects.filter(
                 driver=driver,
@@ -139,6 +149,9 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 status='completed'
             ).aggregate(total=Sum('distance_km'))['total'] or 0
 
+            shift_total = shift_totals.get(driver.id, {'online': 0, 'on_job': 0})
+            online_seconds, on_job_seconds = shift_total['online'] or 0, shift_total['on_job'] or 0
+
             metrics.append({
                 'driver_id': driver.id,
                 'driver_name': driver.get_full_name(),
@@ -148,7 +161,10 @@ class VehicleViewSet(viewsets.ModelViewSet):
                 'total_revenue': float(total_revenue),
                 'total_jobs': total_jobs,
                 'total_distance_km': float(total_distance) if total_distance else 0,
-                'is_online': driver.is_online
+                'is_online': driver.is_online,
+                'hours_online_30d': round(online_seconds / 3600, 1),
+                'hours_idle_30d': round(max(online_seconds - on_job_seconds, 0) / 3600, 1),
+                'utilisation_30d': round(on_job_seconds / online_seconds, 3) if online_seconds else 0.0,
             })
 
         return Response(metrics)
@@ -188,6 +204,7 @@ class DailyTripViewSet(viewsets.ModelViewSet):
     queryset = DailyTrip.objects.all()
     serializer_class = DailyTripSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         if self.request.user.role == 'driver':
@@ -237,13 +254,20 @@ class DailyTripViewSet(viewsets.ModelViewSet):
             completed_at__date=today
         ).aggregate(total=Sum('waste_emptied_liters'))['total'] or 0
 
+        # Calculate today's fuel from completed bookings (estimated from GPS distance)
+        today_fuel = Booking.objects.filter(
+            driver=request.user,
+            status='completed',
+            completed_at__date=today
+        ).aggregate(total=Sum('fuel_used_liters'))['total'] or 0
+
         if not trip:
             # Return calculated data from bookings even if no DailyTrip record exists
             return Response({
                 'driver': request.user.id,
                 'date': today.isoformat(),
                 'total_kilometers': float(today_distance) if today_distance else 0,
-                'fuel_consumed_liters': 0,
+                'fuel_consumed_liters': float(today_fuel) if today_fuel else 0,
                 'waste_emptied_liters': float(today_waste) if today_waste else 0,
                 'revenue_generated': float(today_revenue),
                 'jobs_completed': today_jobs
@@ -258,6 +282,8 @@ class DailyTripViewSet(viewsets.ModelViewSet):
             data['total_kilometers'] = float(today_distance) if today_distance else 0
         if not data.get('waste_emptied_liters') or data['waste_emptied_liters'] == 0:
             data['waste_emptied_liters'] = float(today_waste) if today_waste else 0
+        if not data.get('fuel_consumed_liters') or data['fuel_consumed_liters'] == 0:
+            data['fuel_consumed_liters'] = float(today_fuel) if today_fuel else 0
 
         return Response(data)
 
@@ -266,6 +292,7 @@ class FuelLogViewSet(viewsets.ModelViewSet):
     queryset = FuelLog.objects.all()
     serializer_class = FuelLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         if self.request.user.role == 'driver':
@@ -1,4 +1,4 @@
-import axiosInstance from './axiosConfig';
+import axiosInstance, { fetchPage } from './axiosConfig';
 
 export const adminAPI = {
   // Dashboard
@@ -66,10 +66,9 @@ export const adminAPI = {
     return response.data;
   },
 
-  // Bookings
+  // Bookings, a page at a time: { items, next }
   getBookings: async (params = {}) => {
-    const response = await axiosInstance.get('/admin/bookings/', { params });
-    return response.data;
+    return fetchPage('/admin/bookings/', params);
   },
 
   assignDriver: async (bookingId, driverId) => {
@@ -77,10 +76,9 @@ export const adminAPI = {
     return response.data;
   },
 
-  // Disputes
+  // Disputes, a page at a time: { items, next }
   getDisputes: async (params = {}) => {
-    const response = await axiosInstance.get('/admin/disputes/', { params });
-    return response.data.results || response.data;
+    return fetchPage('/admin/disputes/', params);
   },
 
   resolveDispute: async (disputeId, resolution) => {
@@ -93,10 +91,9 @@ export const adminAPI = {
     return response.data;
   },
 
-  // System Logs
+  // System Logs, a page at a time: { items, next }
   getLogs: async (params = {}) => {
-    const response = await axiosInstance.get('/admin/logs/', { params });
-    return response.data.results || response.data;
+    return fetchPage('/admin/logs/', params);
   },
 
   // Driver Locations (Live Map)
@@ -109,4 +106,12 @@ export const adminAPI = {
     const response = await axiosInstance.get('/admin/driver-locations/all_drivers/');
     return response.data;
   },
+
+  // bounds: [minLat, minLon, maxLat, maxLon] of the visible map
+  getMapClusters: async (zoom, bounds) => {
+    const response = await axiosInstance.get('/admin/driver-locations/clusters/', {
+      params: { zoom, bbox: bounds.join(',') }
+    });
+    return response.data;
+  },
 };
\ No newline at end of file
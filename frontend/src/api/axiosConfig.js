@@ -101,4 +101,42 @@ axiosInstance.interceptors.response.use(
   }
 );
 
+// Only the cursor is taken from a `next` link: its host may not be the one the app talks to
+const cursorOf = (link) => (link ? new URL(link, window.location.origin).searchParams.get('cursor') : null);
+
+// Fetch one page of a list endpoint. Paginated endpoints answer
+// { next, previous, results } a page at a time (see backend/pagination.py);
+// this returns the page's items and the cursor of the next page (null on the
+// last one). Pass that cursor back as params.cursor to load more. `count` is
+// only set when asked for with params.count ('exact' or 'approx'). Endpoints
+// that return a plain array come back as a single page.
+export const fetchPage = async (url, params = {}) => {
+  const response = await axiosInstance.get(url, { params });
+  const data = response.data;
+  if (Array.isArray(data)) {
+    return { items: data, next: null, count: data.length };
+  }
+  return { items: data.results || data.data || [], next: cursorOf(data.next), count: data.count ?? null };
+};
+
+// Small, bounded lists only (e.g. a user's own disputes): follow `next` to
+// the end, but never past MAX_PAGES pages. Anything that grows with the
+// business should be shown a page at a time with fetchPage instead.
+const MAX_PAGES = 5;
+
+export const fetchAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor = null;
+  for (let page = 0; page < MAX_PAGES; page += 1) {
+    const result = await fetchPage(url, { page_size: 200, ...params, ...(cursor ? { cursor } : {}) });
+    items.push(...result.items);
+    cursor = result.next;
+    if (!cursor) {
+      return items;
+    }
+  }
+  console.warn(`fetchAllPages: stopped after ${MAX_PAGES} pages of ${url}`);
+  return items;
+};
+
 export default axiosInstance;
@@ -1,4 +1,4 @@
-import axiosInstance from './axiosConfig';
+import axiosInstance, { fetchAllPages, fetchPage } from './axiosConfig';
 
 export const bookingsAPI = {
   // Create booking
@@ -7,21 +7,11 @@ export const bookingsAPI = {
     return response.data;
   },
 
-  // Get all bookings for user
+  // Get one page of the user's bookings, newest first: { items, next }.
+  // Pass { cursor: next } to load the following page.
   getUserBookings: async (params = {}) => {
     try {
-      const response = await axiosInstance.get('/bookings/bookings/', { params });
-      console.log('📚 getUserBookings raw response:', response.data);
-      const data = response.data;
-      // Handle different response formats
-      let bookings = [];
-      if (Array.isArray(data)) {
-        bookings = data;
-      } else if (data.results && Array.isArray(data.results)) {
-        bookings = data.results;
-      } else if (data.data && Array.isArray(data.data)) {
-        bookings = data.data;
-      }
+      const bookings = await fetchPage('/bookings/bookings/', params);
       console.log('📚 getUserBookings processed bookings:', bookings);
       return bookings;
     } catch (error) {
@@ -72,6 +62,22 @@ export const bookingsAPI = {
     return response.data;
   },
 
+  // Wait for an incoming job offer (Driver only). Resolves with the available
+  // bookings as soon as an offer not in `knownIds` arrives, or [] after `timeout` seconds.
+  // Servers that can't hold the request open answer at once with Retry-After,
+  // which is waited out here so callers can loop either way.
+  waitForOffers: async (knownIds = [], timeout = 25) => {
+    const response = await axiosInstance.get('/bookings/bookings/offers/wait/', {
+      params: { timeout, known: knownIds.join(',') },
+      timeout: (timeout + 10) * 1000
+    });
+    const retryAfter = Number(response.headers['retry-after']);
+    if (!response.data.length && retryAfter > 0) {
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    }
+    return response.data;
+  },
+
   // Accept booking (Driver only)
   acceptBooking: async (id) => {
     const response = await axiosInstance.post(`/bookings/bookings/${id}/accept/`);
@@ -115,9 +121,9 @@ export const bookingsAPI = {
     return response.data;
   },
 
+  // One page of driver slots: { items, next }
   getAllDriverSlots: async (params = {}) => {
-    const response = await axiosInstance.get('/bookings/driver-slots/', { params });
-    return response.data;
+    return fetchPage('/bookings/driver-slots/', params);
   },
 
   // Get pricing estimate
@@ -146,7 +152,6 @@ export const bookingsAPI = {
 
   // Get user disputes
   getUserDisputes: async () => {
-    const response = await axiosInstance.get('/bookings/disputes/');
-    return response.data;
+    return fetchAllPages('/bookings/disputes/');
   }
 };
\ No newline at end of file
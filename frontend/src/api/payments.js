@@ -1,4 +1,4 @@
-import axiosInstance from './axiosConfig';
+import axiosInstance, { fetchAllPages, fetchPage } from './axiosConfig';
 
 export const paymentsAPI = {
   // Initiate IntaSend payment (checkout link)
@@ -28,10 +28,9 @@ export const paymentsAPI = {
     return response.data;
   },
 
-  // Get all payments (Admin/Staff)
+  // Get one page of payments (Admin/Staff): { items, next }
   getPayments: async (params = {}) => {
-    const response = await axiosInstance.get('/payments/payments/', { params });
-    return response.data;
+    return fetchPage('/payments/payments/', params);
   },
 
   // Verify payment (Admin only)
@@ -49,10 +48,10 @@ export const paymentsAPI = {
     return response.data;
   },
 
-  // Get user payments
+  // Get the user's payments. A customer's own payments are a short list (the
+  // page shows totals over all of them), so these are fetched whole, capped.
   getUserPayments: async (params = {}) => {
-    const response = await axiosInstance.get('/payments/payments/my_payments/', { params });
-    return response.data;
+    return fetchAllPages('/payments/payments/my_payments/', params);
   },
 
   // Retry payment
@@ -8,6 +8,23 @@ export const trackingAPI = {
         return response.data;
     },
 
+    // Keep an online driver's presence alive while no location updates are sent.
+    // Returns { is_online, ttl_seconds }; is_online false means the driver was taken offline.
+    sendHeartbeat: async () => {
+        const response = await axiosInstance.post('/tracking/locations/heartbeat/');
+        return response.data;
+    },
+
+    // Open a live position stream (Server-Sent Events). EventSource cannot send the
+    // Authorization header, so a single-use ticket is fetched first and passed in the URL.
+    // path is e.g. `stream/bookings/${bookingId}/` or `stream/fleet/`.
+    openPositionStream: async (path) => {
+        const response = await axiosInstance.post('/tracking/stream/ticket/');
+        const url = new URL(`${axiosInstance.defaults.baseURL}tracking/${path}`, window.location.origin);
+        url.searchParams.set('ticket', response.data.ticket);
+        return new EventSource(url.toString());
+    },
+
     // Get nearby drivers
     getNearbyDrivers: async (lat, lon, radiusKm = 50) => {
         const response = await axiosInstance.get('/tracking/locations/nearby/', {
@@ -11,6 +11,9 @@ const AdminRatingsPanel = () => {
     flagged: false,
     driver_id: '',
   });
+  // Ratings are keyset-paginated: pages are fetched by the cursor in the previous response's links
+  const [cursor, setCursor] = useState(null);
+  const [links, setLinks] = useState({ next: null, previous: null });
   const [currentPage, setCurrentPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
   const [selectedRating, setSelectedRating] = useState(null);
@@ -25,20 +28,22 @@ const AdminRatingsPanel = () => {
 
   useEffect(() => {
     fetchRatings();
-  }, [filters, currentPage]);
+  }, [filters, cursor]);
 
   const fetchRatings = async () => {
     setLoading(true);
     setError('');
     try {
       const params = {
-        page: currentPage,
         page_size: pageSize,
+        count: 'approx',
         ...filters,
       };
+      if (cursor) params.cursor = cursor;
       const response = await axiosInstance.get('/bookings/bookings/all_ratings/', { params });
       setRatings(response.data.results);
-      setTotalPages(response.data.total_pages);
+      setLinks({ next: response.data.next, previous: response.data.previous });
+      setTotalPages(Math.max(1, Math.ceil((response.data.count || 0) / pageSize)));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to load ratings');
     } finally {
@@ -53,9 +58,16 @@ const AdminRatingsPanel = () => {
       ...prev,
       [name]: newValue,
     }));
+    setCursor(null);
     setCurrentPage(1);
   };
 
+  const goToPage = (link, step) => {
+    if (!link) return;
+    setCursor(new URL(link).searchParams.get('cursor'));
+    setCurrentPage((prev) => Math.max(1, prev + step));
+  };
+
   const handleReviewClick = (rating) => {
     setSelectedRating(rating);
     setAdminResponse(rating.admin_response || '');
@@ -215,21 +227,21 @@ const AdminRatingsPanel = () => {
         )}
 
         {/* Pagination */}
-        {totalPages > 1 && (
+        {(links.next || links.previous) && (
           <div className="p-4 border-t flex items-center justify-between">
             <button
-              onClick={() => setCurrentPage((prev) => Math.max(1, prev - 1))}
-              disabled={currentPage === 1}
+              onClick={() => goToPage(links.previous, -1)}
+              disabled={!links.previous}
               className="px-4 py-2 border border-gray-300 rounded hover:bg-gray-50 disabled:opacity-50"
             >
               Previous
             </button>
             <span className="text-gray-600">
-              Page {currentPage} of {totalPages}
+              Page {currentPage} of {Math.max(totalPages, currentPage)}
             </span>
             <button
-              onClick={() => setCurrentPage((prev) => Math.min(totalPages, prev + 1))}
-              disabled={currentPage === totalPages}
+              onClick={() => goToPage(links.next, 1)}
+              disabled={!links.next}
               className="px-4 py-2 border border-gray-300 rounded hover:bg-gray-50 disabled:opacity-50"
             >
               Next
@@ -22,6 +22,8 @@ const AdminDashboard = () => {
   const [loading, setLoading] = useState(true);
   const [stats, setStats] = useState(null);
   const [pendingPayments, setPendingPayments] = useState([]);
+  // Only the first page of pending payments is listed; the total comes from the count
+  const [pendingCount, setPendingCount] = useState(0);
   const [recentBookings, setRecentBookings] = useState([]);
   const [verifyingPayment, setVerifyingPayment] = useState(null);
 
@@ -34,13 +36,16 @@ const AdminDashboard = () => {
     try {
       const [statsResult, paymentsResult, bookingsResult] = await Promise.allSettled([
         adminAPI.getDashboardStats(),
-        paymentsAPI.getPayments({ status: 'pending', payment_method: 'bank_transfer' }),
-        adminAPI.getBookings()
+        paymentsAPI.getPayments({ status: 'pending', payment_method: 'bank_transfer', count: 'exact' }),
+        adminAPI.getBookings({ page_size: 5 })
       ]);
 
       if (statsResult.status === 'fulfilled') setStats(statsResult.value);
-      if (paymentsResult.status === 'fulfilled') setPendingPayments(paymentsResult.value);
-      if (bookingsResult.status === 'fulfilled') setRecentBookings(bookingsResult.value.slice(0, 5));
+      if (paymentsResult.status === 'fulfilled') {
+        setPendingPayments(paymentsResult.value.items);
+        setPendingCount(paymentsResult.value.count ?? paymentsResult.value.items.length);
+      }
+      if (bookingsResult.status === 'fulfilled') setRecentBookings(bookingsResult.value.items);
 
       if (statsResult.status === 'rejected' || paymentsResult.status === 'rejected' || bookingsResult.status === 'rejected') {
         toast.error("Some dashboard sections could not be loaded");
@@ -83,7 +88,7 @@ const AdminDashboard = () => {
       <div className="bg-ink rounded-[2rem] p-8 text-white shadow-xl shadow-slate-200 relative overflow-hidden">
         <div className="relative z-10">
           <h1 className="text-3xl font-black">Welcome back, Admin!</h1>
-          <p className="mt-2 text-parchment font-medium opacity-90">System operations are stable. You have {pendingPayments.length} pending verifications.</p>
+          <p className="mt-2 text-parchment font-medium opacity-90">System operations are stable. You have {pendingCount} pending verifications.</p>
         </div>
         <div className="absolute right-0 top-0 bottom-0 w-1/3 bg-white/10 -skew-x-12 translate-x-1/2"></div>
         <Activity className="absolute right-12 top-1/2 -translate-y-1/2 w-24 h-24 text-white/10" />
@@ -128,7 +133,7 @@ const AdminDashboard = () => {
           <div className="flex justify-between items-start">
             <div>
               <p className="text-sm font-bold text-gray-400 uppercase tracking-widest">To Verify</p>
-              <h3 className="text-2xl font-black text-gray-900 mt-2">{pendingPayments.length}</h3>
+              <h3 className="text-2xl font-black text-gray-900 mt-2">{pendingCount}</h3>
             </div>
             <div className="bg-yellow-50 p-3 rounded-2xl group-hover:rotate-12 transition-transform">
               <AlertCircle className="w-6 h-6 text-yellow-600" />
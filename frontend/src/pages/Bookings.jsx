@@ -20,6 +20,9 @@ const Bookings = () => {
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
+  // Bookings come a page at a time, newest first; `nextCursor` loads the next page
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchBookings();
@@ -31,11 +34,11 @@ const Bookings = () => {
 
   const fetchBookings = async () => {
     try {
-      const data = await bookingsAPI.getUserBookings();
-      const bookingsData = Array.isArray(data) ? data : data.results || data.data || [];
-      console.log('📚 Bookings Data:', bookingsData);
-      setBookings(bookingsData);
-      setFilteredBookings(bookingsData);
+      const { items, next } = await bookingsAPI.getUserBookings();
+      console.log('📚 Bookings Data:', items);
+      setBookings(items);
+      setFilteredBookings(items);
+      setNextCursor(next);
     } catch (error) {
       toast.error('Failed to fetch bookings');
       console.error(error);
@@ -44,6 +47,21 @@ const Bookings = () => {
     }
   };
 
+  const loadMoreBookings = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { items, next } = await bookingsAPI.getUserBookings({ cursor: nextCursor });
+      setBookings((prev) => [...prev, ...items]);
+      setNextCursor(next);
+    } catch (error) {
+      toast.error('Failed to load more bookings');
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filterBookings = () => {
     let filtered = bookings;
 
@@ -360,6 +378,18 @@ const Bookings = () => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="mt-4 text-center">
+            <button
+              onClick={loadMoreBookings}
+              disabled={loadingMore}
+              className="px-4 py-2 text-sm font-bold text-[var(--sage)] bg-[var(--sage-muted)] hover:bg-[var(--sage-light)]/20 rounded-lg transition disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more bookings'}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
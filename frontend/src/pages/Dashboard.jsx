@@ -123,7 +123,8 @@ const Dashboard = () => {
       console.log('✅ Received stats response:', statsData);
       console.log('✅ Received disputes response:', disputesData);
 
-      const decodedBookings = Array.isArray(bookingsResponse) ? bookingsResponse : bookingsResponse.results || bookingsResponse.data || [];
+      // The newest page is enough here: recent, active and due bookings (the full list is on /bookings)
+      const decodedBookings = bookingsResponse.items || [];
       console.log('📋 Processed bookings:', decodedBookings);
 
       setBookings(decodedBookings);
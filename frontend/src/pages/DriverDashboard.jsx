@@ -128,10 +128,8 @@ const DriverDashboard = () => {
         setVehicle(vehicleResult.value);
       }
 
-      const bookingsValue = myBookingsResult.status === 'fulfilled' ? myBookingsResult.value : [];
-      const bookings = Array.isArray(bookingsValue)
-        ? bookingsValue
-        : bookingsValue.results || bookingsValue.data || [];
+      // The newest page of the driver's jobs holds any active one
+      const bookings = myBookingsResult.status === 'fulfilled' ? myBookingsResult.value.items : [];
       setMyBookings(bookings);
 
       const availableValue = availableResult.status === 'fulfilled' ? availableResult.value : [];
@@ -200,10 +198,38 @@ const DriverDashboard = () => {
 
   useEffect(() => {
     if (!isOnline || activeTab !== 'home') return undefined;
-    const interval = setInterval(() => fetchDriverData({ quiet: true }), 7000);
+    // Offers arrive through the long-poll below; this only refreshes the rest
+    const interval = setInterval(() => fetchDriverData({ quiet: true }), 30000);
     return () => clearInterval(interval);
   }, [isOnline, activeTab]);
 
+  useEffect(() => {
+    if (!isOnline || activeTab !== 'home') return undefined;
+    let cancelled = false;
+    // Offers already on screen don't end the next wait
+    let knownIds = [];
+
+    const waitForOffers = async () => {
+      while (!cancelled) {
+        try {
+          const offers = await bookingsAPI.waitForOffers(knownIds);
+          if (!cancelled && offers.length) {
+            knownIds = offers.map((offer) => offer.id);
+            await fetchDriverData({ quiet: true });
+          }
+        } catch (error) {
+          // Back off before reconnecting (offline, server restart, 403 when not online)
+          await new Promise((resolve) => setTimeout(resolve, 5000));
+        }
+      }
+    };
+
+    waitForOffers();
+    return () => {
+      cancelled = true;
+    };
+  }, [isOnline, activeTab]);
+
   const handleLogout = () => {
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
@@ -38,17 +38,39 @@ const AdminBookings = () => {
   const [statusFilter, setStatusFilter] = useState('all');
   const [showActions, setShowActions] = useState(null);
   const [showAssignModal, setShowAssignModal] = useState(null); // bookingId or null
+  // Bookings are listed a page at a time; the stat cards come from server-side counts
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [stats, setStats] = useState({ total: 0, pending: 0, completed: 0, revenue: 0 });
 
   useEffect(() => {
     fetchBookings();
     fetchDrivers();
   }, []);
 
+  const countBookings = async (status) => {
+    const { count } = await adminAPI.getBookings({ status, page_size: 1, count: 'exact' });
+    return count ?? 0;
+  };
+
   const fetchBookings = async () => {
     setLoading(true);
     try {
-      const data = await adminAPI.getBookings();
-      setBookings(data);
+      const [page, pending, paymentPending, completed, dashboard] = await Promise.all([
+        adminAPI.getBookings({ count: 'approx' }),
+        countBookings('pending'),
+        countBookings('payment_pending'),
+        countBookings('completed'),
+        adminAPI.getDashboardStats(),
+      ]);
+      setBookings(page.items);
+      setNextCursor(page.next);
+      setStats({
+        total: page.count ?? page.items.length,
+        pending: pending + paymentPending,
+        completed,
+        revenue: dashboard.overview?.total_revenue ?? 0,
+      });
     } catch (error) {
       toast.error('Failed to fetch bookings');
     } finally {
@@ -56,6 +78,20 @@ const AdminBookings = () => {
     }
   };
 
+  const loadMoreBookings = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { items, next } = await adminAPI.getBookings({ cursor: nextCursor });
+      setBookings((prev) => [...prev, ...items]);
+      setNextCursor(next);
+    } catch (error) {
+      toast.error('Failed to load more bookings');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchDrivers = async () => {
     try {
       const data = await adminAPI.getUsers({ role: 'driver' });
@@ -127,13 +163,6 @@ const AdminBookings = () => {
     toast.success("Exporting bookings CSV...");
   };
 
-  const stats = {
-    total: bookings.length,
-    pending: bookings.filter(b => b.status === 'pending' || b.status === 'payment_pending').length,
-    completed: bookings.filter(b => b.status === 'completed').length,
-    revenue: bookings.filter(b => b.status === 'completed').reduce((sum, b) => sum + Number(b.final_price || b.estimated_price), 0),
-  };
-
   if (loading && bookings.length === 0) {
     return (
       <div className="h-96 flex items-center justify-center">
@@ -178,7 +207,7 @@ const AdminBookings = () => {
           { label: 'Total', value: stats.total, color: 'blue', icon: Calendar },
           { label: 'Pending', value: stats.pending, color: 'amber', icon: AlertCircle },
           { label: 'Completed', value: stats.completed, color: 'emerald', icon: CheckCircle2 },
-          { label: 'Revenue', value: `KES ${stats.revenue.toLocaleString()}`, color: 'violet', icon: DollarSign }
+          { label: 'Revenue', value: `KES ${Number(stats.revenue).toLocaleString()}`, color: 'violet', icon: DollarSign }
         ].map((stat, i) => (
           <div key={i} className="bg-white p-5 rounded-2xl border border-slate-100 shadow-sm group hover:scale-[1.02] transition-all">
             <div className="flex items-center gap-3">
@@ -350,6 +379,17 @@ const AdminBookings = () => {
             </div>
           )}
         </div>
+        {nextCursor && (
+          <div className="p-4 border-t border-slate-100 text-center">
+            <button
+              onClick={loadMoreBookings}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-white border border-slate-200 rounded-xl text-sm font-bold text-slate-700 hover:bg-slate-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more bookings'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Assignment Modal */}
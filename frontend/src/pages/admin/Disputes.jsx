@@ -7,6 +7,10 @@ import toast from 'react-hot-toast';
 const AdminDisputes = () => {
   const [disputes, setDisputes] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Disputes are listed a page at a time; the totals are counted server-side
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [counts, setCounts] = useState({ total: 0, pending: 0, resolved: 0 });
 
   useEffect(() => {
     fetchDisputes();
@@ -14,8 +18,14 @@ const AdminDisputes = () => {
 
   const fetchDisputes = async () => {
     try {
-      const data = await adminAPI.getDisputes();
-      setDisputes(Array.isArray(data) ? data : data.results || data.data || []);
+      const [page, pending, resolved] = await Promise.all([
+        adminAPI.getDisputes({ count: 'exact' }),
+        adminAPI.getDisputes({ status: 'pending', page_size: 1, count: 'exact' }),
+        adminAPI.getDisputes({ status: 'resolved', page_size: 1, count: 'exact' }),
+      ]);
+      setDisputes(page.items);
+      setNextCursor(page.next);
+      setCounts({ total: page.count ?? 0, pending: pending.count ?? 0, resolved: resolved.count ?? 0 });
     } catch (error) {
       toast.error('Failed to fetch disputes');
     } finally {
@@ -23,6 +33,20 @@ const AdminDisputes = () => {
     }
   };
 
+  const loadMoreDisputes = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { items, next } = await adminAPI.getDisputes({ cursor: nextCursor });
+      setDisputes((prev) => [...prev, ...items]);
+      setNextCursor(next);
+    } catch (error) {
+      toast.error('Failed to load more disputes');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleResolve = async (disputeId) => {
     const resolution = prompt('Enter resolution details:');
     if (resolution) {
@@ -71,16 +95,16 @@ const AdminDisputes = () => {
           </div>
           <div className="flex items-center gap-2 text-sm text-slate-500">
             <Shield className="w-4 h-4" />
-            <span>{disputes.filter(d => d.status === 'pending').length} pending</span>
+            <span>{counts.pending} pending</span>
           </div>
         </div>
 
         {/* Stats */}
         <div className="grid grid-cols-3 gap-4">
           {[
-            { label: 'Total', value: disputes.length, color: 'blue' },
-            { label: 'Pending', value: disputes.filter(d => d.status === 'pending').length, color: 'amber' },
-            { label: 'Resolved', value: disputes.filter(d => d.status === 'resolved').length, color: 'emerald' },
+            { label: 'Total', value: counts.total, color: 'blue' },
+            { label: 'Pending', value: counts.pending, color: 'amber' },
+            { label: 'Resolved', value: counts.resolved, color: 'emerald' },
           ].map((stat) => (
             <div key={stat.label} className="bg-white rounded-2xl border border-slate-100 shadow-sm p-4">
               <p className="text-[10px] font-bold text-slate-400 uppercase tracking-wider">{stat.label}</p>
@@ -141,6 +165,18 @@ const AdminDisputes = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={loadMoreDisputes}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-white border border-slate-200 rounded-xl text-sm font-bold text-slate-700 hover:bg-slate-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more disputes'}
+            </button>
+          </div>
+        )}
+
         {disputes.length === 0 && (
           <div className="text-center py-16 bg-white rounded-2xl border border-slate-100 shadow-sm">
             <div className="w-20 h-20 bg-emerald-100 rounded-2xl flex items-center justify-center mx-auto mb-4">
@@ -22,6 +22,10 @@ const AdminLogs = () => {
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [actionFilter, setActionFilter] = useState('all');
+  // The audit trail only grows: load it a page at a time, newest first
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [totalEvents, setTotalEvents] = useState(0);
 
   useEffect(() => {
     fetchLogs();
@@ -30,8 +34,10 @@ const AdminLogs = () => {
   const fetchLogs = async () => {
     setLoading(true);
     try {
-      const data = await adminAPI.getLogs();
-      setLogs(Array.isArray(data) ? data : data.results || data.data || []);
+      const { items, next, count } = await adminAPI.getLogs({ count: 'approx' });
+      setLogs(items);
+      setNextCursor(next);
+      setTotalEvents(count ?? items.length);
     } catch (error) {
       toast.error('Failed to fetch audit trails');
     } finally {
@@ -39,6 +45,20 @@ const AdminLogs = () => {
     }
   };
 
+  const loadMoreLogs = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const { items, next } = await adminAPI.getLogs({ cursor: nextCursor });
+      setLogs((prev) => [...prev, ...items]);
+      setNextCursor(next);
+    } catch (error) {
+      toast.error('Failed to load more audit trails');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleString('en-KE', {
       month: 'short',
@@ -128,7 +148,7 @@ const AdminLogs = () => {
             </div>
             <div>
               <p className="text-[10px] font-black uppercase text-gray-400">Total Events</p>
-              <p className="text-2xl font-black text-gray-900">{logs.length}</p>
+              <p className="text-2xl font-black text-gray-900">{totalEvents}</p>
             </div>
           </div>
         </div>
@@ -250,6 +270,17 @@ const AdminLogs = () => {
               <p className="text-gray-400 font-black text-xs uppercase tracking-widest">No matching audit logs found</p>
             </div>
           )}
+          {nextCursor && (
+            <div className="p-6 text-center border-t border-gray-50">
+              <button
+                onClick={loadMoreLogs}
+                disabled={loadingMore}
+                className="px-6 py-3 bg-white border border-gray-100 rounded-2xl text-sm font-bold text-gray-600 hover:text-emerald-600 hover:bg-emerald-50 transition-all disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load older events'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -11,6 +11,7 @@ import {
     AlertCircle
 } from 'lucide-react';
 import { paymentsAPI } from '../../api/payments';
+import { adminAPI } from '../../api/admin';
 import toast from 'react-hot-toast';
 import { exportToCSV } from '../../utils/csvExport';
 
@@ -21,6 +22,10 @@ const AdminPayments = () => {
     const [methodFilter, setMethodFilter] = useState('all'); // all, mobile_money, bank_transfer, cash
     const [searchTerm, setSearchTerm] = useState('');
     const [verifyingPayment, setVerifyingPayment] = useState(null);
+    // Payments are listed a page at a time; the summary comes from server-side counts
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [summary, setSummary] = useState({ collected: 0, pending: 0, paid: 0 });
 
     useEffect(() => {
         fetchPayments();
@@ -29,8 +34,19 @@ const AdminPayments = () => {
     const fetchPayments = async () => {
         setLoading(true);
         try {
-            const data = await paymentsAPI.getPayments();
-            setPayments(data);
+            const [page, pending, paid, stats] = await Promise.all([
+                paymentsAPI.getPayments(),
+                paymentsAPI.getPayments({ status: 'pending', page_size: 1, count: 'exact' }),
+                paymentsAPI.getPayments({ status: 'paid', page_size: 1, count: 'exact' }),
+                adminAPI.getDashboardStats(),
+            ]);
+            setPayments(page.items);
+            setNextCursor(page.next);
+            setSummary({
+                collected: stats.overview?.total_revenue ?? 0,
+                pending: pending.count ?? 0,
+                paid: paid.count ?? 0,
+            });
         } catch (error) {
             toast.error("Failed to load payments");
         } finally {
@@ -38,6 +54,20 @@ const AdminPayments = () => {
         }
     };
 
+    const loadMorePayments = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const { items, next } = await paymentsAPI.getPayments({ cursor: nextCursor });
+            setPayments((prev) => [...prev, ...items]);
+            setNextCursor(next);
+        } catch (error) {
+            toast.error("Failed to load more payments");
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const formatDate = (dateString) => {
         if (!dateString) return 'N/A';
         return new Date(dateString).toLocaleDateString('en-KE', {
@@ -124,7 +154,7 @@ const AdminPayments = () => {
                         <div className="bg-emerald-50 p-2.5 rounded-xl text-emerald-600"><DollarSign className="w-5 h-5" /></div>
                         <div>
                             <p className="text-[10px] font-bold text-slate-400 uppercase tracking-wider">Total Collected</p>
-                            <p className="text-lg font-black text-slate-900">KES {payments.filter(p => p.status === 'paid').reduce((sum, p) => sum + Number(p.amount), 0).toLocaleString()}</p>
+                            <p className="text-lg font-black text-slate-900">KES {Number(summary.collected).toLocaleString()}</p>
                         </div>
                     </div>
                 </div>
@@ -133,7 +163,7 @@ const AdminPayments = () => {
                         <div className="bg-amber-50 p-2.5 rounded-xl text-amber-600"><Clock className="w-5 h-5" /></div>
                         <div>
                             <p className="text-[10px] font-bold text-slate-400 uppercase tracking-wider">Pending</p>
-                            <p className="text-lg font-black text-slate-900">{payments.filter(p => p.status === 'pending').length}</p>
+                            <p className="text-lg font-black text-slate-900">{summary.pending}</p>
                         </div>
                     </div>
                 </div>
@@ -142,7 +172,7 @@ const AdminPayments = () => {
                         <div className="bg-blue-50 p-2.5 rounded-xl text-blue-600"><CheckCircle2 className="w-5 h-5" /></div>
                         <div>
                             <p className="text-[10px] font-bold text-slate-400 uppercase tracking-wider">Successful</p>
-                            <p className="text-lg font-black text-slate-900">{payments.filter(p => p.status === 'paid').length}</p>
+                            <p className="text-lg font-black text-slate-900">{summary.paid}</p>
                         </div>
                     </div>
                 </div>
@@ -261,6 +291,17 @@ const AdminPayments = () => {
                         </div>
                     )}
                 </div>
+                {nextCursor && !loading && (
+                    <div className="p-4 border-t border-slate-100 text-center">
+                        <button
+                            onClick={loadMorePayments}
+                            disabled={loadingMore}
+                            className="px-4 py-2 bg-white border border-slate-200 rounded-xl text-sm font-bold text-slate-700 hover:bg-slate-50 disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Loading...' : 'Load more payments'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );